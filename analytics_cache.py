@@ -0,0 +1,86 @@
+"""
+分析结果缓存模块
+Streamlit 每次交互都会重跑整个脚本，分析页面的统计表和 Plotly 图表按
+(名称, 记录集版本, 页面参数) 缓存，记录没有变化、参数相同时直接复用；
+超过条目数或内存上限时淘汰最久未使用的结果
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 256
+
+
+def estimate_size(value):
+    """估算缓存值占用的内存（字节）"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if hasattr(value, "to_plotly_json"):
+        # Plotly 图表：按其数据和布局估算
+        return estimate_size(value.to_plotly_json())
+    return sys.getsizeof(value)
+
+
+class AnalyticsCache:
+    """
+    带内存上限的 LRU 缓存
+
+    get(key, compute) 命中时返回缓存值，否则调用 compute() 计算并缓存；
+    单个结果超过内存上限时只返回、不缓存
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # 键 -> (值, 字节数)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, compute):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = compute()
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while self._entries and (self.total_bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
@@ -0,0 +1,272 @@
+"""
+分析立方体模块
+深度分析页面的统计全部来自一个预聚合的立方体：
+    维度  day × map × mode × zone × survived
+    度量  count, profit_sum, profit_sq, profit_min, profit_max
+记录表只会追加，立方体只折叠上次之后新增的行，
+趋势、地图、模式、组合热力图、风险收益都是对立方体单元格的切片或上卷，与记录数无关；
+物资统计见 item_facts（按物品拆分的事实表）
+
+桌面客户端折叠的历史汇总（record_loader.load_rollup，没有 zone）以 zone="" 并入
+
+时间无法解析的记录归入 day 为 NAT 的"日期未知"单元格：总数、地图、模式、热力图、风险收益都计入，
+与记录列表的局数一致；只有按日期上卷（每日趋势、累计收益）时不计入
+"""
+
+import numpy as np
+import pandas as pd
+
+
+NAT = np.iinfo(np.int64).min  # 也是"日期未知"单元格的 day
+
+CUBE_KEYS = ["day", "map", "mode", "zone", "survived"]
+MEASURES = ["count", "profit_sum", "profit_sq", "profit_min", "profit_max"]
+CUBE_COLUMNS = CUBE_KEYS + MEASURES
+
+# 合并单元格时各度量的合并方式
+MEASURE_MERGE = {"count": "sum", "profit_sum": "sum", "profit_sq": "sum",
+                 "profit_min": "min", "profit_max": "max"}
+
+SUMMARY_NAMES = {"day": "日期", "map": "地图", "mode": "模式", "zone": "刷新点"}
+DIMENSIONS = ["map", "mode", "zone"]  # 字符串维度
+
+
+def _grow(column, size):
+    """数组扩容到 size（新增部分为 0）"""
+    if len(column) >= size:
+        return column
+    grown = np.zeros(size, dtype=column.dtype)
+    grown[:len(column)] = column
+    return grown
+
+
+def summarize(cells, by):
+    """
+    单元格按 by 上卷为页面使用的中文统计表
+
+    列：分组列（日期/地图/模式/刷新点）、总收益、场均收益、局数、存活率
+    """
+    if "day" in by:
+        # 日期未知的单元格没有位置可放，不计入按日期的统计
+        cells = cells[cells["day"].notna()]
+    survived_count = cells["count"].where(cells["survived"].astype(bool), 0)
+    grouped = cells.assign(survived_count=survived_count).groupby(by, observed=True, as_index=False).agg(
+        总收益=("profit_sum", "sum"), 局数=("count", "sum"), 撤离局数=("survived_count", "sum"),
+    )
+    grouped["场均收益"] = grouped["总收益"] / grouped["局数"]
+    grouped["存活率"] = grouped["撤离局数"] / grouped["局数"] * 100
+    grouped = grouped.rename(columns=SUMMARY_NAMES)
+    return grouped[[SUMMARY_NAMES[k] for k in by] + ["总收益", "场均收益", "局数", "存活率"]]
+
+
+class AnalyticsCube:
+    """
+    增量维护的分析立方体
+
+    单元格的分组键和度量保存在 numpy 数组中，分组键 -> 行号 的字典用于定位单元格；
+    update(table) 只把记录表中上次之后新增的行先分组、再逐组并入，开销与新增行数有关；
+    查询方法都作用于单元格（最多 天数 × 地图 × 模式 × 刷新点 × 2 行）
+
+    地图、模式、刷新点直接沿用记录表的类别编号（记录表的类别表只会追加）
+    """
+
+    def __init__(self, capacity=1024):
+        self.rows = 0  # 已折叠的记录行数
+        self.version = 0
+        self._size = 0
+        self._index = {}  # (day, map, mode, zone, survived) -> 单元格行号
+        self._labels = {name: [] for name in DIMENSIONS}
+        self._keys = {
+            "day": np.empty(capacity, dtype=np.int64),  # 1970-01-01 起的天数
+            "map": np.empty(capacity, dtype=np.int32),
+            "mode": np.empty(capacity, dtype=np.int32),
+            "zone": np.empty(capacity, dtype=np.int32),
+            "survived": np.empty(capacity, dtype=bool),
+        }
+        self._measures = {name: np.empty(capacity, dtype=np.int64) for name in MEASURES}
+
+        self._frame = (None, None)  # (版本, 单元格 DataFrame)
+        self._merged = (None, None, None)  # (版本, 历史汇总, 合并后的单元格)
+
+    # ---------- 维护 ----------
+
+    def update(self, table):
+        """把记录表新增的行并入立方体（时间未知的记录并入日期未知的单元格）"""
+        n = len(table)
+        if n <= self.rows:
+            return
+        new = slice(self.rows, n)
+        day = table.column("day")[new]  # 记录表导入时已由时间列算好
+        profit = table.column("profit")[new]
+        for name in DIMENSIONS:
+            self._labels[name] = table.categories(name)
+
+        self._fold(pd.DataFrame({
+            "day": day,
+            "map": table.column("map")[new],
+            "mode": table.column("mode")[new],
+            "zone": table.column("zone")[new],
+            "survived": table.column("survived")[new],
+            "profit": profit,
+        }))
+
+        self.rows = n
+        self.version += 1
+
+    def _fold(self, rows, grouped=False):
+        """
+        并入单元格
+
+        Args:
+            rows: 分组键（day 为天数，其余为编号）+ profit 的逐条记录；
+                  grouped 为真时为已分组的单元格（分组键 + 各度量）
+        """
+        if len(rows) == 0:
+            return
+        if not grouped:
+            rows = rows.assign(profit_sq=rows["profit"] * rows["profit"]).groupby(
+                CUBE_KEYS, as_index=False, sort=False).agg(
+                count=("profit", "size"), profit_sum=("profit", "sum"), profit_sq=("profit_sq", "sum"),
+                profit_min=("profit", "min"), profit_max=("profit", "max"),
+            )
+
+        # 定位各组所在的单元格，新组追加到末尾
+        index = self._index
+        slots = np.empty(len(rows), dtype=np.int64)
+        fresh = []
+        keys = zip(*(rows[k].tolist() for k in CUBE_KEYS))
+        for i, key in enumerate(keys):
+            slot = index.get(key)
+            if slot is None:
+                slot = index[key] = self._size + len(fresh)
+                fresh.append(i)
+            slots[i] = slot
+
+        if fresh:
+            start, end = self._size, self._size + len(fresh)
+            self._reserve(end)
+            for name in CUBE_KEYS:
+                self._keys[name][start:end] = rows[name].to_numpy()[fresh]
+            for name in ("count", "profit_sum", "profit_sq"):
+                self._measures[name][start:end] = 0
+            self._measures["profit_min"][start:end] = np.iinfo(np.int64).max
+            self._measures["profit_max"][start:end] = np.iinfo(np.int64).min
+            self._size = end
+
+        # 同一批中各组互不相同，可以直接按行号更新
+        m = self._measures
+        for name in ("count", "profit_sum", "profit_sq"):
+            m[name][slots] += rows[name].to_numpy(dtype=np.int64)
+        m["profit_min"][slots] = np.minimum(m["profit_min"][slots], rows["profit_min"].to_numpy(dtype=np.int64))
+        m["profit_max"][slots] = np.maximum(m["profit_max"][slots], rows["profit_max"].to_numpy(dtype=np.int64))
+
+    def _reserve(self, size):
+        """容量不足时按倍数扩容"""
+        capacity = len(self._keys["day"])
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2)
+        for columns in (self._keys, self._measures):
+            for name, column in columns.items():
+                columns[name] = _grow(column, capacity)
+
+    def _with_history(self, history):
+        """并入历史汇总后的副本（历史汇总没有 zone，记为 ""）"""
+        merged = AnalyticsCube(capacity=1)
+        merged._size = self._size
+        merged._index = dict(self._index)
+        merged._keys = {name: column.copy() for name, column in self._keys.items()}
+        merged._measures = {name: column.copy() for name, column in self._measures.items()}
+        merged._labels = {name: list(labels) for name, labels in self._labels.items()}
+
+        rows = history.assign(zone="")
+        rows["day"] = rows["day"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+        for name in DIMENSIONS:
+            rows[name] = merged._encode(name, rows[name])
+        rows["survived"] = rows["survived"].astype(bool)
+        merged._fold(rows.groupby(CUBE_KEYS, as_index=False, sort=False).agg(MEASURE_MERGE), grouped=True)
+        return merged
+
+    def _encode(self, name, values):
+        """字符串编码为类别编号，不在类别表中的追加到末尾"""
+        labels = self._labels[name]
+        lookup = {label: code for code, label in enumerate(labels)}
+        codes = []
+        for value in values.tolist():
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(labels)
+                labels.append(value)
+            codes.append(code)
+        return np.array(codes, dtype=np.int32)
+
+    # ---------- 查询 ----------
+
+    def _cells_frame(self):
+        """单元格 DataFrame（维度列为分类类型），立方体没有变化时复用"""
+        if self._frame[0] != self.version:
+            n = self._size
+            frame = pd.DataFrame({
+                # NAT 即 datetime64 的 NaT，日期未知的单元格 day 为 NaT
+                "day": self._keys["day"][:n].astype("datetime64[D]").astype("datetime64[s]"),
+                **{name: pd.Categorical.from_codes(self._keys[name][:n], self._labels[name])
+                   for name in DIMENSIONS},
+                "survived": self._keys["survived"][:n],
+                **{name: self._measures[name][:n] for name in MEASURES},
+            })
+            self._frame = (self.version, frame)
+        return self._frame[1]
+
+    def cells(self, history=None):
+        """
+        立方体单元格，history 为桌面客户端的历史汇总（列同 CUBE_COLUMNS，缺 zone）
+
+        合并结果按 (立方体版本, 历史汇总对象) 缓存
+        """
+        if history is None or len(history) == 0:
+            return self._cells_frame()
+        version, cached_history, cells = self._merged
+        if version != self.version or cached_history is not history:
+            cells = self._with_history(history)._cells_frame()
+            self._merged = (self.version, history, cells)
+        return cells
+
+    def rollup(self, by, history=None):
+        """按 by（维度列表）上卷，返回各组的度量"""
+        return self.cells(history).groupby(by, observed=True, as_index=False).agg(MEASURE_MERGE)
+
+    def summary(self, by, history=None):
+        """按 by 上卷为中文统计表（见 summarize）"""
+        return summarize(self.cells(history), by)
+
+    def totals(self, history=None):
+        """总局数、撤离局数、总收益、最高单局"""
+        cells = self.cells(history)
+        if len(cells) == 0:
+            return {"games": 0, "survived": 0, "profit": 0, "best": 0}
+        return {
+            "games": int(cells["count"].sum()),
+            "survived": int(cells.loc[cells["survived"], "count"].sum()),
+            "profit": int(cells["profit_sum"].sum()),
+            "best": int(cells["profit_max"].max()),
+        }
+
+    def pivot(self, index, columns, history=None):
+        """两个维度的场均收益透视表（热力图），没有记录的组合为 0"""
+        stats = self.summary([index, columns], history)
+        return stats.pivot(index=SUMMARY_NAMES[index], columns=SUMMARY_NAMES[columns],
+                           values="场均收益").fillna(0)
+
+    def risk(self, by="mode", history=None):
+        """按 by 的风险收益：存活率、撤离局的场均收益、期望收益"""
+        rolled = self.rollup([by, "survived"], history)
+        games = rolled.groupby(by, observed=True)["count"].sum()
+        won = rolled[rolled["survived"]].set_index(by)
+        survival = (won["count"].reindex(games.index, fill_value=0) / games * 100)
+        avg_profit = (won["profit_sum"] / won["count"]).reindex(games.index, fill_value=0)
+        return pd.DataFrame({
+            SUMMARY_NAMES[by]: games.index.astype(str),
+            "存活率": survival.to_numpy(),
+            "成功场均": avg_profit.to_numpy(),
+            "期望收益": (survival / 100 * avg_profit).to_numpy(),
+        })
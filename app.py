@@ -9,6 +9,14 @@ import numpy as np
 from pathlib import Path
 import os
 
+from record_loader import RecordLoaderCache
+from record_schema import normalize_frame
+from record_table import RecordTable
+from live_session_log import read_live_session  # desktop 目录已由 record_loader 加入路径
+from dedupe_index import frame_keys
+from publish import GenerationCache, bump_generation
+from analytics_cache import AnalyticsCache
+
 # 1. 页面配置 (必须在第一行)
 st.set_page_config(
     page_title="三角洲战术终端 v4.0", 
@@ -502,72 +510,61 @@ RANK_DATA = {
 
 # ==================== 实时数据读取功能 ====================
 
+@st.cache_resource
+def get_live_session_cache():
+    """跨会话共享的实时会话缓存（桌面客户端发布新代数时才重新读取）"""
+    return GenerationCache(Path.home() / "Documents" / "DeltaTool" / "live_session.json")
+
 def load_live_session():
     """加载实时会话数据"""
-    data_dir = Path.home() / "Documents" / "DeltaTool"
-    live_session_file = data_dir / "live_session.json"
-    
-    if live_session_file.exists():
-        try:
-            with open(live_session_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return None
-    return None
-
-def load_all_game_records():
-    """加载所有游戏记录（包括JSON和CSV）"""
-    data_dir = Path.home() / "Documents" / "DeltaTool"
-    records = []
-    
-    # 方式1：尝试读取JSON文件
-    json_file = data_dir / "game_records.json"
-    if json_file.exists():
-        try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                json_records = json.load(f)
-                print(f"[DEBUG] 从JSON加载了 {len(json_records)} 条记录")
-                records.extend(json_records)
-        except Exception as e:
-            print(f"[DEBUG] 读取JSON失败: {e}")
-    
-    # 方式2：尝试读取所有CSV文件
-    csv_files = list(data_dir.glob("*.csv"))
-    print(f"[DEBUG] 找到 {len(csv_files)} 个CSV文件: {[f.name for f in csv_files]}")
-    for csv_file in csv_files:
-        try:
-            df = pd.read_csv(csv_file, encoding='utf-8-sig')
-            print(f"[DEBUG] 从 {csv_file.name} 加载了 {len(df)} 条记录")
-            if len(df) > 0:
-                # 转换CSV为记录格式
-                for _, row in df.iterrows():
-                    # 处理survived字段（可能是布尔值或字符串）
-                    survived_val = row.get('survived', True)
-                    if isinstance(survived_val, str):
-                        survived = survived_val.lower() in ['true', '1', 'yes', '✅']
-                    else:
-                        survived = bool(survived_val)
-                    
-                    record = {
-                        "datetime": row.get('datetime', ''),
-                        "map": row.get('map', '未知'),
-                        "mode": row.get('mode', '未知'),
-                        "zone": row.get('zone', ''),
-                        "items": row.get('items', ''),
-                        "profit": int(row.get('profit', 0)) if pd.notna(row.get('profit')) else 0,
-                        "survived": survived
-                    }
-                    # 避免重复（简单检查datetime）
-                    if not any(r.get('datetime') == record['datetime'] for r in records):
-                        records.append(record)
-        except Exception as e:
-            print(f"[DEBUG] 读取 {csv_file.name} 失败: {e}")
-    
-    print(f"[DEBUG] 总共加载 {len(records)} 条记录")
-    
-    if records:
-        return pd.DataFrame(records)
-    return None
+    cache = get_live_session_cache()
+    return cache.get(lambda: read_live_session(cache.path))
+
+@st.cache_resource
+def get_record_loader():
+    """跨会话共享的增量记录加载器"""
+    return RecordLoaderCache()
+
+def load_all_game_records(days=None):
+    """加载游戏记录（包括JSON和CSV），只重新解析有变化的文件；指定天数时只读取最近这些天所在的月分区"""
+    date_from = (datetime.now() - timedelta(days=days)).date() if days else None
+    return get_record_loader().load(date_from)
+
+def load_analysis_cube():
+    """分析页面使用的立方体，以及要并入的桌面客户端历史汇总（没有时为 None）"""
+    history = get_record_loader().load_rollup() if st.session_state.get("include_rollup") else None
+    return st.session_state.game_records.cube(), history
+
+@st.cache_resource
+def get_analytics_cache():
+    """跨会话共享的分析结果缓存（统计表、图表），内存上限对整个进程生效"""
+    return AnalyticsCache()
+
+def cached_analysis(name, compute, *params):
+    """按 (名称, 记录集版本, 历史汇总版本, 页面参数) 缓存分析结果，记录没有变化时直接复用"""
+    rollup_version = get_record_loader().rollup_version if st.session_state.get("include_rollup") else None
+    key = (name, st.session_state.game_records.cache_key, rollup_version) + params
+    return get_analytics_cache().get(key, compute)
+
+RECENT_ROWS = 1000  # 记录表格只显示最近录入的记录，完整记录通过导出下载
+
+def record_totals():
+    """(撤离局数, 收益合计, 场均收益)，按记录集版本缓存"""
+    table = st.session_state.game_records
+    def compute():
+        profit = table.column("profit")
+        return int(table.column("survived").sum()), int(profit.sum()), float(profit.mean())
+    return cached_analysis("record_totals", compute)
+
+def recent_records_frame():
+    """最近录入的 RECENT_ROWS 条记录（页面格式），按记录集版本缓存"""
+    table = st.session_state.game_records
+    return cached_analysis("recent_frame", lambda: table.to_frame(np.arange(max(len(table) - RECENT_ROWS, 0), len(table))))
+
+def records_csv():
+    """全部记录导出为 CSV（UTF-8 BOM），按记录集版本缓存"""
+    table = st.session_state.game_records
+    return cached_analysis("record_csv", lambda: table.to_frame().to_csv(index=False, encoding='utf-8-sig').encode('utf-8-sig'))
 
 # 检测是否为云端环境
 import os
@@ -577,12 +574,14 @@ IS_CLOUD = os.getenv("STREAMLIT_SHARING_MODE") is not None or \
 
 # 初始化session_state
 if 'game_records' not in st.session_state:
-    st.session_state.game_records = []
+    st.session_state.game_records = RecordTable()
+    st.session_state.include_rollup = not IS_CLOUD  # 本地数据才合并历史汇总
+    st.session_state.loaded_days = None  # 已加载的时间范围（None 为全部历史）
     
     # 云端环境直接加载示例数据
     if IS_CLOUD:
         print("[DEBUG] 云端环境检测到，加载示例数据")
-        st.session_state.game_records = [
+        st.session_state.game_records = RecordTable.from_session_records([
             {
                 "日期": "2025-12-09T20:47:00",
                 "地图": "大坝",
@@ -628,7 +627,7 @@ if 'game_records' not in st.session_state:
                 "价值": 122462,
                 "撤离": "✅"
             }
-        ]
+        ])
         print(f"[DEBUG] 示例数据已加载: {len(st.session_state.game_records)} 条")
     else:
         # 本地环境尝试从文件加载历史数据
@@ -637,17 +636,7 @@ if 'game_records' not in st.session_state:
             print(f"[DEBUG] load_all_game_records 返回: {df is not None}, 长度: {len(df) if df is not None else 0}")
             if df is not None and len(df) > 0:
                 print(f"[DEBUG] DataFrame 列: {list(df.columns)}")
-                for idx, row in df.iterrows():
-                    record = {
-                        "日期": str(row.get('datetime', '')),
-                        "地图": str(row.get('map', '未知')),
-                        "模式": str(row.get('mode', '未知')),
-                        "刷新点": str(row.get('zone', '')),
-                        "物资": str(row.get('items', '')),
-                        "价值": int(row.get('profit', 0)) if pd.notna(row.get('profit')) else 0,
-                        "撤离": "✅" if row.get('survived', True) else "❌"
-                    }
-                    st.session_state.game_records.append(record)
+                st.session_state.game_records = RecordTable.from_frame(df)
                 print(f"[DEBUG] 总共加载 {len(st.session_state.game_records)} 条记录")
             else:
                 print("[DEBUG] 没有找到历史数据")
@@ -687,10 +676,22 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("### 🎮 快捷统计")
     
+    # 只看最近一段时间时只读取相关月份的记录，加载耗时与全部历史的长短无关
+    if not IS_CLOUD:
+        load_days = st.selectbox("加载范围", [None, 30, 90, 365], key="load_days",
+                                 format_func=lambda d: "全部历史" if d is None else f"最近{d}天",
+                                 help="切换时从数据目录重新加载记录")
+        if load_days != st.session_state.loaded_days:
+            df = load_all_game_records(load_days)
+            st.session_state.game_records = RecordTable.from_frame(df) if df is not None and len(df) > 0 \
+                else RecordTable()
+            st.session_state.loaded_days = load_days
+            st.session_state.include_rollup = load_days is None  # 历史汇总只在查看全部历史时并入
+    
     # 从session中计算统计
     if 'game_records' in st.session_state and st.session_state.game_records:
         total_games = len(st.session_state.game_records)
-        total_profit = sum(r.get('价值', 0) for r in st.session_state.game_records if r.get('撤离') == "✅")
+        total_profit = cached_analysis("total_profit", st.session_state.game_records.total_profit)
         st.metric("总局数", total_games)
         st.metric("累计收益", f"{int(total_profit):,}")
     else:
@@ -1668,27 +1669,60 @@ elif menu == "📈 数据管理":
         st.markdown("支持 CSV 格式，包含列: datetime, map, mode, zone, items, profit, survived")
         
         uploaded_file = st.file_uploader("选择 CSV 文件", type=['csv'])
-        if uploaded_file:
+        upload_key = (uploaded_file.name, uploaded_file.size) if uploaded_file else None
+        if uploaded_file and st.session_state.get("last_upload") == upload_key:
+            # 页面重跑时不重复导入同一个文件
+            st.info(f"📁 {uploaded_file.name} 已导入")
+        elif uploaded_file:
             try:
-                df = pd.read_csv(uploaded_file, encoding='utf-8-sig')
-                st.dataframe(df, use_container_width=True)
-                
                 # 转换数据格式到 game_records
                 if 'game_records' not in st.session_state:
-                    st.session_state.game_records = []
+                    st.session_state.game_records = RecordTable()
+                
+                # 同时保存到文档目录
+                save_path = None
+                try:
+                    save_dir = Path.home() / "Documents" / "DeltaTool"
+                    save_dir.mkdir(parents=True, exist_ok=True)
+                    import time
+                    ts = time.strftime("%Y%m%d_%H%M%S")
+                    save_path = save_dir / f"uploaded_game_records_{ts}.csv"
+                except Exception as e:
+                    st.warning(f"备份失败: {e}")
                 
-                # 将上传的数据转换为标准格式
-                for _, row in df.iterrows():
-                    record = {
-                        "日期": row.get('datetime', datetime.now().strftime("%Y-%m-%d %H:%M")),
-                        "地图": row.get('map', '未知'),
-                        "模式": row.get('mode', '未知'),
-                        "刷新点": row.get('zone', ''),
-                        "物资": row.get('items', ''),
-                        "价值": int(row.get('profit', 0)) if pd.notna(row.get('profit')) else 0,
-                        "撤离": "✅" if row.get('survived', True) else "❌"
-                    }
-                    st.session_state.game_records.append(record)
+                # 分块流式读取：每块按列转换后批量追加，内存占用只与块大小有关
+                progress_bar = st.progress(0.0, text="正在导入...")
+                dedupe = get_record_loader().dedupe
+                source = save_path.name if save_path is not None else uploaded_file.name
+                imported = 0
+                skipped = 0
+                preview = None
+                for chunk in pd.read_csv(uploaded_file, encoding='utf-8-sig', chunksize=50000):
+                    if preview is None:
+                        preview = chunk.head(1000)
+                    
+                    records_df = normalize_frame(chunk)
+                    if records_df["datetime"].isna().all():
+                        records_df["datetime"] = datetime.now().strftime("%Y-%m-%d %H:%M")
+                    
+                    # 已由其他途径导入过的同一局在进入内存前丢弃
+                    accepted = dedupe.claim(frame_keys(records_df), source)
+                    skipped += len(accepted) - sum(accepted)
+                    records_df = records_df[accepted]
+                    chunk = chunk[accepted]
+                    st.session_state.game_records.extend_frame(records_df)
+                    
+                    if save_path is not None and len(chunk):
+                        chunk.to_csv(save_path, mode='a', header=(imported == 0), index=False,
+                                     encoding='utf-8-sig' if imported == 0 else 'utf-8')
+                    
+                    imported += len(chunk)
+                    progress_bar.progress(min(uploaded_file.tell() / max(uploaded_file.size, 1), 1.0),
+                                          text=f"已导入 {imported:,} 条记录")
+                progress_bar.empty()
+                
+                if preview is not None:
+                    st.dataframe(preview, use_container_width=True)
                 
                 # 更新统计
                 if 'total_games' not in st.session_state:
@@ -1696,25 +1730,17 @@ elif menu == "📈 数据管理":
                     st.session_state.total_profit = 0
                 
                 st.session_state.total_games = len(st.session_state.game_records)
-                st.session_state.total_profit = sum(
-                    r['价值'] for r in st.session_state.game_records 
-                    if r['撤离'] == "✅"
-                )
+                st.session_state.total_profit = st.session_state.game_records.total_profit()
+                st.session_state.last_upload = upload_key
                 
-                st.success(f"✅ 成功导入 {len(df)} 条记录！")
+                st.success(f"✅ 成功导入 {imported} 条记录！")
+                if skipped:
+                    st.info(f"🔁 跳过 {skipped} 条已存在的重复记录")
                 st.balloons()
-                
-                # 同时保存到文档目录
-                try:
-                    save_dir = Path.home() / "Documents" / "DeltaTool"
-                    save_dir.mkdir(parents=True, exist_ok=True)
-                    import time
-                    ts = time.strftime("%Y%m%d_%H%M%S")
-                    save_path = save_dir / f"uploaded_game_records_{ts}.csv"
-                    df.to_csv(save_path, index=False, encoding='utf-8-sig')
+                if save_path is not None and imported:
+                    # 通知各会话的加载器：保存的 CSV 已写完
+                    bump_generation(save_dir / "game_records.json")
                     st.info(f"📁 已备份到: {save_path}")
-                except Exception as e:
-                    st.warning(f"备份失败: {e}")
                     
             except Exception as e:
                 st.error(f"❌ 导入失败: {e}")
@@ -1756,7 +1782,7 @@ elif menu == "📈 数据管理":
         
         if st.button("添加记录", type="primary"):
             if 'game_records' not in st.session_state:
-                st.session_state.game_records = []
+                st.session_state.game_records = RecordTable()
             
             st.session_state.game_records.append({
                 "日期": datetime.now().strftime("%Y-%m-%d %H:%M"),
@@ -1779,24 +1805,24 @@ elif menu == "📈 数据管理":
         st.markdown("### 我的游戏记录")
         
         if 'game_records' in st.session_state and st.session_state.game_records:
-            df_records = pd.DataFrame(st.session_state.game_records)
-            st.dataframe(df_records, use_container_width=True, hide_index=True)
+            total_games = len(st.session_state.game_records)
+            st.dataframe(recent_records_frame(), use_container_width=True, hide_index=True)
+            if total_games > RECENT_ROWS:
+                st.caption(f"只显示最近录入的 {RECENT_ROWS} 条，完整记录请导出")
             
             # 统计
             st.markdown("---")
+            survived, total_value, _ = record_totals()
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("总局数", len(df_records))
+                st.metric("总局数", total_games)
             with col2:
-                survived = len(df_records[df_records["撤离"] == "✅"])
-                st.metric("存活率", f"{survived/len(df_records)*100:.1f}%")
+                st.metric("存活率", f"{survived/total_games*100:.1f}%")
             with col3:
-                total_value = df_records["价值"].sum()
                 st.metric("总收益", f"{total_value:,}")
             
             # 下载
-            csv = df_records.to_csv(index=False).encode('utf-8')
-            st.download_button("📥 导出数据", csv, "game_records.csv", "text/csv")
+            st.download_button("📥 导出数据", records_csv(), "game_records.csv", "text/csv")
         else:
             st.info("暂无记录，请先手动录入或上传数据")
 
@@ -1805,58 +1831,58 @@ elif menu == "📋 游戏记录":
     
     # 检查是否有数据
     if 'game_records' in st.session_state and st.session_state.game_records:
-        df_list = []
-        for record in st.session_state.game_records:
-            df_list.append({
-                "日期": record.get("日期", ""),
-                "地图": record.get("地图", ""),
-                "模式": record.get("模式", ""),
-                "刷新点": record.get("刷新点", ""),
-                "物资": record.get("物资", ""),
-                "价值": record.get("价值", 0),
-                "撤离": record.get("撤离", "")
-            })
-        
-        df = pd.DataFrame(df_list)
-        
-        st.success(f"✅ 共有 {len(df)} 条记录")
+        table = st.session_state.game_records
+        total_games = len(table)
+        
+        st.success(f"✅ 共有 {total_games} 条记录")
+        
+        def build_record_figures():
+            # 饼图只需要各类别的局数，不把逐条记录交给 plotly
+            figs = []
+            for name, label, title in (("map", "地图", "地图游玩分布"), ("mode", "模式", "模式分布")):
+                counts = np.bincount(table.column(name), minlength=len(table.categories(name)))
+                played = np.flatnonzero(counts)
+                fig = px.pie(names=np.array(table.categories(name), dtype=object)[played],
+                             values=counts[played], title=title, labels={"names": label})
+                fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', font_color='white')
+                figs.append(fig)
+            return figs[0], figs[1]
+        
+        survived, profit_sum, profit_mean = record_totals()
+        fig_map, fig_mode = cached_analysis("record_figures", build_record_figures)
         
         # 统计概览
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("总局数", len(df))
+            st.metric("总局数", total_games)
         with col2:
-            survived = len(df[df["撤离"] == "✅"])
-            st.metric("存活率", f"{survived/len(df)*100:.1f}%")
+            st.metric("存活率", f"{survived/total_games*100:.1f}%")
         with col3:
-            st.metric("总收益", f"{df['价值'].sum():,}")
+            st.metric("总收益", f"{profit_sum:,}")
         with col4:
-            st.metric("场均收益", f"{df['价值'].mean():,.0f}")
+            st.metric("场均收益", f"{profit_mean:,.0f}")
         
         st.markdown("---")
         
         # 地图分布
         col1, col2 = st.columns(2)
         with col1:
-            fig_map = px.pie(df, names="地图", title="地图游玩分布")
-            fig_map.update_layout(paper_bgcolor='rgba(0,0,0,0)', font_color='white')
             st.plotly_chart(fig_map, use_container_width=True)
         
         with col2:
-            fig_mode = px.pie(df, names="模式", title="模式分布")
-            fig_mode.update_layout(paper_bgcolor='rgba(0,0,0,0)', font_color='white')
             st.plotly_chart(fig_mode, use_container_width=True)
         
         # 详细记录
         st.markdown("### 📋 详细记录")
-        st.dataframe(df, use_container_width=True, hide_index=True)
+        st.dataframe(recent_records_frame(), use_container_width=True, hide_index=True)
+        if total_games > RECENT_ROWS:
+            st.caption(f"只显示最近录入的 {RECENT_ROWS} 条，完整记录请导出")
         
         # 导出功能
         st.markdown("---")
-        csv = df.to_csv(index=False, encoding='utf-8-sig').encode('utf-8-sig')
         st.download_button(
             "📥 导出为CSV",
-            csv,
+            records_csv(),
             "game_records.csv",
             "text/csv",
             key='download-csv'
@@ -1890,7 +1916,7 @@ elif menu == "📉 深度分析":
         st.markdown("---")
         st.markdown("### 🎮 生成模拟数据进行体验")
         if st.button("生成50条模拟数据", type="primary"):
-            st.session_state.game_records = []
+            mock_records = []
             for i in range(50):
                 map_name = random.choice(MAP_LIST)
                 mode = random.choice(MAP_MODES[map_name])
@@ -1904,7 +1930,7 @@ elif menu == "📉 深度分析":
                 days_ago = random.randint(0, 30)
                 record_date = (datetime.now() - timedelta(days=days_ago)).strftime("%Y-%m-%d %H:%M")
                 
-                st.session_state.game_records.append({
+                mock_records.append({
                     "日期": record_date,
                     "地图": map_name,
                     "模式": mode,
@@ -1913,26 +1939,30 @@ elif menu == "📉 深度分析":
                     "价值": value,
                     "撤离": "✅" if survived else "❌"
                 })
+            st.session_state.game_records = RecordTable.from_session_records(mock_records)
+            st.session_state.include_rollup = False
             st.session_state.total_games = 50
-            st.session_state.total_profit = sum(r["价值"] for r in st.session_state.game_records if r["撤离"] == "✅")
+            st.session_state.total_profit = st.session_state.game_records.total_profit()
             st.success("✅ 已生成50条模拟数据！")
             st.rerun()
     else:
-        df = pd.DataFrame(st.session_state.game_records)
-        df["日期时间"] = pd.to_datetime(df["日期"], format='mixed', errors='coerce')
-        df["日期_only"] = df["日期时间"].dt.date
-        
+        table = st.session_state.game_records
+
+        # 各标签页都是分析立方体的切片或上卷，包含已折叠的历史对局；
+        # 统计表和图表按记录集版本和页面参数缓存，切换标签、操作其他控件时不重新计算
+        cube, history = load_analysis_cube()
+
         # 顶部统计卡片
         st.markdown("### 📊 综合统计概览")
         col1, col2, col3, col4, col5 = st.columns(5)
-        
-        total_games = len(df)
-        survived_count = len(df[df["撤离"] == "✅"])
-        survival_rate = survived_count / total_games * 100 if total_games > 0 else 0
-        total_profit = df["价值"].sum()
-        avg_profit = df["价值"].mean()
-        max_profit = df["价值"].max()
-        
+
+        totals = cached_analysis("totals", lambda: cube.totals(history))
+        total_games = totals["games"]
+        survival_rate = totals["survived"] / total_games * 100 if total_games > 0 else 0
+        total_profit = totals["profit"]
+        avg_profit = total_profit / total_games if total_games > 0 else 0
+        max_profit = totals["best"]
+
         with col1:
             st.metric("🎮 总局数", total_games)
         with col2:
@@ -1943,41 +1973,42 @@ elif menu == "📉 深度分析":
             st.metric("📈 场均收益", f"{avg_profit:,.0f}")
         with col5:
             st.metric("🏆 最高单局", f"{max_profit:,.0f}")
-        
+
         st.markdown("---")
-        
+
         # 分析标签页
         tab1, tab2, tab3, tab4 = st.tabs(["📈 趋势分析", "🗺️ 地图分析", "🎯 模式分析", "💎 收益分析"])
-        
+
         with tab1:
             st.markdown("### 📈 历史趋势分析")
-            
-            # 按日期聚合
-            daily_stats = df.groupby("日期_only").agg({
-                "价值": ["sum", "mean", "count"],
-                "撤离": lambda x: (x == "✅").sum() / len(x) * 100
-            }).reset_index()
-            daily_stats.columns = ["日期", "总收益", "场均收益", "局数", "存活率"]
-            
-            # 收益趋势图
-            fig_trend = go.Figure()
-            fig_trend.add_trace(go.Scatter(
-                x=daily_stats["日期"], y=daily_stats["总收益"],
-                mode='lines+markers', name='每日总收益',
-                line=dict(color='#FFD700', width=2),
-                marker=dict(size=8)
-            ))
-            fig_trend.update_layout(
-                title="每日收益趋势",
-                xaxis_title="日期", yaxis_title="收益 (哈夫币)",
-                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                font_color='white'
-            )
-            st.plotly_chart(fig_trend, use_container_width=True)
-            
-            # 存活率趋势
-            col1, col2 = st.columns(2)
-            with col1:
+
+            trend_range = st.selectbox("时间范围", ["最近7天", "最近30天", "最近90天", "全部"],
+                                       index=1, key="trend_range")
+            trend_days = {"最近7天": 7, "最近30天": 30, "最近90天": 90}.get(trend_range)
+
+            def build_trend_figures():
+                all_daily_stats = cube.summary(["day"], history)
+                daily_stats = all_daily_stats
+                if trend_days:
+                    trend_from = pd.Timestamp(datetime.now() - timedelta(days=trend_days)).normalize()
+                    daily_stats = all_daily_stats[all_daily_stats["日期"] >= trend_from]
+
+                # 收益趋势图
+                fig_trend = go.Figure()
+                fig_trend.add_trace(go.Scatter(
+                    x=daily_stats["日期"], y=daily_stats["总收益"],
+                    mode='lines+markers', name='每日总收益',
+                    line=dict(color='#FFD700', width=2),
+                    marker=dict(size=8)
+                ))
+                fig_trend.update_layout(
+                    title="每日收益趋势",
+                    xaxis_title="日期", yaxis_title="收益 (哈夫币)",
+                    paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                    font_color='white'
+                )
+
+                # 存活率趋势
                 fig_survival = go.Figure()
                 fig_survival.add_trace(go.Scatter(
                     x=daily_stats["日期"], y=daily_stats["存活率"],
@@ -1990,9 +2021,7 @@ elif menu == "📉 深度分析":
                     paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
                     font_color='white'
                 )
-                st.plotly_chart(fig_survival, use_container_width=True)
-            
-            with col2:
+
                 fig_games = go.Figure()
                 fig_games.add_trace(go.Bar(
                     x=daily_stats["日期"], y=daily_stats["局数"],
@@ -2003,41 +2032,84 @@ elif menu == "📉 深度分析":
                     paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
                     font_color='white'
                 )
+
+                # 累计收益曲线（按天累计）
+                fig_cumulative = go.Figure()
+                fig_cumulative.add_trace(go.Scatter(
+                    x=all_daily_stats["局数"].cumsum(), y=all_daily_stats["总收益"].cumsum(),
+                    mode='lines', name='累计收益',
+                    line=dict(color='#FF6B6B', width=3),
+                    fill='tozeroy', fillcolor='rgba(255,107,107,0.2)'
+                ))
+                fig_cumulative.update_layout(
+                    title="累计收益曲线",
+                    xaxis_title="游戏局数", yaxis_title="累计收益 (哈夫币)",
+                    paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                    font_color='white'
+                )
+                return fig_trend, fig_survival, fig_games, fig_cumulative
+
+            # 时间范围按当天计算，日期也是缓存参数
+            fig_trend, fig_survival, fig_games, fig_cumulative = cached_analysis(
+                "trend", build_trend_figures, trend_days, datetime.now().date())
+
+            st.plotly_chart(fig_trend, use_container_width=True)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(fig_survival, use_container_width=True)
+            with col2:
                 st.plotly_chart(fig_games, use_container_width=True)
-            
-            # 累计收益曲线
-            df_sorted = df.sort_values("日期时间")
-            df_sorted["累计收益"] = df_sorted["价值"].cumsum()
-            
-            fig_cumulative = go.Figure()
-            fig_cumulative.add_trace(go.Scatter(
-                x=list(range(1, len(df_sorted)+1)), y=df_sorted["累计收益"],
-                mode='lines', name='累计收益',
-                line=dict(color='#FF6B6B', width=3),
-                fill='tozeroy', fillcolor='rgba(255,107,107,0.2)'
-            ))
-            fig_cumulative.update_layout(
-                title="累计收益曲线",
-                xaxis_title="游戏局数", yaxis_title="累计收益 (哈夫币)",
-                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                font_color='white'
-            )
             st.plotly_chart(fig_cumulative, use_container_width=True)
-        
-        with tab2:
-            st.markdown("### 🗺️ 地图深度分析")
-            
-            # 地图统计
-            map_stats = df.groupby("地图").agg({
-                "价值": ["sum", "mean", "count"],
-                "撤离": lambda x: (x == "✅").sum() / len(x) * 100
-            }).reset_index()
-            map_stats.columns = ["地图", "总收益", "场均收益", "局数", "存活率"]
-            map_stats = map_stats.sort_values("总收益", ascending=False)
-            
+
+            # 滚动指标：按局数窗口逐局增量维护，新增一局不重算历史
+            st.markdown("### 🔄 滚动指标")
+            trends = table.trends()
+            trend_window = st.selectbox("滚动窗口", trends.windows, index=1, key="trend_window",
+                                        format_func=lambda w: f"最近{w}局")
+
+            def build_rolling_figures():
+                since = pd.Timestamp(datetime.now() - timedelta(days=trend_days)).normalize() if trend_days else None
+                rolling = trends.frame(trend_window, since=since, points=2000)
+                figs = []
+                for column, title, color in (("存活率", "滚动存活率 (%)", "#00FF00"),
+                                             ("EWMA收益", "收益指数加权平均", "#FFD700"),
+                                             ("每小时收益", "滚动每小时收益", "#4169E1"),
+                                             ("累计收益", "累计净收益", "#FF6B6B")):
+                    fig = go.Figure()
+                    fig.add_trace(go.Scatter(
+                        x=rolling["时间"], y=rolling[column], mode='lines', name=column,
+                        line=dict(color=color, width=2)
+                    ))
+                    fig.update_layout(
+                        title=title, yaxis_title=column,
+                        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                        font_color='white'
+                    )
+                    figs.append(fig)
+                return figs
+
+            fig_roll_survival, fig_ewma, fig_per_hour, fig_net = cached_analysis(
+                "rolling", build_rolling_figures, trend_window, trend_days, datetime.now().date())
+
             col1, col2 = st.columns(2)
-            
             with col1:
+                st.plotly_chart(fig_roll_survival, use_container_width=True)
+            with col2:
+                st.plotly_chart(fig_ewma, use_container_width=True)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(fig_per_hour, use_container_width=True)
+            with col2:
+                st.plotly_chart(fig_net, use_container_width=True)
+
+        with tab2:
+            st.markdown("### 🗺️ 地图深度分析")
+
+            def build_map_analysis():
+                # 地图统计
+                map_stats = cube.summary(["map"], history)
+                map_stats = map_stats.sort_values("总收益", ascending=False)
+
                 # 地图收益对比
                 fig_map_profit = px.bar(
                     map_stats, x="地图", y="总收益",
@@ -2048,9 +2120,7 @@ elif menu == "📉 深度分析":
                     paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
                     font_color='white'
                 )
-                st.plotly_chart(fig_map_profit, use_container_width=True)
-            
-            with col2:
+
                 # 地图存活率对比
                 fig_map_survival = px.bar(
                     map_stats, x="地图", y="存活率",
@@ -2061,54 +2131,58 @@ elif menu == "📉 深度分析":
                     paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
                     font_color='white'
                 )
+
+                # 地图雷达图
+                categories = ["总收益", "场均收益", "局数", "存活率"]
+                fig_radar = go.Figure()
+
+                for _, row in map_stats.iterrows():
+                    values = [
+                        row["总收益"] / map_stats["总收益"].max() * 100,
+                        row["场均收益"] / map_stats["场均收益"].max() * 100,
+                        row["局数"] / map_stats["局数"].max() * 100,
+                        row["存活率"]
+                    ]
+                    fig_radar.add_trace(go.Scatterpolar(
+                        r=values + [values[0]],
+                        theta=categories + [categories[0]],
+                        name=row["地图"],
+                        fill='toself', opacity=0.6
+                    ))
+
+                fig_radar.update_layout(
+                    polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
+                    title="地图综合能力雷达图",
+                    paper_bgcolor='rgba(0,0,0,0)', font_color='white'
+                )
+
+                # 地图详细数据表
+                map_stats_display = map_stats.copy()
+                map_stats_display["总收益"] = map_stats_display["总收益"].apply(lambda x: f"{x:,.0f}")
+                map_stats_display["场均收益"] = map_stats_display["场均收益"].apply(lambda x: f"{x:,.0f}")
+                map_stats_display["存活率"] = map_stats_display["存活率"].apply(lambda x: f"{x:.1f}%")
+                return fig_map_profit, fig_map_survival, fig_radar, map_stats_display
+
+            fig_map_profit, fig_map_survival, fig_radar, map_stats_display = cached_analysis(
+                "map", build_map_analysis)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(fig_map_profit, use_container_width=True)
+            with col2:
                 st.plotly_chart(fig_map_survival, use_container_width=True)
-            
-            # 地图雷达图
-            categories = ["总收益", "场均收益", "局数", "存活率"]
-            fig_radar = go.Figure()
-            
-            for _, row in map_stats.iterrows():
-                values = [
-                    row["总收益"] / map_stats["总收益"].max() * 100,
-                    row["场均收益"] / map_stats["场均收益"].max() * 100,
-                    row["局数"] / map_stats["局数"].max() * 100,
-                    row["存活率"]
-                ]
-                fig_radar.add_trace(go.Scatterpolar(
-                    r=values + [values[0]],
-                    theta=categories + [categories[0]],
-                    name=row["地图"],
-                    fill='toself', opacity=0.6
-                ))
-            
-            fig_radar.update_layout(
-                polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-                title="地图综合能力雷达图",
-                paper_bgcolor='rgba(0,0,0,0)', font_color='white'
-            )
             st.plotly_chart(fig_radar, use_container_width=True)
-            
-            # 地图详细数据表
+
             st.markdown("### 📋 地图详细数据")
-            map_stats_display = map_stats.copy()
-            map_stats_display["总收益"] = map_stats_display["总收益"].apply(lambda x: f"{x:,.0f}")
-            map_stats_display["场均收益"] = map_stats_display["场均收益"].apply(lambda x: f"{x:,.0f}")
-            map_stats_display["存活率"] = map_stats_display["存活率"].apply(lambda x: f"{x:.1f}%")
             st.dataframe(map_stats_display, use_container_width=True, hide_index=True)
-        
+
         with tab3:
             st.markdown("### 🎯 模式深度分析")
-            
-            # 模式统计
-            mode_stats = df.groupby("模式").agg({
-                "价值": ["sum", "mean", "count"],
-                "撤离": lambda x: (x == "✅").sum() / len(x) * 100
-            }).reset_index()
-            mode_stats.columns = ["模式", "总收益", "场均收益", "局数", "存活率"]
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
+
+            def build_mode_analysis():
+                # 模式统计
+                mode_stats = cube.summary(["mode"], history)
+
                 fig_mode_profit = px.pie(
                     mode_stats, values="总收益", names="模式",
                     title="各模式收益占比", hole=0.4
@@ -2116,9 +2190,7 @@ elif menu == "📉 深度分析":
                 fig_mode_profit.update_layout(
                     paper_bgcolor='rgba(0,0,0,0)', font_color='white'
                 )
-                st.plotly_chart(fig_mode_profit, use_container_width=True)
-            
-            with col2:
+
                 fig_mode_bar = px.bar(
                     mode_stats, x="模式", y=["总收益", "场均收益"],
                     barmode="group", title="模式收益对比"
@@ -2127,74 +2199,74 @@ elif menu == "📉 深度分析":
                     paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
                     font_color='white'
                 )
+
+                # 地图+模式组合：热力图
+                pivot_profit = cube.pivot("map", "mode", history)
+                fig_heatmap = px.imshow(
+                    pivot_profit, text_auto=".0f",
+                    color_continuous_scale="YlOrRd",
+                    title="地图+模式场均收益热力图"
+                )
+                fig_heatmap.update_layout(
+                    paper_bgcolor='rgba(0,0,0,0)', font_color='white'
+                )
+
+                # 组合排行榜
+                combo_stats = cube.summary(["map", "mode"], history)
+                combo_top = combo_stats.sort_values("场均收益", ascending=False).head(5)
+                return fig_mode_profit, fig_mode_bar, fig_heatmap, combo_top
+
+            fig_mode_profit, fig_mode_bar, fig_heatmap, combo_top = cached_analysis(
+                "mode", build_mode_analysis)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(fig_mode_profit, use_container_width=True)
+            with col2:
                 st.plotly_chart(fig_mode_bar, use_container_width=True)
-            
+
             # 地图+模式组合分析
             st.markdown("### 🔗 地图+模式组合分析")
-            combo_stats = df.groupby(["地图", "模式"]).agg({
-                "价值": ["sum", "mean", "count"],
-                "撤离": lambda x: (x == "✅").sum() / len(x) * 100
-            }).reset_index()
-            combo_stats.columns = ["地图", "模式", "总收益", "场均收益", "局数", "存活率"]
-            
-            # 热力图
-            pivot_profit = df.pivot_table(values="价值", index="地图", columns="模式", aggfunc="mean", fill_value=0)
-            
-            fig_heatmap = px.imshow(
-                pivot_profit, text_auto=".0f",
-                color_continuous_scale="YlOrRd",
-                title="地图+模式场均收益热力图"
-            )
-            fig_heatmap.update_layout(
-                paper_bgcolor='rgba(0,0,0,0)', font_color='white'
-            )
             st.plotly_chart(fig_heatmap, use_container_width=True)
-            
-            # 组合排行榜
-            combo_stats_sorted = combo_stats.sort_values("场均收益", ascending=False)
+
             st.markdown("### 🏆 最佳组合排行")
-            for i, (_, row) in enumerate(combo_stats_sorted.head(5).iterrows()):
+            for i, (_, row) in enumerate(combo_top.iterrows()):
                 medal = ["🥇", "🥈", "🥉", "4️⃣", "5️⃣"][i]
                 st.markdown(f"{medal} **{row['地图']} - {row['模式']}**: 场均 {row['场均收益']:,.0f} | 存活率 {row['存活率']:.1f}% | 局数 {row['局数']}")
-        
+
         with tab4:
             st.markdown("### 💎 收益深度分析")
-            
-            # 收益分布直方图
-            fig_dist = px.histogram(
-                df[df["价值"] > 0], x="价值", nbins=30,
-                title="收益分布 (仅成功撤离)",
-                color_discrete_sequence=["#FFD700"]
-            )
-            fig_dist.update_layout(
-                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                font_color='white', xaxis_title="收益 (哈夫币)", yaxis_title="频次"
-            )
-            st.plotly_chart(fig_dist, use_container_width=True)
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # 收益区间统计
-                df_survived = df[df["撤离"] == "✅"]
+
+            def build_profit_analysis():
+                # 收益分布直方图（先在本地分箱，不把每局的收益都发给浏览器）
+                profit = table.column("profit")
+                survived = table.column("survived")
+                counts, edges = np.histogram(profit[profit > 0], bins=30)
+                fig_dist = px.bar(
+                    x=(edges[:-1] + edges[1:]) / 2, y=counts,
+                    title="收益分布 (仅成功撤离)",
+                    color_discrete_sequence=["#FFD700"]
+                )
+                fig_dist.update_traces(width=edges[1] - edges[0])
+                fig_dist.update_layout(
+                    paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                    font_color='white', xaxis_title="收益 (哈夫币)", yaxis_title="频次"
+                )
+
+                # 收益区间统计（区间左开右闭）
                 bins = [0, 50000, 100000, 200000, 500000, float('inf')]
                 labels = ["0-5万", "5-10万", "10-20万", "20-50万", "50万+"]
-                df_survived["收益区间"] = pd.cut(df_survived["价值"], bins=bins, labels=labels)
-                
-                range_stats = df_survived["收益区间"].value_counts().sort_index()
+                bucket = np.searchsorted(bins, profit[survived], side="left") - 1
+                range_counts = np.bincount(bucket[bucket >= 0], minlength=len(labels))
                 fig_range = px.pie(
-                    names=range_stats.index, values=range_stats.values,
+                    names=labels, values=range_counts,
                     title="收益区间分布", hole=0.3
                 )
                 fig_range.update_layout(paper_bgcolor='rgba(0,0,0,0)', font_color='white')
-                st.plotly_chart(fig_range, use_container_width=True)
-            
-            with col2:
-                # 物资收益排行
-                item_stats = df.groupby("物资")["价值"].agg(["sum", "mean", "count"]).reset_index()
-                item_stats.columns = ["物资", "总收益", "平均价值", "获取次数"]
-                item_stats = item_stats.sort_values("总收益", ascending=False).head(10)
-                
+
+                # 物资收益排行（按物品拆分的事实表，一局的收益按件数分给各物品）
+                facts = table.item_facts()
+                item_stats = facts.item_stats(top=10)
                 fig_items = px.bar(
                     item_stats, y="物资", x="总收益", orientation='h',
                     title="物资收益排行TOP10", color="总收益",
@@ -2204,36 +2276,39 @@ elif menu == "📉 深度分析":
                     paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
                     font_color='white'
                 )
+
+                # 风险收益分析
+                risk_df = cube.risk("mode", history)
+                fig_risk = px.scatter(
+                    risk_df, x="存活率", y="成功场均", size="期望收益",
+                    color="模式", title="风险收益散点图 (气泡大小=期望收益)",
+                    size_max=50
+                )
+                fig_risk.update_layout(
+                    paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                    font_color='white', xaxis_title="存活率 (%)", yaxis_title="成功场均收益"
+                )
+                item_pairs = facts.co_occurrence(top=10)
+                return fig_dist, fig_range, fig_items, item_pairs, fig_risk, risk_df.round(1)
+
+            fig_dist, fig_range, fig_items, item_pairs, fig_risk, risk_display = cached_analysis(
+                "profit", build_profit_analysis)
+
+            st.plotly_chart(fig_dist, use_container_width=True)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(fig_range, use_container_width=True)
+            with col2:
                 st.plotly_chart(fig_items, use_container_width=True)
-            
-            # 风险收益分析
+
+            if len(item_pairs):
+                st.markdown("### 🔗 常见物资搭配")
+                st.dataframe(item_pairs, use_container_width=True, hide_index=True)
+
             st.markdown("### ⚖️ 风险收益分析")
-            risk_data = []
-            for mode in df["模式"].unique():
-                mode_df = df[df["模式"] == mode]
-                survival = (mode_df["撤离"] == "✅").mean() * 100
-                avg_profit = mode_df[mode_df["撤离"] == "✅"]["价值"].mean() if len(mode_df[mode_df["撤离"] == "✅"]) > 0 else 0
-                expected_value = survival / 100 * avg_profit
-                risk_data.append({
-                    "模式": mode,
-                    "存活率": survival,
-                    "成功场均": avg_profit,
-                    "期望收益": expected_value
-                })
-            
-            risk_df = pd.DataFrame(risk_data)
-            fig_risk = px.scatter(
-                risk_df, x="存活率", y="成功场均", size="期望收益",
-                color="模式", title="风险收益散点图 (气泡大小=期望收益)",
-                size_max=50
-            )
-            fig_risk.update_layout(
-                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                font_color='white', xaxis_title="存活率 (%)", yaxis_title="成功场均收益"
-            )
             st.plotly_chart(fig_risk, use_container_width=True)
-            
-            st.dataframe(risk_df.round(1), use_container_width=True, hide_index=True)
+            st.dataframe(risk_display, use_container_width=True, hide_index=True)
 
 # ==================== 智能推荐模块 ====================
 elif menu == "🤖 智能推荐":
@@ -2248,16 +2323,44 @@ elif menu == "🤖 智能推荐":
         st.warning("⚠️ 需要至少5条游戏记录才能进行智能分析")
         st.info("💡 请前往「数据管理」添加记录，或在「深度分析」页面生成模拟数据")
     else:
-        df = pd.DataFrame(st.session_state.game_records)
+        def build_player_profile():
+            df = st.session_state.game_records.to_frame()
+            total_games = len(df)
+            survived = len(df[df["撤离"] == "✅"])
+            
+            # 计算各地图和模式的表现
+            map_performance = df.groupby("地图").agg({
+                "价值": "mean",
+                "撤离": lambda x: (x == "✅").sum() / len(x) * 100
+            }).reset_index()
+            map_performance.columns = ["地图", "场均收益", "存活率"]
+            map_performance["综合得分"] = map_performance["场均收益"] / 1000 + map_performance["存活率"] * 2
+            
+            mode_performance = df.groupby("模式").agg({
+                "价值": "mean",
+                "撤离": lambda x: (x == "✅").sum() / len(x) * 100
+            }).reset_index()
+            mode_performance.columns = ["模式", "场均收益", "存活率"]
+            return {
+                "total_games": total_games,
+                "survival_rate": survived / total_games * 100,
+                "avg_profit": df["价值"].mean(),
+                "map_performance": map_performance,
+                "mode_performance": mode_performance,
+                "maps_played": df["地图"].nunique(),
+                "modes_played": df["模式"].nunique(),
+            }
+        
+        # 画像和各地图/模式的表现只在记录变化时重新计算
+        profile = cached_analysis("player_profile", build_player_profile)
         
         # 玩家画像分析
         st.markdown("---")
         st.markdown("## 🎭 玩家画像分析")
         
-        total_games = len(df)
-        survived = len(df[df["撤离"] == "✅"])
-        survival_rate = survived / total_games * 100
-        avg_profit = df["价值"].mean()
+        total_games = profile["total_games"]
+        survival_rate = profile["survival_rate"]
+        avg_profit = profile["avg_profit"]
         
         # 计算玩家类型
         player_type = ""
@@ -2323,19 +2426,8 @@ elif menu == "🤖 智能推荐":
         # 智能推荐
         st.markdown("## 🎯 个性化推荐")
         
-        # 计算各地图和模式的表现
-        map_performance = df.groupby("地图").agg({
-            "价值": "mean",
-            "撤离": lambda x: (x == "✅").sum() / len(x) * 100
-        }).reset_index()
-        map_performance.columns = ["地图", "场均收益", "存活率"]
-        map_performance["综合得分"] = map_performance["场均收益"] / 1000 + map_performance["存活率"] * 2
-        
-        mode_performance = df.groupby("模式").agg({
-            "价值": "mean",
-            "撤离": lambda x: (x == "✅").sum() / len(x) * 100
-        }).reset_index()
-        mode_performance.columns = ["模式", "场均收益", "存活率"]
+        map_performance = profile["map_performance"]
+        mode_performance = profile["mode_performance"]
         
         # 最佳地图推荐
         best_map = map_performance.loc[map_performance["综合得分"].idxmax()]
@@ -2400,7 +2492,7 @@ elif menu == "🤖 智能推荐":
             })
         
         # 地图多样性
-        maps_played = df["地图"].nunique()
+        maps_played = profile["maps_played"]
         if maps_played < 3:
             suggestions.append({
                 "icon": "🗺️",
@@ -2409,7 +2501,7 @@ elif menu == "🤖 智能推荐":
             })
         
         # 模式多样性
-        modes_played = df["模式"].nunique()
+        modes_played = profile["modes_played"]
         if modes_played < 2:
             suggestions.append({
                 "icon": "🎯",
@@ -2447,8 +2539,12 @@ elif menu == "🤖 智能推荐":
         with col3:
             st.markdown("&nbsp;")  # 占位
             if st.button("🔮 预测结果", type="primary"):
-                # 基于历史数据预测
-                similar_games = df[(df["地图"] == pred_map) & (df["模式"] == pred_mode)]
+                # 基于历史数据预测，优先使用最近90天的对局
+                recent = st.session_state.game_records.between(datetime.now() - timedelta(days=90))
+                similar_games = recent[(recent["地图"] == pred_map) & (recent["模式"] == pred_mode)]
+                if len(similar_games) < 3:
+                    df = st.session_state.game_records.to_frame()
+                    similar_games = df[(df["地图"] == pred_map) & (df["模式"] == pred_mode)]
                 
                 if len(similar_games) >= 3:
                     pred_survival = (similar_games["撤离"] == "✅").mean() * 100
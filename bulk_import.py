@@ -0,0 +1,129 @@
+"""
+批量导入工具
+一次导入任意数量的 CSV / JSON 文件（支持通配符，中英文表头均可），
+多进程并行解析，经去重索引去重后一次性写入记录存储；
+导入期间持有数据目录的写入锁，桌面客户端运行时拒绝导入（见 desktop/writer_lock.py）
+
+用法:
+    python bulk_import.py exports/*.csv
+    python bulk_import.py "D:/exports/**/*.csv" backups/backup_20251209.json --workers 8
+    python bulk_import.py game_records.csv --data-dir D:/DeltaTool
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+# 添加desktop目录到路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'desktop'))
+
+from data_manager import DataManager, file_datetime, record_from_row  # type: ignore
+from writer_lock import DataDirLocked  # type: ignore
+
+
+def expand_paths(patterns):
+    """展开文件名和通配符（支持 **），按参数顺序去重"""
+    paths = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            print(f"⚠️ 没有匹配的文件: {pattern}")
+        for match in matches:
+            path = Path(match)
+            if not path.is_file():
+                print(f"⚠️ 不是文件，跳过: {match}")
+                continue
+            key = path.resolve()
+            if key not in seen:
+                seen.add(key)
+                paths.append(path)
+    return paths
+
+
+def parse_file(path):
+    """
+    解析一个文件（在子进程中运行）
+
+    CSV：中文或英文表头；JSON：记录数组，或备份文件格式 {"records": [...]}
+    没有时间的行按文件的修改时间记录，重复导入同一文件时会被去重
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".json":
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = rows.get("records", [])
+    else:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+    default_datetime = file_datetime(path)
+    return [record_from_row(row, default_datetime) for row in rows]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量导入游戏记录（CSV/JSON，支持通配符）")
+    parser.add_argument("paths", nargs="+", help="要导入的文件或通配符，例如 exports/*.csv")
+    parser.add_argument("--data-dir", help="数据目录（默认 ~/Documents/DeltaTool）")
+    parser.add_argument("--workers", type=int, default=None, help="解析进程数（默认 CPU 核数）")
+    args = parser.parse_args(argv)
+
+    files = expand_paths(args.paths)
+    if not files:
+        print("❌ 没有可导入的文件")
+        return 1
+
+    # 先取得写入锁：桌面客户端运行时直接退出，不必白白解析
+    try:
+        data_manager = DataManager(args.data_dir)
+    except DataDirLocked as e:
+        print(f"❌ {e}")
+        print("   请先关闭桌面客户端再导入")
+        return 1
+
+    print("=" * 60)
+    print(f"📥 批量导入 {len(files)} 个文件")
+    print("=" * 60)
+
+    # 并行解析
+    start = time.perf_counter()
+    parsed = {}
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(parse_file, str(path)): path for path in files}
+        for i, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                parsed[path] = future.result()
+                print(f"  [{i}/{len(files)}] {path.name}: {len(parsed[path]):,} 条")
+            except Exception as e:
+                failed += 1
+                print(f"  [{i}/{len(files)}] ❌ {path.name}: {e}")
+    parse_time = time.perf_counter() - start
+
+    # 按参数顺序合并，去重后一次写入
+    records = [record for path in files for record in parsed.get(path, [])]
+    start = time.perf_counter()
+    added = data_manager.add_records(records)
+    data_manager.close()
+    commit_time = time.perf_counter() - start
+
+    print()
+    print(f"📊 解析记录: {len(records):,} 条（{parse_time:.2f} 秒）")
+    print(f"✅ 新增记录: {added:,} 条（写入 {commit_time:.2f} 秒）")
+    if len(records) > added:
+        print(f"🔁 跳过重复: {len(records) - added:,} 条")
+    if failed:
+        print(f"❌ 解析失败: {failed} 个文件")
+    print(f"📁 数据目录: {data_manager.data_dir}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+增量备份模块
+backups/ 下按"链"保存：一份 gzip 压缩的完整基础备份，之后每次只写新增记录的压缩增量
+    base_<时间>.json.gz    {"records": [...], "stats": {...}, "rollup": {...}}
+    delta_<时间>.json.gz   {"base": 基础备份名, "start": 起始下标, "records": [新增], "stats": {...}, "rollup": {...}}
+    manifest.json          当前链的状态（基础备份名、已备份记录数、最后一条记录的指纹）
+
+rollup 是每日汇总（game_records_rollup.json）的状态，与统计数据一样每个备份文件都带一份；
+记录只会追加；已备份部分有变化（清空、重新导入、折叠进汇总等）时自动开始新的一条链
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+
+def _fingerprint(record):
+    """单条记录的指纹"""
+    text = json.dumps(record, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _write_gz(path, data):
+    """写出压缩 JSON（临时文件 + 原子替换）"""
+    tmp_file = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp_file, 'wt', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_file, path)
+
+
+def _read_gz(path):
+    """读取压缩 JSON"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class BackupManager:
+    """
+    增量备份管理器
+
+    Args:
+        backup_dir: 备份目录
+        full_every: 每条链最多几个增量，之后重新做完整备份
+        keep_chains: 保留最近几条链（含当前链）
+    """
+
+    def __init__(self, backup_dir, full_every=20, keep_chains=3):
+        self.backup_dir = Path(backup_dir)
+        self.manifest_file = self.backup_dir / "manifest.json"
+        self.full_every = full_every
+        self.keep_chains = keep_chains
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_manifest(self, manifest):
+        tmp_file = self.manifest_file.with_suffix(".json.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.manifest_file)
+
+    def _needs_full(self, manifest, records):
+        """没有可续的链、链已够长或已备份部分被改过时需要完整备份"""
+        if manifest is None or not (self.backup_dir / manifest["base"]).exists():
+            return True
+        if len(manifest["deltas"]) >= self.full_every:
+            return True
+        count = manifest["count"]
+        if len(records) < count:
+            return True
+        return count > 0 and _fingerprint(records[count - 1]) != manifest["last"]
+
+    def backup(self, records, stats, full=False, rollup=None):
+        """
+        备份记录
+
+        Args:
+            records: 全部记录
+            stats: 统计数据（每个备份文件都带一份）
+            full: 强制完整备份
+            rollup: 每日汇总的状态（每个备份文件都带一份）
+
+        Returns:
+            写出的备份文件路径，没有新记录时返回 None
+        """
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        manifest = self._load_manifest()
+
+        if full or self._needs_full(manifest, records):
+            path = self.backup_dir / f"base_{timestamp}.json.gz"
+            _write_gz(path, {"records": records, "stats": stats, "rollup": rollup})
+            manifest = {"base": path.name, "deltas": []}
+        else:
+            start = manifest["count"]
+            if start == len(records):
+                return None
+            path = self.backup_dir / f"delta_{timestamp}.json.gz"
+            _write_gz(path, {
+                "base": manifest["base"],
+                "start": start,
+                "records": records[start:],
+                "stats": stats,
+                "rollup": rollup,
+            })
+            manifest["deltas"].append(path.name)
+
+        manifest["count"] = len(records)
+        manifest["last"] = _fingerprint(records[-1]) if records else None
+        self._save_manifest(manifest)
+        self._prune()
+        return path
+
+    def chains(self):
+        """按时间顺序列出所有链：[(基础备份名, [增量名...])]"""
+        bases = sorted(p.name for p in self.backup_dir.glob("base_*.json.gz"))
+        deltas = sorted(p.name for p in self.backup_dir.glob("delta_*.json.gz"))
+        result = []
+        for i, base in enumerate(bases):
+            # 增量的时间在所属基础备份和下一份基础备份之间
+            upper = bases[i + 1] if i + 1 < len(bases) else None
+            members = [d for d in deltas
+                       if d[len("delta_"):] > base[len("base_"):]
+                       and (upper is None or d[len("delta_"):] < upper[len("base_"):])]
+            result.append((base, members))
+        return result
+
+    def restore(self, until=None):
+        """
+        还原备份：基础备份 + 依次重放增量
+
+        Args:
+            until: 还原到哪个备份文件为止（文件名），默认还原到最新
+
+        Returns:
+            (记录列表, 统计数据, 汇总状态)，没有备份时返回 (None, None, None)；
+            旧版本的备份没有汇总状态，此时汇总状态为 None
+        """
+        chains = self.chains()
+        if until is not None:
+            chains = [(base, deltas) for base, deltas in chains
+                      if base == until or until in deltas]
+        if not chains:
+            return None, None, None
+
+        base, deltas = chains[-1]
+        if until == base:
+            deltas = []
+        elif until is not None:
+            deltas = deltas[:deltas.index(until) + 1]
+
+        data = _read_gz(self.backup_dir / base)
+        records, stats, rollup = data["records"], data["stats"], data.get("rollup")
+        for name in deltas:
+            delta = _read_gz(self.backup_dir / name)
+            if delta.get("base") != base:
+                continue
+            # 按起始下标拼接，重复重放同一增量也不会多出记录
+            records = records[:delta["start"]] + delta["records"]
+            stats = delta["stats"]
+            rollup = delta.get("rollup", rollup)
+        return records, stats, rollup
+
+    def _prune(self):
+        """只保留最近 keep_chains 条链"""
+        for base, deltas in self.chains()[:-self.keep_chains]:
+            for name in [base] + deltas:
+                try:
+                    (self.backup_dir / name).unlink()
+                except OSError:
+                    pass
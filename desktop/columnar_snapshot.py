@@ -0,0 +1,120 @@
+"""
+列式快照模块
+把记录快照另存为 numpy .npz 列式文件（game_records.npz），
+启动时直接加载类型化的列，不需要再解析 JSON/CSV 文本
+
+列：
+    ts        int64   时间戳（墙钟秒数，见 timestamps.parse_datetimes；缺失为 NAT）
+    datetime  bytes   原始时间字符串（用于去重和与日志比对）
+    map/mode/zone/items  分类列，存为 <列>_codes(int32) + <列>_categories(str)
+    profit    int64
+    survived  bool
+    duration  float64 对局时长（秒），未记录为 NaN
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+from record_fields import parse_survived
+from timestamps import parse_datetimes
+
+
+# 3: ts 改由 timestamps.parse_datetimes 计算（与网页端导入相同的规则）
+FORMAT_VERSION = 3
+CATEGORY_COLUMNS = ["map", "mode", "zone", "items"]
+
+
+def _items_text(items):
+    """物品列表转换为字符串"""
+    if isinstance(items, list):
+        return "; ".join(i.get("name", str(i)) if isinstance(i, dict) else str(i) for i in items)
+    return "" if items is None else str(items)
+
+
+def _duration(value):
+    """对局时长（秒），未记录或无法解析时为 NaN"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _encode_category(values):
+    """字符串列编码为 (类别表, 编码)"""
+    categories, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+    return categories, codes.astype(np.int32)
+
+
+def records_to_columns(records):
+    """记录列表转换为列字典"""
+    datetimes = [r.get("datetime", "") or "" for r in records]
+    columns = {
+        "ts": parse_datetimes(datetimes),
+        "datetime": np.char.encode(np.array(datetimes, dtype=str), "utf-8"),
+        "profit": np.array([int(r.get("profit", 0) or 0) for r in records], dtype=np.int64),
+        "survived": np.array([parse_survived(r.get("survived")) for r in records], dtype=bool),
+        "duration": np.array([_duration(r.get("duration")) for r in records], dtype=np.float64),
+    }
+    raw = {
+        "map": [r.get("map") or "未知" for r in records],
+        "mode": [r.get("mode") or "未知" for r in records],
+        "zone": [r.get("zone") or "" for r in records],
+        "items": [_items_text(r.get("items")) for r in records],
+    }
+    for name in CATEGORY_COLUMNS:
+        columns[f"{name}_categories"], columns[f"{name}_codes"] = _encode_category(raw[name])
+    return columns
+
+
+def _source_stat(source_file):
+    """源文件 (大小, 修改时间)，用于判断快照是否过期"""
+    stat = Path(source_file).stat()
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def write_snapshot(path, records, source_file):
+    """
+    写入列式快照（临时文件 + 原子替换）
+
+    Args:
+        path: .npz 文件路径
+        records: 记录列表
+        source_file: 对应的 JSON 快照，记录其大小和修改时间用于过期判断
+    """
+    path = Path(path)
+    columns = records_to_columns(records)
+    columns["version"] = np.array([FORMAT_VERSION], dtype=np.int64)
+    columns["source"] = _source_stat(source_file)
+
+    tmp_file = path.with_suffix(".npz.tmp")
+    with open(tmp_file, 'wb') as f:
+        np.savez(f, **columns)
+    os.replace(tmp_file, path)
+
+
+def load_snapshot(path, source_file):
+    """
+    加载列式快照
+
+    快照不存在、格式版本不符或 JSON 快照在它之后被改写过时返回 None，
+    调用方应回退到文本格式
+    """
+    path = Path(path)
+    try:
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            if int(data["version"][0]) != FORMAT_VERSION:
+                return None
+            if not np.array_equal(data["source"], _source_stat(source_file)):
+                return None
+            return {name: data[name] for name in data.files if name not in ("version", "source")}
+    except Exception:
+        return None
+
+
+def decode_category(columns, name):
+    """取出分类列的字符串值"""
+    return columns[f"{name}_categories"][columns[f"{name}_codes"]]
@@ -5,15 +5,83 @@
 
 import json
 import csv
+import copy
+import itertools
 import os
 from datetime import datetime
 from pathlib import Path
 
+from backup_manager import BackupManager
+from dedupe_index import DedupeIndex, JSON_SOURCE, LEGACY_INDEX_FILE_NAME, record_keys
+from live_session_log import LiveSessionLog, read_live_session
+from partition_index import RecordPartitionIndex
+from publish import atomic_write, bump_generation
+from record_fields import parse_survived
+from record_journal import RecordJournal
+from rollup import RecordRollup
+from sqlite_store import SQLiteRecordStore
+from timestamps import to_timestamp
+from write_behind import WriteBehindQueue
+from writer_lock import WriterLock
+
+# 列式快照需要numpy（可选）
+try:
+    import columnar_snapshot
+    import record_memmap
+    COLUMNAR_AVAILABLE = True
+except ImportError:
+    COLUMNAR_AVAILABLE = False
+
+
+def file_datetime(filepath):
+    """
+    导入文件中没有时间的行使用的时间：文件的修改时间
+    
+    同一文件的这些行共用一个时间，重复导入同一文件时内容哈希不变，会被去重索引跳过
+    """
+    return datetime.fromtimestamp(os.path.getmtime(filepath)).isoformat(timespec="seconds")
+
+
+def record_from_row(row, default_datetime=None):
+    """
+    CSV行或记录字典转换为记录
+    
+    支持 export_to_csv 的英文表头、export_csv 的中文表头（日期时间/收益/是否撤离），
+    以及网页端的中文字段（日期/价值/撤离/物资）
+    
+    Args:
+        row: CSV行或记录字典
+        default_datetime: 行中没有时间时使用的时间（导入文件时为 file_datetime(文件)），
+                          未指定时用当前时间
+    """
+    survived = row.get("是否撤离", row.get("撤离", row.get("survived")))
+    items = row.get("物资", row.get("items")) or []
+    if isinstance(items, str):
+        # "金表; 文件" 形式的物品字符串转换为物品列表
+        items = [{"name": name.strip()} for name in items.replace("；", ";").split(";") if name.strip()]
+    return {
+        "datetime": (row.get("日期时间") or row.get("日期") or row.get("datetime")
+                    or default_datetime or datetime.now().isoformat()),
+        "map": row.get("地图", row.get("map", "")),
+        "mode": row.get("模式", row.get("mode", "")),
+        "zone": row.get("刷新点", row.get("zone", "")),
+        "items": items,
+        "profit": int(float(row.get("收益", row.get("价值", row.get("profit", 0))) or 0)),
+        "survived": parse_survived(survived)
+    }
+
 
 class DataManager:
     """数据管理器"""
     
-    def __init__(self, data_dir=None):
+    def __init__(self, data_dir=None, backend="json", write_behind=False):
+        """
+        Args:
+            data_dir: 数据目录
+            backend: "json"（默认）或 "sqlite"：sqlite 后端以数据库为准，启动时不读入全部记录，
+                     筛选查询走带索引的SQL，records 第一次被访问时才从数据库读入
+            write_behind: 是否启用后写队列（桌面客户端使用，退出前必须调用 close()）
+        """
         if data_dir is None:
             # 默认存储在用户文档目录
             data_dir = Path.home() / "Documents" / "DeltaTool"
@@ -21,19 +89,39 @@ class DataManager:
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
         
+        # 同一数据目录只允许一个写入方（桌面客户端、批量导入等），取不到锁时抛出 DataDirLocked
+        self.lock = WriterLock(self.data_dir)
+        self.lock.acquire()
+        
         self.records_file = self.data_dir / "game_records.json"
         self.stats_file = self.data_dir / "stats.json"
         self.settings_file = self.data_dir / "settings.json"
         self.live_session_file = self.data_dir / "live_session.json"  # 实时会话数据
         self.csv_export_file = self.data_dir / "game_records_export.csv"  # CSV导出供streamlit读取
+        self.columnar_file = self.data_dir / "game_records.npz"  # 列式快照，加快冷启动
         
-        self.records = []
-        self.stats = {
-            "total_games": 0,
-            "total_profit": 0,
-            "survived_games": 0,
-            "last_update": None
-        }
+        # 新记录追加写日志，定期压缩进 game_records.json
+        self.journal = RecordJournal(self.records_file, on_snapshot=self._write_columnar)
+        
+        # 超过保留期的记录折叠成每日汇总
+        self.rollups = RecordRollup(self.data_dir / "game_records_rollup.json")
+        
+        # 各导入途径共用的内容哈希去重索引
+        self.dedupe = DedupeIndex(self.data_dir)
+        
+        # 实时会话：拾取物品追加到 live_session.log，快照节流写出
+        self.session_log = LiveSessionLog(self.live_session_file)
+        
+        # 增量备份：压缩的基础备份 + 新增记录的增量
+        self.backups = BackupManager(self.data_dir / "backups")
+        
+        self._records = []
+        self.stats = self._empty_stats()
+        
+        # 可选的SQLite后端（记录以数据库为准）
+        self.store = None
+        if backend == "sqlite":
+            self.store = SQLiteRecordStore(self.data_dir / "game_records.db")
         
         # 当前会话数据
         self.current_session = {
@@ -46,22 +134,74 @@ class DataManager:
             "status": "准备中"  # 准备中/进行中/已撤离/已阵亡
         }
         
+        first_index = not self.dedupe.index_file.exists()
         self.load_data()
+        if first_index:
+            # 首次建立索引（或索引格式升级）：登记已有记录，删除旧格式的索引
+            if self.record_count():
+                self.dedupe.accept(record_keys(self._snapshot()), JSON_SOURCE)
+            try:
+                os.remove(self.data_dir / LEGACY_INDEX_FILE_NAME)
+            except OSError:
+                pass
         
-        # 初始化时导出CSV（如果有记录的话）
-        if self.records:
+        # 内存中记录的月分区索引，按日期筛选时只看相关月份
+        self.partitions = RecordPartitionIndex()
+        
+        # 距上次压缩新增的记录数
+        self._since_compact = self.journal.pending
+        
+        # 可选的后写队列：写操作交给后台线程合并写入
+        self.writer = None
+        if write_behind:
+            self.writer = WriteBehindQueue()
+            self.dedupe.load()  # 之后新记录只按内存中的索引判重（见 _claim）
+            self.writer.register("dedupe", lambda batches: self.dedupe.persist(list(itertools.chain(*batches))))
+            self.writer.register("record", self._write_records)
+            self.writer.register("compact", lambda snapshots: self.journal.compact(self._snapshot(snapshots[-1])))
+            self.writer.register("stats", self._write_stats, coalesce=True)
+            self.writer.register("session_start", lambda starts: self.session_log.begin(starts[-1]))
+            self.writer.register("session_item", self.session_log.append_items)
+            self.writer.register("live_session", self._write_live_session, coalesce=True)
+            self.writer.register("rollup", self._write_rollup)
+        
+        # 初始化时导出CSV（如果有记录的话；SQLite 后端只在导出文件缺失时补写，之后都是追加）
+        if self.record_count() and not (self.store and self.csv_export_file.exists()):
             self.export_to_csv()
+            
+            # 还没有列式快照、定长记录文件（或已过期）时补写一份
+            if COLUMNAR_AVAILABLE and self.records_file.exists() and not self.journal.pending:
+                if columnar_snapshot.load_snapshot(self.columnar_file, self.records_file) is None or \
+                        record_memmap.open_record_file(self.records_file, self.records_file) is None:
+                    self._write_columnar(self._snapshot())
+    
+    @property
+    def records(self):
+        """全部原始记录；SQLite 后端第一次访问时才从数据库读入"""
+        if self._records is None:
+            self._records = self.store.query()
+        return self._records
+    
+    @records.setter
+    def records(self, records):
+        self._records = records
+    
+    def record_count(self):
+        """原始记录数（SQLite 后端还没读入记录时直接查数据库）"""
+        if self._records is None:
+            return self.store.count()
+        return len(self._records)
+    
+    def _snapshot(self, records=None):
+        """整体写出用的完整记录列表：SQLite 后端没有读入记录时临时从数据库取，不留在内存中"""
+        if records is not None:
+            return records
+        if self._records is None:
+            return self.store.query()
+        return self._records
     
     def load_data(self):
         """加载数据"""
-        # 加载游戏记录
-        if self.records_file.exists():
-            try:
-                with open(self.records_file, 'r', encoding='utf-8') as f:
-                    self.records = json.load(f)
-            except:
-                self.records = []
-        
         # 加载统计数据
         if self.stats_file.exists():
             try:
@@ -70,19 +210,151 @@ class DataManager:
             except:
                 pass
         
+        if self.store and self.store.count() + self.rollups.total_games() == self.stats.get("total_games"):
+            # SQLite 后端与统计数据一致：以数据库为准，记录用到时才读入
+            self.records = None
+        else:
+            # 加载游戏记录（快照 + 日志）
+            self.records = self.journal.load()
+            
+            if self.rollups.pending:
+                # 上次汇总后还没来得及删掉已折叠的原始记录
+                self.records = [r for r in self.records if not self.rollups.is_folded(r)]
+                self.journal.compact(self.records)
+                self.rollups.save()
+            
+            if self.store and self.store.count() != len(self.records):
+                # 数据库与记录文件不一致（首次启用、中途退出或用 JSON 后端写入过），重建
+                self.store.rebuild(self.records)
+        
+        # 旧版本的统计文件没有分地图/模式统计，或与记录数对不上时重建
+        total_games = self.record_count() + self.rollups.total_games()
+        if "map_stats" not in self.stats or self.stats.get("total_games") != total_games:
+            self.rebuild_stats()
+        
         # 加载实时会话
         self.load_live_session()
     
     def save_data(self):
-        """保存数据"""
+        """保存数据（同步完整写出快照，用于批量修改和退出时）"""
+        self.flush()
+        
         # 保存游戏记录
-        with open(self.records_file, 'w', encoding='utf-8') as f:
-            json.dump(self.records, f, ensure_ascii=False, indent=2)
+        self.journal.compact(self._snapshot())
+        self._since_compact = 0
         
         # 保存统计数据
         self.stats["last_update"] = datetime.now().isoformat()
-        with open(self.stats_file, 'w', encoding='utf-8') as f:
-            json.dump(self.stats, f, ensure_ascii=False, indent=2)
+        self._write_stats(self.stats)
+    
+    def save_stats(self):
+        """保存统计数据"""
+        self.stats["last_update"] = datetime.now().isoformat()
+        if self.writer:
+            self.writer.put("stats", copy.deepcopy(self.stats))
+        else:
+            self._write_stats(self.stats)
+    
+    def _write_stats(self, stats):
+        """写出统计文件"""
+        atomic_write(self.stats_file, lambda f: json.dump(stats, f, ensure_ascii=False, indent=2))
+    
+    def _write_records(self, records):
+        """把新记录写入日志、SQLite和CSV（后写队列中为一批记录）"""
+        self.journal.append_many(records, durable=self.writer is not None)
+        if self.store:
+            self.store.add_many(records)
+        self._append_rows_to_csv(records)
+    
+    def _claim(self, records):
+        """
+        在去重索引中登记新记录，返回与 records 等长的布尔列表（False 为重复）
+        
+        启用后写队列时只按内存中的索引判断，索引文件的追加交给后台线程
+        """
+        keys = record_keys(records)
+        if not self.writer:
+            return self.dedupe.claim(keys, JSON_SOURCE)
+        accepted, entries = self.dedupe.reserve(keys, JSON_SOURCE)
+        if entries:
+            self.writer.put("dedupe", entries)
+        return accepted
+    
+    def _persist_records(self, records):
+        """持久化新记录（启用后写队列时只入队）"""
+        if self.writer:
+            for record in records:
+                self.writer.put("record", record)
+        else:
+            self._write_records(records)
+    
+    def compact(self):
+        """后台把记录日志压缩进快照（没有新记录时什么都不做）"""
+        if not self._since_compact:
+            return
+        self._since_compact = 0
+        if self.writer:
+            # 在入队时取快照，保证与队列中记录的先后顺序一致；
+            # SQLite 后端没有读入记录时由后台线程从数据库取（队列中之前的记录已先写入数据库）
+            self.writer.put("compact", None if self._records is None else list(self._records))
+        else:
+            self.journal.compact(self._snapshot(), background=True)
+    
+    def flush(self):
+        """立即写出后写队列中的数据"""
+        if self.writer:
+            self.writer.flush()
+    
+    def close(self):
+        """退出前调用：写出所有待写数据，停止后台线程并释放数据目录的写入锁"""
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+        if self._since_compact:
+            self.journal.compact(self._snapshot())
+            self._since_compact = 0
+        self.journal.wait()
+        if self.store:
+            self.store.close()
+            self.store = None
+        self.lock.release()
+    
+    def _write_columnar(self, records):
+        """JSON快照写入后同步写出列式快照和定长记录文件"""
+        if not COLUMNAR_AVAILABLE:
+            return
+        try:
+            columnar_snapshot.write_snapshot(self.columnar_file, records, self.records_file)
+        except Exception as e:
+            print(f"写入列式快照失败: {e}")
+        try:
+            record_memmap.write_record_file(self.records_file, records, self.records_file)
+        except Exception as e:
+            print(f"写入定长记录文件失败: {e}")
+    
+    def load_columnar(self):
+        """
+        获取列式记录数据（见 columnar_snapshot）
+        
+        快照有效且没有未压缩的日志时直接加载快照，否则由内存中的记录生成
+        """
+        if not COLUMNAR_AVAILABLE:
+            return None
+        if not self.journal.pending:
+            columns = columnar_snapshot.load_snapshot(self.columnar_file, self.records_file)
+            if columns is not None:
+                return columns
+        return columnar_snapshot.records_to_columns(self.records)
+    
+    def open_memmap(self):
+        """
+        用 memmap 打开定长记录文件（见 record_memmap），只包含最近一次压缩时的记录
+        
+        文件不存在或已过期时返回 None
+        """
+        if not COLUMNAR_AVAILABLE:
+            return None
+        return record_memmap.open_record_file(self.records_file, self.records_file)
     
     def add_record(self, record):
         """
@@ -98,20 +370,32 @@ class DataManager:
                 "profit": 收益,
                 "survived": 是否撤离
             }
+        
+        Returns:
+            是否添加（已有相同内容的记录时不添加）
         """
         if "datetime" not in record:
             record["datetime"] = datetime.now().isoformat()
         
-        self.records.append(record)
+        if not self._claim([record])[0]:
+            print(f"跳过重复记录: {record['datetime']} {record.get('map', '')}")
+            return False
+        
+        if self._records is not None:
+            self._records.append(record)
+        
+        # 写入日志/SQLite，并追加到CSV供streamlit使用
+        self._persist_records([record])
         
         # 更新统计
-        self.stats["total_games"] += 1
-        if record.get("survived", False):
-            self.stats["survived_games"] += 1
-            self.stats["total_profit"] += record.get("profit", 0)
+        self._update_stats(record)
         
-        self.save_data()
-        self.export_to_csv()  # 自动导出CSV供streamlit使用
+        self.save_stats()
+        
+        # 日志积累到一定长度后在后台压缩
+        self._since_compact += 1
+        if self._since_compact >= self.journal.compact_threshold:
+            self.compact()
         return True
     
     def start_new_session(self, map_name=None, mode=None, spawn_point=None):
@@ -125,6 +409,10 @@ class DataManager:
             "start_time": datetime.now().isoformat(),
             "status": "进行中"
         }
+        if self.writer:
+            self.writer.put("session_start", self.current_session["start_time"])
+        else:
+            self.session_log.begin(self.current_session["start_time"])
         self.save_live_session()
         return self.current_session
     
@@ -150,10 +438,15 @@ class DataManager:
             "time": datetime.now().isoformat()
         }
         self.current_session["items_collected"].append(item)
-        self.current_session["total_value"] = sum(
-            item["value"] for item in self.current_session["items_collected"]
-        )
-        self.save_live_session()
+        self.current_session["total_value"] += item_value
+        
+        # 每次拾取只追加一行日志，快照按间隔写出
+        if self.writer:
+            self.writer.put("session_item", item)
+        else:
+            self.session_log.append_items([item])
+        if self.session_log.snapshot_due():
+            self.save_live_session()
         return self.current_session["total_value"]
     
     def end_session(self, survived=True, final_value=None):
@@ -165,6 +458,11 @@ class DataManager:
         self.save_live_session()
         
         # 创建完整记录
+        start_time = self.current_session.get("start_time")
+        try:
+            duration = int((datetime.now() - datetime.fromisoformat(start_time)).total_seconds())
+        except (TypeError, ValueError):
+            duration = None
         record = {
             "datetime": self.current_session.get("start_time", datetime.now().isoformat()),
             "map": self.current_session.get("map", "未知"),
@@ -172,7 +470,8 @@ class DataManager:
             "zone": self.current_session.get("spawn_point", "未知"),
             "items": self.current_session["items_collected"],
             "profit": final_value,
-            "survived": survived
+            "survived": survived,
+            "duration": duration
         }
         
         return self.add_record(record)
@@ -182,44 +481,73 @@ class DataManager:
         return self.current_session.copy()
     
     def save_live_session(self):
-        """保存实时会话数据"""
+        """保存实时会话快照"""
+        if self.writer:
+            # 物品列表只会追加，浅拷贝列表即可
+            session = dict(self.current_session)
+            session["items_collected"] = list(session["items_collected"])
+            self.writer.put("live_session", session)
+        else:
+            self._write_live_session(self.current_session)
+    
+    def _write_live_session(self, session):
+        """写出实时会话快照"""
         try:
-            with open(self.live_session_file, 'w', encoding='utf-8') as f:
-                json.dump(self.current_session, f, ensure_ascii=False, indent=2)
+            self.session_log.write_snapshot(session)
         except Exception as e:
             print(f"保存实时会话失败: {e}")
     
     def load_live_session(self):
-        """加载实时会话数据"""
-        if self.live_session_file.exists():
-            try:
-                with open(self.live_session_file, 'r', encoding='utf-8') as f:
-                    self.current_session = json.load(f)
-            except:
-                pass
+        """加载实时会话数据（快照 + 日志）"""
+        session = read_live_session(self.live_session_file)
+        if session is not None:
+            self.current_session = session
+    
+    CSV_FIELDS = ['datetime', 'map', 'mode', 'zone', 'items', 'profit', 'survived']
     
-    def export_to_csv(self):
-        """导出记录到CSV供Streamlit读取"""
+    @staticmethod
+    def _csv_row(record):
+        """记录转换为CSV行"""
+        row = record.copy()
+        # 将items列表转换为字符串
+        if isinstance(row.get('items'), list):
+            items_str = '; '.join([item.get('name', str(item)) for item in row['items']])
+            row['items'] = items_str
+        return row
+    
+    def export_to_csv(self, records=None):
+        """导出记录到CSV供Streamlit读取（没有记录时只写表头，不留下旧文件）"""
+        records = self._snapshot(records)
         try:
-            if not self.records:
-                return
-            
-            with open(self.csv_export_file, 'w', encoding='utf-8-sig', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=[
-                    'datetime', 'map', 'mode', 'zone', 'items', 'profit', 'survived'
-                ])
+            def write(f):
+                writer = csv.DictWriter(f, fieldnames=self.CSV_FIELDS, extrasaction='ignore')
                 writer.writeheader()
-                
-                for record in self.records:
-                    row = record.copy()
-                    # 将items列表转换为字符串
-                    if isinstance(row.get('items'), list):
-                        items_str = '; '.join([item.get('name', str(item)) for item in row['items']])
-                        row['items'] = items_str
-                    writer.writerow(row)
+                writer.writerows(self._csv_row(r) for r in records)
+            
+            # 整个文件重写：原子替换，Streamlit 端不会读到写了一半的文件
+            atomic_write(self.csv_export_file, write, encoding='utf-8-sig', newline='')
+            bump_generation(self.records_file)
         except Exception as e:
             print(f"导出CSV失败: {e}")
     
+    def append_to_csv(self, record):
+        """追加一条记录到CSV，不重写整个文件"""
+        self._append_rows_to_csv([record])
+    
+    def _append_rows_to_csv(self, records):
+        """追加多条记录到CSV"""
+        if not self.csv_export_file.exists():
+            self.export_to_csv()
+            return
+        
+        try:
+            with open(self.csv_export_file, 'a', encoding='utf-8-sig', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=self.CSV_FIELDS, extrasaction='ignore')
+                writer.writerows(self._csv_row(r) for r in records)
+            bump_generation(self.records_file)
+        except Exception as e:
+            print(f"追加CSV失败: {e}")
+    
     def get_records(self, filters=None):
         """
         获取记录
@@ -236,7 +564,15 @@ class DataManager:
         if filters is None:
             return self.records
         
-        filtered = self.records.copy()
+        if self.store:
+            return self.store.query(filters)
+        
+        filtered = self.records
+        ts_from = to_timestamp(filters.get("date_from"))
+        ts_to = to_timestamp(filters.get("date_to"), end_of_day=True)
+        if ts_from is not None or ts_to is not None:
+            # 只检查与范围相交的月分区；时间无法解析的记录不在任何日期范围内
+            filtered = self.partitions.query(filtered, ts_from, ts_to)
         
         if filters.get("map"):
             filtered = [r for r in filtered if r.get("map") == filters["map"]]
@@ -247,60 +583,84 @@ class DataManager:
         if filters.get("survived") is not None:
             filtered = [r for r in filtered if r.get("survived") == filters["survived"]]
         
-        return filtered
+        return list(filtered)
     
-    def get_stats(self):
-        """获取统计数据"""
-        if not self.records:
-            return {
-                "total_games": 0,
-                "survival_rate": 0,
-                "total_profit": 0,
-                "avg_profit": 0,
-                "best_game": 0,
-                "map_stats": {},
-                "mode_stats": {}
-            }
+    @staticmethod
+    def _empty_stats():
+        """空的统计数据"""
+        return {
+            "total_games": 0,
+            "total_profit": 0,  # 撤离局的收益合计
+            "survived_games": 0,
+            "best_game": None,  # 撤离局的最高收益
+            "map_stats": {},
+            "mode_stats": {},
+            "last_update": None
+        }
+    
+    def _update_stats(self, record):
+        """把一条新记录累加到统计数据中"""
+        profit = record.get("profit", 0)
+        self._accumulate_stats(record.get("map", "未知"), record.get("mode", "未知"),
+                               bool(record.get("survived", False)), 1, profit, profit)
+    
+    def _accumulate_stats(self, map_name, mode, survived, games, profit, best):
+        """累加一组对局（单条记录或一行每日汇总）到统计数据中"""
+        stats = self.stats
+        
+        stats["total_games"] += games
+        if survived:
+            stats["survived_games"] += games
+            stats["total_profit"] += profit
+            if stats.get("best_game") is None or best > stats["best_game"]:
+                stats["best_game"] = best
+        
+        # 地图 / 模式统计
+        for key, name in (("map_stats", map_name), ("mode_stats", mode)):
+            group = stats.setdefault(key, {}).setdefault(name, {"games": 0, "survived": 0, "profit": 0})
+            group["games"] += games
+            if survived:
+                group["survived"] += games
+                group["profit"] += profit
+    
+    def rebuild_stats(self):
+        """
+        从全部记录重新计算统计数据
         
-        total = len(self.records)
-        survived = len([r for r in self.records if r.get("survived")])
-        profits = [r.get("profit", 0) for r in self.records if r.get("survived")]
-        
-        # 地图统计
-        map_stats = {}
-        for record in self.records:
-            map_name = record.get("map", "未知")
-            if map_name not in map_stats:
-                map_stats[map_name] = {"games": 0, "survived": 0, "profit": 0}
-            map_stats[map_name]["games"] += 1
-            if record.get("survived"):
-                map_stats[map_name]["survived"] += 1
-                map_stats[map_name]["profit"] += record.get("profit", 0)
-        
-        # 模式统计
-        mode_stats = {}
-        for record in self.records:
-            mode_name = record.get("mode", "未知")
-            if mode_name not in mode_stats:
-                mode_stats[mode_name] = {"games": 0, "survived": 0, "profit": 0}
-            mode_stats[mode_name]["games"] += 1
-            if record.get("survived"):
-                mode_stats[mode_name]["survived"] += 1
-                mode_stats[mode_name]["profit"] += record.get("profit", 0)
+        Returns:
+            bool: 重建前的增量统计是否与重新计算的结果一致
+        """
+        old = self.stats
+        self.stats = self._empty_stats()
+        for row in self.rollups.rows:
+            self._accumulate_stats(row["map"], row["mode"], row["survived"],
+                                   row["count"], row["profit_sum"], row["profit_max"])
+        for record in self._snapshot():
+            self._update_stats(record)
+        
+        keys = ("total_games", "total_profit", "survived_games", "best_game", "map_stats", "mode_stats")
+        return all(old.get(k) == self.stats[k] for k in keys)
+    
+    def get_stats(self):
+        """获取统计数据（由增量维护的汇总直接得出，不扫描记录）"""
+        stats = self.stats
+        total = stats["total_games"]
+        survived = stats["survived_games"]
         
         return {
             "total_games": total,
             "survival_rate": survived / total * 100 if total > 0 else 0,
-            "total_profit": sum(profits),
-            "avg_profit": sum(profits) / len(profits) if profits else 0,
-            "best_game": max(profits) if profits else 0,
-            "map_stats": map_stats,
-            "mode_stats": mode_stats
+            "total_profit": stats["total_profit"],
+            "avg_profit": stats["total_profit"] / survived if survived else 0,
+            "best_game": stats["best_game"] or 0,
+            "map_stats": {k: dict(v) for k, v in stats["map_stats"].items()},
+            "mode_stats": {k: dict(v) for k, v in stats["mode_stats"].items()}
         }
     
     def export_csv(self, filepath):
         """导出为CSV"""
-        if not self.records:
+        records = self._snapshot()
+        if not records:
             return False
         
         with open(filepath, 'w', newline='', encoding='utf-8-sig') as f:
@@ -311,7 +671,7 @@ class DataManager:
             writer.writerow(headers)
             
             # 数据
-            for record in self.records:
+            for record in records:
                 items_str = ", ".join([
                     f"{item['name']}x{item.get('count', 1)}" 
                     for item in record.get("items", [])
@@ -330,55 +690,164 @@ class DataManager:
         
         return True
     
-    def import_csv(self, filepath):
-        """从CSV导入"""
+    def _ingest(self, records):
+        """去重后批量追加记录（写日志、更新统计），返回实际追加的记录"""
+        accepted = self._claim(records)
+        records = [r for r, ok in zip(records, accepted) if ok]
+        if records:
+            if self._records is not None:
+                self._records.extend(records)
+            self._persist_records(records)
+            for record in records:
+                self._update_stats(record)
+        return records
+    
+    def add_records(self, records):
+        """
+        一次批量添加多条记录（批量导入使用），重复的记录跳过
+        
+        Returns:
+            实际添加的记录数
+        """
+        added = len(self._ingest(records))
+        if added:
+            self._since_compact += added
+            self.save_stats()
+            self.compact()
+        return added
+    
+    def import_csv(self, filepath, chunk_size=10000, progress=None):
+        """
+        从CSV导入（分块流式读取，每块批量写入日志，不重写整个记录文件）
+        
+        Args:
+            filepath: CSV文件路径
+            chunk_size: 每块行数，读取时的内存占用只与块大小有关
+            progress: 可选回调 progress(已读取行数)，每块调用一次
+        
+        已在去重索引中的记录（其他途径导入过的同一局）会被跳过；
+        没有时间的行按文件的修改时间记录（见 file_datetime），重复导入时同样被跳过
+        """
+        imported = 0
+        read = 0
         try:
-            with open(filepath, 'r', encoding='utf-8-sig') as f:
+            default_datetime = file_datetime(filepath)
+            with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
                 reader = csv.DictReader(f)
-                for row in reader:
-                    record = {
-                        "datetime": row.get("日期时间", datetime.now().isoformat()),
-                        "map": row.get("地图", ""),
-                        "mode": row.get("模式", ""),
-                        "zone": row.get("刷新点", ""),
-                        "items": [],
-                        "profit": int(row.get("收益", 0) or 0),
-                        "survived": row.get("是否撤离", "否") == "是"
-                    }
-                    self.records.append(record)
-            
-            self.save_data()
+                while True:
+                    rows = list(itertools.islice(reader, chunk_size))
+                    if not rows:
+                        break
+                    
+                    chunk = self._ingest([record_from_row(row, default_datetime) for row in rows])
+                    imported += len(chunk)
+                    read += len(rows)
+                    if progress:
+                        progress(read)
+            if imported < read:
+                print(f"跳过 {read - imported} 条重复记录")
             return True
         except Exception as e:
             print(f"导入失败: {e}")
             return False
+        finally:
+            # 已导入的部分照常保存，快照在后台压缩
+            if imported:
+                self._since_compact += imported
+                self.save_stats()
+                self.compact()
     
     def clear_records(self):
         """清空记录"""
         self.records = []
-        self.stats = {
-            "total_games": 0,
-            "total_profit": 0,
-            "survived_games": 0,
-            "last_update": None
-        }
+        self.stats = self._empty_stats()
+        if self.store:
+            self.store.clear()
+        self.rollups.replace()
+        self.rollups.save()
+        self.dedupe.release(JSON_SOURCE)
         self.save_data()
+        self.export_to_csv()
+    
+    def rollup(self, retention_days=None):
+        """
+        把保留期之前的原始记录折叠进每日汇总（统计数据不变）
+        
+        会永久删除已折叠的原始记录（地点、物资不再保留），只在用户明确操作时调用；
+        启用后写队列时内存中立即折叠，写盘交给后台线程
+        
+        Args:
+            retention_days: 原始记录保留天数，默认沿用上次的设置
+        
+        Returns:
+            折叠的记录数
+        """
+        if retention_days is not None:
+            self.rollups.retention_days = retention_days
+        if not self.writer:
+            self.journal.wait()
+        
+        kept, folded = self.rollups.fold(self.records)
+        if not folded:
+            return 0
+        
+        self.records = kept
+        self._since_compact = 0
+        # 入队时取快照，之后新增的记录在队列中排在它后面
+        rollup = (list(kept), self.rollups.snapshot())
+        if self.writer:
+            self.writer.put("rollup", rollup)
+        else:
+            self._write_rollup([rollup])
+        return folded
     
-    def backup(self):
-        """备份数据"""
-        backup_dir = self.data_dir / "backups"
-        backup_dir.mkdir(exist_ok=True)
+    def _write_rollup(self, rollups):
+        """写出汇总文件并删除已折叠的原始记录（一批中只需写最后一次的结果）"""
+        records, snapshot = rollups[-1]
+        # 汇总文件先带 pending 标记写出，再删除原始记录
+        self.rollups.save(pending=True, snapshot=snapshot)
+        self.journal.compact(records)
+        self.rollups.save(snapshot=snapshot)
+        
+        if self.store:
+            self.store.rebuild(records)
+        self.export_to_csv(records)
+    
+    def backup(self, full=False):
+        """备份数据和每日汇总（默认只备份上次备份之后新增的记录），没有新记录时返回 None"""
+        self.flush()
+        return self.backups.backup(self.records, self.stats, full=full, rollup=self.rollups.snapshot())
+    
+    def restore_backup(self, until=None):
+        """
+        从备份还原记录
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_file = backup_dir / f"backup_{timestamp}.json"
+        Args:
+            until: 还原到哪个备份文件为止（文件名），默认最新
         
-        with open(backup_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                "records": self.records,
-                "stats": self.stats
-            }, f, ensure_ascii=False, indent=2)
+        Returns:
+            是否还原成功
+        """
+        self.flush()
+        records, _, rollup = self.backups.restore(until)
+        if records is None:
+            return False
         
-        return backup_file
+        if rollup is not None:
+            # 汇总与记录一起还原到备份时的状态
+            self.rollups.replace(rollup)
+            self.rollups.save()
+        
+        # 已折叠进每日汇总的部分不再作为原始记录恢复
+        self.records = [r for r in records if not self.rollups.is_folded(r)]
+        self.dedupe.release(JSON_SOURCE)
+        self.dedupe.accept(record_keys(records), JSON_SOURCE)
+        self.rebuild_stats()
+        if self.store:
+            self.store.rebuild(self.records)
+        self.save_data()
+        self.export_to_csv()
+        return True
 
 
 class SyncManager:
@@ -0,0 +1,258 @@
+"""
+记录去重索引模块
+同一局游戏可能经由多个途径进入数据目录（game_records.json、导出CSV、上传副本、手动导入），
+这里为每条记录计算内容哈希，持久化在 record_index_v2.tsv 中，所有写入和读取途径都先查索引
+
+内容哈希基于规范化后的：时间（精确到分钟，按 timestamps.parse_datetimes 解析，无法解析时用原文）、
+地图、模式、收益、是否撤离；整列规范化后用 pandas.util.hash_pandas_object 一次算出，
+单条记录也走同一条路径，各途径得到的哈希一致
+索引文件每行 "<哈希>\t<所属数据源>"，只追加，后出现的行覆盖前面的；
+所属数据源为空表示已释放（对应数据被清空或文件被删除）；
+被覆盖或释放的行多于有效行时，把当前的 哈希 -> 数据源 整体重写（原子替换），
+其他进程发现文件被替换后重新读取
+"""
+
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from publish import atomic_write
+from record_fields import parse_survived
+from timestamps import NAT, parse_datetimes
+
+
+# v2：哈希改为按列计算（算法与 record_index.tsv 不同，旧索引不再使用，由各数据源重新登记）
+INDEX_FILE_NAME = "record_index_v2.tsv"
+LEGACY_INDEX_FILE_NAME = "record_index.tsv"
+JSON_SOURCE = "game_records.json"  # 桌面客户端的记录（快照 + 日志）
+COMPACT_MIN_DEAD = 10_000  # 失效行至少有这么多时才重写索引文件
+KEY_COLUMNS = ["datetime", "map", "mode", "profit", "survived"]
+
+
+def _text(values, default):
+    """字符串列规范化：去掉首尾空白，缺失或空字符串为 default"""
+    text = pd.Series(values, dtype=object).where(pd.notna(values), "").astype(str).str.strip()
+    return text.mask(text == "", default).to_numpy(dtype=object)
+
+
+def frame_keys(df):
+    """
+    英文列记录表每一行的内容哈希（16 位十六进制字符串）
+
+    已有 ts 列（record_schema.with_timestamps 的结果）时直接使用，不再解析时间
+    """
+    n = len(df)
+    column = lambda name: df[name].to_numpy(dtype=object) if name in df else np.full(n, None, dtype=object)
+
+    ts = df["ts"].to_numpy(dtype=np.int64) if "ts" in df else parse_datetimes(column("datetime"))
+    known = ts != NAT
+    raw = _text(column("datetime"), "")
+    profit = pd.to_numeric(pd.Series(column("profit")), errors="coerce").fillna(0).to_numpy()
+    codes, uniques = pd.factorize(pd.Series(column("survived")), use_na_sentinel=False)
+    survived = np.array([parse_survived(v) for v in uniques], dtype=bool)[codes]
+
+    normalized = pd.DataFrame({
+        "minute": np.where(known, ts // 60, NAT),
+        "raw": np.where(known, "", raw),  # 时间无法解析时用原文
+        "map": _text(column("map"), "未知"),
+        "mode": _text(column("mode"), "未知"),
+        "profit": np.trunc(profit).astype(np.int64),
+        "survived": survived,
+    })
+    hashes = pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+    return [f"{h:016x}" for h in hashes.tolist()]
+
+
+def record_keys(records):
+    """英文键记录字典列表的内容哈希"""
+    if not records:
+        return []
+    return frame_keys(pd.DataFrame.from_records(
+        [{name: r.get(name) for name in KEY_COLUMNS} for r in records], columns=KEY_COLUMNS))
+
+
+def record_key(dt, map_name, mode, profit, survived):
+    """一条记录的内容哈希"""
+    return record_keys([{"datetime": dt, "map": map_name, "mode": mode, "profit": profit, "survived": survived}])[0]
+
+
+def record_key_of(record):
+    """英文键记录字典的内容哈希"""
+    return record_keys([record])[0]
+
+
+class DedupeIndex:
+    """
+    持久化的内容哈希索引（哈希 -> 所属数据源）
+
+    写入途径用 claim()：索引里已有的记录一律拒绝；
+    读取途径用 accept()：属于本数据源（或无主）的记录接受，属于其他数据源的拒绝。
+    多个进程可同时追加，每次查询前读入其他进程新追加的部分；
+    reserve() 只在内存中登记，返回的行之后用 persist() 写盘（例如交给后写队列）
+    """
+
+    def __init__(self, data_dir):
+        self.index_file = Path(data_dir) / INDEX_FILE_NAME
+        self._owners = {}
+        self._offset = 0
+        self._lines = 0  # 已读入的行数（含被覆盖和释放的行）
+        self._identity = None  # 已读入的索引文件的 (st_dev, st_ino)，文件被替换时改变
+        self._releases = 0  # 读到或写出的释放行数，读取方据此判断缓存的筛选结果是否失效
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """读入索引文件新追加的完整行"""
+        try:
+            stat = self.index_file.stat()
+        except OSError:
+            return
+        size = stat.st_size
+        if (stat.st_dev, stat.st_ino) != self._identity or size < self._offset:
+            if self._identity is not None or self._offset:
+                # 文件被重写过（压缩），重新读取；有记录因此易主或释放时才算作释放
+                previous = self._owners
+                self._owners = {}
+                self._offset = self._lines = 0
+                self._read_to(size)
+                if any(self._owners.get(key) != source for key, source in previous.items()):
+                    self._releases += 1
+                self._identity = (stat.st_dev, stat.st_ino)
+                return
+            self._identity = (stat.st_dev, stat.st_ino)
+        if size > self._offset:
+            self._read_to(size)
+
+    def _read_to(self, size):
+        """从已读位置读到 size 为止的完整行"""
+        with open(self.index_file, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+        end = data.rfind(b"\n") + 1
+        lines = data[:end].decode("utf-8").splitlines()
+        self._apply(tuple(line.partition("\t")[::2]) for line in lines)
+        self._offset += end
+        self._lines += len(lines)
+
+    def _apply(self, entries):
+        """把 (哈希, 数据源) 应用到内存中的索引"""
+        for key, source in entries:
+            if source:
+                self._owners[key] = source
+            elif self._owners.pop(key, None) is not None:
+                self._releases += 1
+
+    def _append(self, entries):
+        """追加 (哈希, 数据源) 行，失效行过多时压缩"""
+        if not entries:
+            return
+        with open(self.index_file, 'a', encoding='utf-8') as f:
+            f.write("".join(f"{key}\t{source}\n" for key, source in entries))
+        self._apply(entries)
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        """被覆盖或释放的行多于有效行时，把当前索引重写成一行一个有效哈希"""
+        self._refresh()
+        live = len(self._owners)
+        if self._lines - live <= max(live, COMPACT_MIN_DEAD):
+            return
+        content = "".join(f"{key}\t{source}\n" for key, source in self._owners.items())
+        try:
+            if self.index_file.stat().st_size != self._offset:
+                return  # 其他进程刚追加了行，下次再压缩
+            atomic_write(self.index_file, lambda f: f.write(content))
+            stat = self.index_file.stat()
+        except OSError as e:
+            print(f"压缩去重索引失败: {e}")
+            return
+        self._identity = (stat.st_dev, stat.st_ino)
+        self._offset = stat.st_size
+        self._lines = live
+
+    def _check(self, keys, source, allow_own):
+        """在内存中检查并登记，返回 (结果列表, 新登记的行)"""
+        accepted = []
+        seen = set()
+        new_entries = []
+        for key in keys:
+            owner = self._owners.get(key)
+            ok = key not in seen and (owner is None or (allow_own and owner == source))
+            if ok and owner is None:
+                new_entries.append((key, source))
+            seen.add(key)
+            accepted.append(ok)
+        self._apply(new_entries)
+        return accepted, new_entries
+
+    def claim(self, keys, source):
+        """
+        写入前登记新记录
+
+        Returns:
+            与 keys 等长的布尔列表，False 表示重复（索引中已有，或本批中已出现过）
+        """
+        with self._lock:
+            self._refresh()
+            accepted, entries = self._check(keys, source, allow_own=False)
+            self._append(entries)
+            return accepted
+
+    def load(self):
+        """读入索引文件（reserve() 只看内存中的索引，使用前先读入）"""
+        with self._lock:
+            self._refresh()
+
+    def reserve(self, keys, source):
+        """
+        同 claim()，但只按内存中的索引判断、只在内存中登记，不读写文件
+
+        Returns:
+            (与 keys 等长的布尔列表, 要写入索引文件的行)，后者交给 persist()
+        """
+        with self._lock:
+            return self._check(keys, source, allow_own=False)
+
+    def persist(self, entries):
+        """把 reserve() 登记的行追加到索引文件"""
+        with self._lock:
+            self._refresh()
+            self._append(entries)
+
+    def accept(self, keys, source):
+        """
+        读取数据源时筛选记录：属于其他数据源的记录视为重复，无主的记录登记到本数据源
+
+        Returns:
+            与 keys 等长的布尔列表
+        """
+        with self._lock:
+            self._refresh()
+            accepted, entries = self._check(keys, source, allow_own=True)
+            self._append(entries)
+            return accepted
+
+    def release_count(self):
+        """到目前为止释放过的记录数（包括其他进程释放的）"""
+        with self._lock:
+            self._refresh()
+            return self._releases
+
+    def release(self, source, keys=None):
+        """释放某个数据源的全部记录（或其中的 keys），之后其他途径可以重新登记"""
+        with self._lock:
+            self._refresh()
+            if keys is None:
+                keys = [k for k, owner in self._owners.items() if owner == source]
+            else:
+                keys = [k for k in keys if self._owners.get(k) == source]
+            self._append([(key, "") for key in keys])
+
+    def release_missing(self, live_sources):
+        """释放已经不存在的数据源的记录"""
+        live_sources = set(live_sources)
+        with self._lock:
+            self._refresh()
+            self._append([(key, "") for key, owner in self._owners.items()
+                          if owner not in live_sources])
@@ -0,0 +1,46 @@
+"""
+物品目录
+物品的标准名称、识别关键词、参考价值和类别；OCR 识别（OCREngine）和记录分析中的物品
+字典（item_facts）共用这一份，同一物品在两边的名称一致
+"""
+
+# 标准名称 -> {keywords: 识别关键词, value: 参考价值, category: 类别}
+ITEM_KEYWORDS = {
+    # 武器
+    "M4A1": {"keywords": ["M4A1", "M4"], "value": 80000, "category": "武器"},
+    "AK-47": {"keywords": ["AK-47", "AK47", "AK"], "value": 75000, "category": "武器"},
+    "HK416": {"keywords": ["HK416", "HK"], "value": 120000, "category": "武器"},
+    "SCAR-H": {"keywords": ["SCAR", "SCAR-H"], "value": 150000, "category": "武器"},
+    "MP5": {"keywords": ["MP5"], "value": 45000, "category": "武器"},
+    "P90": {"keywords": ["P90"], "value": 65000, "category": "武器"},
+    "Vector": {"keywords": ["Vector", "VECTOR"], "value": 70000, "category": "武器"},
+    "狙击步枪": {"keywords": ["狙击", "AWM", "M24", "98K"], "value": 200000, "category": "武器"},
+    "霰弹枪": {"keywords": ["霰弹", "870", "S686"], "value": 35000, "category": "武器"},
+    
+    # 护甲
+    "6级护甲": {"keywords": ["6级", "六级", "LV6"], "value": 250000, "category": "护甲"},
+    "5级护甲": {"keywords": ["5级", "五级", "LV5"], "value": 120000, "category": "护甲"},
+    "4级护甲": {"keywords": ["4级", "四级", "LV4"], "value": 50000, "category": "护甲"},
+    "3级护甲": {"keywords": ["3级", "三级", "LV3"], "value": 20000, "category": "护甲"},
+    
+    # 头盔
+    "6级头盔": {"keywords": ["6级头盔", "六级头"], "value": 180000, "category": "头盔"},
+    "5级头盔": {"keywords": ["5级头盔", "五级头"], "value": 80000, "category": "头盔"},
+    "4级头盔": {"keywords": ["4级头盔", "四级头"], "value": 35000, "category": "头盔"},
+    
+    # 医疗
+    "医疗包": {"keywords": ["医疗包", "大药"], "value": 15000, "category": "医疗"},
+    "止血带": {"keywords": ["止血带", "绷带"], "value": 5000, "category": "医疗"},
+    "止痛药": {"keywords": ["止痛药", "止痛"], "value": 8000, "category": "医疗"},
+    
+    # 特殊物品
+    "钥匙卡": {"keywords": ["钥匙卡", "钥匙", "门卡"], "value": 500000, "category": "特殊"},
+    "情报文件": {"keywords": ["情报", "文件", "档案"], "value": 300000, "category": "特殊"},
+    "芯片": {"keywords": ["芯片", "CPU"], "value": 400000, "category": "特殊"},
+    
+    # 配件
+    "4倍镜": {"keywords": ["4倍镜", "4X", "ACOG"], "value": 25000, "category": "配件"},
+    "8倍镜": {"keywords": ["8倍镜", "8X"], "value": 45000, "category": "配件"},
+    "消音器": {"keywords": ["消音器", "消音"], "value": 30000, "category": "配件"},
+    "扩容弹匣": {"keywords": ["扩容", "弹匣"], "value": 15000, "category": "配件"},
+}
@@ -0,0 +1,100 @@
+"""
+实时会话日志模块
+拾取物品时只向 live_session.log 追加一行增量，live_session.json 快照按间隔节流写出，
+读取方用 快照 + 日志尾部 还原当前会话
+
+日志格式（每行一个 JSON）：
+    第一行  {"start_time": ...}  会话头，与快照的 start_time 对不上时整份日志作废
+    之后    {"name", "value", "category", "time"}  拾取的物品
+"""
+
+import json
+import time
+from pathlib import Path
+
+from publish import atomic_write, bump_generation
+
+
+def _dumps(obj):
+    """紧凑 JSON（不缩进）"""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def log_file_for(session_file):
+    """快照对应的日志文件"""
+    return Path(session_file).with_suffix(".log")
+
+
+def read_log_items(log_file, start_time):
+    """读取日志中属于 start_time 这一局的物品，写到一半的最后一行忽略"""
+    items = []
+    try:
+        with open(log_file, 'r', encoding='utf-8') as f:
+            header = f.readline()
+            if not header or json.loads(header).get("start_time") != start_time:
+                return []
+            for line in f:
+                try:
+                    items.append(json.loads(line))
+                except ValueError:
+                    break
+    except (OSError, ValueError):
+        return []
+    return items
+
+
+def read_live_session(session_file):
+    """
+    读取实时会话（快照 + 日志中快照之后拾取的物品）
+
+    Returns:
+        会话字典，快照不存在或损坏时返回 None
+    """
+    try:
+        with open(session_file, 'r', encoding='utf-8') as f:
+            session = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    items = session.setdefault("items_collected", [])
+    tail = read_log_items(log_file_for(session_file), session.get("start_time"))[len(items):]
+    for item in tail:
+        items.append(item)
+        session["total_value"] = session.get("total_value", 0) + item.get("value", 0)
+    return session
+
+
+class LiveSessionLog:
+    """
+    实时会话的追加日志 + 节流快照
+
+    begin() 新开一局时重写日志头，append_items() 只追加，
+    write_snapshot() 原子替换快照；snapshot_due() 判断距上次快照是否已超过间隔
+    """
+
+    def __init__(self, session_file, snapshot_interval=2.0):
+        self.session_file = Path(session_file)
+        self.log_file = log_file_for(session_file)
+        self.snapshot_interval = snapshot_interval
+        self._last_snapshot = 0.0
+
+    def begin(self, start_time):
+        """新开一局：原子替换为只有会话头的新日志"""
+        atomic_write(self.log_file, lambda f: f.write(_dumps({"start_time": start_time}) + "\n"))
+        bump_generation(self.session_file)
+
+    def append_items(self, items):
+        """追加拾取的物品（一次写入一批）"""
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write("".join(_dumps(item) + "\n" for item in items))
+        bump_generation(self.session_file)
+
+    def snapshot_due(self):
+        """距上次快照是否已超过间隔"""
+        return time.monotonic() - self._last_snapshot >= self.snapshot_interval
+
+    def write_snapshot(self, session):
+        """写出会话快照（临时文件 + 原子替换）"""
+        self._last_snapshot = time.monotonic()
+        atomic_write(self.session_file, lambda f: f.write(_dumps(session)))
+        bump_generation(self.session_file)
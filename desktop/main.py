@@ -20,6 +20,7 @@ import json
 from screen_capture import ScreenCapture
 from ocr_engine import OCREngine
 from data_manager import DataManager
+from writer_lock import DataDirLocked
 from game_detector import GameDetector
 from live_session_widget import LiveSessionWidget
 
@@ -61,7 +62,7 @@ class MainWindow(QMainWindow):
         
         self.screen_capture = ScreenCapture()
         self.ocr_engine = OCREngine()
-        self.data_manager = DataManager()
+        self.data_manager = DataManager(write_behind=True)  # disk writes happen off the GUI thread
         self.game_detector = GameDetector()
         
         self.is_monitoring = False
@@ -250,6 +251,22 @@ class MainWindow(QMainWindow):
         game_layout.addWidget(self.auto_detect_check)
         
         layout.addWidget(game_group)
+        
+        data_group = QGroupBox("Data")
+        data_layout = QHBoxLayout(data_group)
+        data_layout.addWidget(QLabel("Keep raw records (days):"))
+        self.retention_spin = QSpinBox()
+        self.retention_spin.setRange(7, 3650)
+        self.retention_spin.setValue(90)
+        self.retention_spin.setToolTip("Older raids are folded into daily summaries")
+        data_layout.addWidget(self.retention_spin)
+        rollup_btn = QPushButton("Roll Up Now")
+        rollup_btn.setToolTip("Fold raids older than the retention window into daily summaries")
+        rollup_btn.clicked.connect(self.rollup_records)
+        data_layout.addWidget(rollup_btn)
+        data_layout.addStretch()
+        
+        layout.addWidget(data_group)
         layout.addStretch()
         
         save_btn = QPushButton("Save Settings")
@@ -425,8 +442,8 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Saved", "Game record saved!")
     
     def auto_save_session(self):
-        """Auto-save session data"""
-        self.data_manager.save_data()
+        """Auto-save session data (compacts the record journal in background)"""
+        self.data_manager.compact()
     
     def refresh_records_table(self):
         """Refresh records table"""
@@ -477,6 +494,21 @@ class MainWindow(QMainWindow):
             self.data_manager.export_csv(file_path)
             self.log(f"Exported to: {file_path}")
     
+    def rollup_records(self):
+        """Fold old raids into daily summaries (deletes their raw records)"""
+        days = self.retention_spin.value()
+        reply = QMessageBox.question(
+            self, "Roll Up",
+            f"Raids older than {days} days will be folded into daily summaries.\n"
+            "Their zone and item details are deleted permanently. Continue?"
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        folded = self.data_manager.rollup(days)
+        if folded:
+            self.refresh_records_table()
+        self.log(f"Rolled up {folded} old records into daily summaries")
+    
     def log(self, message):
         timestamp = datetime.now().strftime("%H:%M:%S")
         self.result_text.append(f"[{timestamp}] {message}")
@@ -486,12 +518,14 @@ class MainWindow(QMainWindow):
         self.interval_spin.setValue(settings.value("interval", 3, type=int))
         self.auto_recognize_check.setChecked(settings.value("auto_recognize", True, type=bool))
         self.auto_detect_check.setChecked(settings.value("auto_detect", True, type=bool))
+        self.retention_spin.setValue(settings.value("retention_days", 90, type=int))
     
     def save_settings(self):
         settings = QSettings("DeltaTool", "ScreenCapture")
         settings.setValue("interval", self.interval_spin.value())
         settings.setValue("auto_recognize", self.auto_recognize_check.isChecked())
         settings.setValue("auto_detect", self.auto_detect_check.isChecked())
+        settings.setValue("retention_days", self.retention_spin.value())
         QMessageBox.information(self, "Settings", "Settings saved!")
     
     def setup_tray_icon(self):
@@ -532,6 +566,7 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event):
         """Minimize to tray instead of closing"""
         if self.tray_icon.isVisible():
+            self.data_manager.flush()
             self.hide()
             self.tray_icon.showMessage(
                 "Delta Tool",
@@ -541,6 +576,7 @@ class MainWindow(QMainWindow):
             )
             event.ignore()
         else:
+            self.data_manager.close()
             event.accept()
     
     def force_quit(self):
@@ -552,7 +588,7 @@ class MainWindow(QMainWindow):
             except:
                 pass
         
-        self.data_manager.save_data()
+        self.data_manager.close()
         self.tray_icon.hide()
         QApplication.quit()
     
@@ -581,7 +617,12 @@ def main():
     palette.setColor(QPalette.ColorRole.Highlight, QColor(255, 215, 0))
     app.setPalette(palette)
     
-    window = MainWindow()
+    try:
+        window = MainWindow()
+    except DataDirLocked as e:
+        # Another writer (bulk import, or a second client) holds the data directory
+        QMessageBox.critical(None, "Delta Tool", f"{e}\n\nClose the other program and try again.")
+        sys.exit(1)
     window.show()
     
     sys.exit(app.exec())
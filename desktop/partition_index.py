@@ -0,0 +1,83 @@
+"""
+按月分区索引
+记录按对局时间分到 "YYYY-MM" 月分区（时间无法解析的归入 "unknown"），日期范围查询只看与范围相交的分区：
+定长记录文件（record_memmap）每个分区一个数据文件，文件头记下各分区的时间范围，读取方只映射相关分区；
+DataManager 对内存中的记录维护同样的索引（RecordPartitionIndex），get_records 按日期筛选时不扫描全部历史
+"""
+
+import heapq
+
+from timestamps import NAT, month_text, to_timestamp
+
+
+UNKNOWN_PARTITION = "unknown"  # 时间无法解析的记录
+
+
+def partition_of(ts):
+    """时间戳（墙钟秒数，None 或 NAT 表示未知）所属的分区名"""
+    if ts is None or ts == NAT:
+        return UNKNOWN_PARTITION
+    return month_text(ts)
+
+
+def overlapping(ranges, ts_from=None, ts_to=None):
+    """
+    与时间范围相交的分区名（按时间顺序）
+
+    Args:
+        ranges: 分区名 -> (最早时间, 最晚时间)
+        ts_from, ts_to: 时间范围（含两端），None 表示不限；指定范围时不含时间未知的分区
+    """
+    names = []
+    for name in sorted(ranges):
+        if name == UNKNOWN_PARTITION:
+            if ts_from is None and ts_to is None:
+                names.append(name)
+            continue
+        lo, hi = ranges[name]
+        if (ts_from is None or hi >= ts_from) and (ts_to is None or lo <= ts_to):
+            names.append(name)
+    return names
+
+
+class RecordPartitionIndex:
+    """
+    内存中记录列表的月分区索引
+
+    记录列表只会追加或整体替换：同一个列表变长时只索引新追加的记录，换了列表（或变短）时重建
+    """
+
+    def __init__(self):
+        self._records = None
+        self._indexed = 0
+        self._partitions = {}  # 分区名 -> [下标列表, 时间戳列表, 最早时间, 最晚时间]
+
+    def _update(self, records):
+        if records is not self._records or len(records) < self._indexed:
+            self._records = records
+            self._indexed = 0
+            self._partitions = {}
+        for i in range(self._indexed, len(records)):
+            ts = to_timestamp(records[i].get("datetime"))
+            entry = self._partitions.setdefault(partition_of(ts), [[], [], ts, ts])
+            entry[0].append(i)
+            entry[1].append(ts)
+            if ts is not None:
+                entry[2] = min(entry[2], ts)
+                entry[3] = max(entry[3], ts)
+        self._indexed = len(records)
+
+    def query(self, records, ts_from=None, ts_to=None):
+        """日期范围内的记录（保持原顺序），只检查与范围相交的分区"""
+        self._update(records)
+        ranges = {name: (entry[2], entry[3]) for name, entry in self._partitions.items()}
+        rows = []
+        for name in overlapping(ranges, ts_from, ts_to):
+            positions, times, lo, hi = self._partitions[name]
+            if name == UNKNOWN_PARTITION or ((ts_from is None or lo >= ts_from) and (ts_to is None or hi <= ts_to)):
+                # 分区整体在范围内，不必逐条判断
+                rows.append(positions)
+            else:
+                rows.append([i for i, ts in zip(positions, times)
+                             if (ts_from is None or ts >= ts_from) and (ts_to is None or ts <= ts_to)])
+        return [records[i] for i in heapq.merge(*rows)]
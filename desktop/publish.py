@@ -0,0 +1,105 @@
+"""
+原子发布模块
+桌面客户端写、Streamlit 端读同一批文件，两边不加锁：
+写入方整文件重写时先写临时文件再原子替换，读取方不会读到写了一半的文件；
+每次发布（替换或追加）之后递增该数据的代数（<数据文件>.generation），
+读取方先比较代数，未变化时直接复用上次的解析结果，不必再逐个检查、解析文件
+
+    game_records.generation    记录（快照、日志、CSV导出、历史汇总）
+    live_session.generation    实时会话（快照、物品日志）
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+
+
+_lock = threading.Lock()
+
+
+def generation_file_for(path):
+    """数据文件对应的代数文件"""
+    return Path(path).with_suffix(".generation")
+
+
+def _replace(tmp_file, path, retries=5):
+    """原子替换；Windows 上目标文件正被读取时短暂重试"""
+    for attempt in range(retries):
+        try:
+            os.replace(tmp_file, path)
+            return
+        except PermissionError:
+            if attempt == retries - 1:
+                raise
+            time.sleep(0.05)
+
+
+def atomic_write(path, write, mode='w', encoding='utf-8', newline=None):
+    """
+    原子写出文件
+
+    Args:
+        path: 目标文件
+        write: 函数，参数为打开的临时文件，负责写入内容
+    """
+    path = Path(path)
+    tmp_file = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_file, mode, encoding=encoding, newline=newline) as f:
+            write(f)
+        _replace(tmp_file, path)
+    except BaseException:
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+        raise
+
+
+def read_generation(path):
+    """数据文件当前的代数，从未发布过时返回 None"""
+    try:
+        with open(generation_file_for(path), 'r', encoding='utf-8') as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def bump_generation(path):
+    """
+    数据文件发布后调用，递增代数并返回新值
+
+    新代数取 max(上次 + 1, 当前时间纳秒)，多个进程同时发布也不会写出相同的值
+    """
+    with _lock:
+        generation = max((read_generation(path) or 0) + 1, time.time_ns())
+        try:
+            atomic_write(generation_file_for(path), lambda f: f.write(str(generation)))
+        except OSError as e:
+            print(f"更新发布代数失败: {e}")
+        return generation
+
+
+class GenerationCache:
+    """
+    按代数缓存读取结果
+
+    get(loader) 在代数未变化时返回上次的结果，否则调用 loader() 重新读取；
+    数据文件从未发布过代数（旧版本客户端写入）时每次都重新读取
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._generation = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self, loader):
+        with self._lock:
+            # 先取代数再读数据：读取期间有新发布时代数已变，下次会重新读取
+            generation = read_generation(self.path)
+            if generation is None or generation != self._generation:
+                self._value = loader()
+                self._generation = generation
+            return self._value
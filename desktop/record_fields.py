@@ -0,0 +1,21 @@
+"""
+记录字段规则模块
+桌面客户端（record_from_row、汇总、列式快照）、网页端（record_schema）和去重索引共用，
+同一条记录经不同途径读入时得到相同的值，去重哈希也就一致；只依赖标准库
+
+    survived  是否撤离：布尔值原样使用，"true"/"1"/"是"/"✅" 等为真，缺失或空白视为撤离
+"""
+
+
+SURVIVED_TRUE_VALUES = ("true", "1", "1.0", "yes", "是", "✅")
+SURVIVED_DEFAULT = True  # 缺失或空白时的取值
+
+
+def parse_survived(value):
+    """单个是否撤离的值转换为布尔值"""
+    if value is None or value != value:
+        return SURVIVED_DEFAULT
+    if isinstance(value, str):
+        text = value.strip().lower()
+        return SURVIVED_DEFAULT if not text else text in SURVIVED_TRUE_VALUES
+    return bool(value)
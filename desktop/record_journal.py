@@ -0,0 +1,180 @@
+"""
+记录日志模块
+游戏记录采用 "快照 + 追加日志" 的方式持久化：
+新记录只追加到日志文件，后台压缩时再把日志折叠进快照
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+from publish import atomic_write, bump_generation
+
+
+def _read_json_lines(path):
+    """逐行读取日志文件，跳过写了一半的坏行"""
+    entries = []
+    if not path.exists():
+        return entries
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # 崩溃时最后一行可能不完整，直接忽略
+                    pass
+    except OSError:
+        pass
+    return entries
+
+
+def read_tail(snapshot_file, is_folded):
+    """
+    读取快照之后的日志部分：压缩中的封存日志 + 当前日志
+
+    Args:
+        snapshot_file: 快照文件路径
+        is_folded: 函数，传入封存日志的记录列表，返回快照是否已经包含它们
+                   （压缩完成但还没删掉封存文件时为真）
+    """
+    snapshot_file = Path(snapshot_file)
+    sealed = _read_json_lines(snapshot_file.with_suffix(".journal.sealed"))
+    if sealed and is_folded(sealed):
+        sealed = []
+    return sealed + _read_json_lines(snapshot_file.with_suffix(".journal"))
+
+
+def read_records(snapshot_file):
+    """
+    读取完整记录：快照 + 压缩中的日志 + 当前日志
+
+    供 DataManager 和 Streamlit 端共用，只读不写
+    """
+    snapshot_file = Path(snapshot_file)
+
+    records = []
+    if snapshot_file.exists():
+        try:
+            with open(snapshot_file, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        except Exception:
+            records = []
+
+    return records + read_tail(snapshot_file, lambda sealed: records[-len(sealed):] == sealed)
+
+
+class RecordJournal:
+    """
+    追加写记录日志
+
+    game_records.json          快照（JSON数组，格式与旧版一致）
+    game_records.journal       追加日志，每行一条记录
+    game_records.journal.sealed 压缩过程中被封存的旧日志
+    """
+
+    def __init__(self, snapshot_file, compact_threshold=200, on_snapshot=None):
+        """
+        Args:
+            snapshot_file: 快照文件路径
+            compact_threshold: 日志达到多少条时建议压缩
+            on_snapshot: 快照写入后、删除封存日志前调用，参数为快照记录列表
+        """
+        self.snapshot_file = Path(snapshot_file)
+        self.journal_file = self.snapshot_file.with_suffix(".journal")
+        self.sealed_file = self.snapshot_file.with_suffix(".journal.sealed")
+        self.compact_threshold = compact_threshold
+        self.on_snapshot = on_snapshot
+
+        self.pending = 0  # 日志中尚未压缩的记录数
+        self._lock = threading.Lock()
+        self._compact_thread = None
+
+    def load(self):
+        """加载全部记录，并统计日志中待压缩的条数"""
+        records = read_records(self.snapshot_file)
+        self.pending = len(_read_json_lines(self.journal_file))
+        if self.sealed_file.exists():
+            # 上次压缩中途退出，先补完这次压缩
+            self.compact(records)
+        return records
+
+    def append(self, record):
+        """追加一条记录，开销与历史记录数无关"""
+        self.append_many([record])
+
+    def append_many(self, records, durable=False):
+        """
+        一次追加多条记录
+
+        durable: 写完后 fsync，保证落盘（后写队列组提交时使用）
+        """
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        with self._lock:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(data)
+                if durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.pending += len(records)
+        bump_generation(self.snapshot_file)
+
+    def compact(self, records, background=False):
+        """
+        把完整记录写成新快照并清空日志
+
+        Args:
+            records: 内存中的完整记录列表（调用方持有的权威数据）
+            background: 是否在后台线程写快照
+        """
+        self.wait()
+
+        with self._lock:
+            snapshot = list(records)
+            self._seal_journal()
+            self.pending = 0
+
+        if background:
+            self._compact_thread = threading.Thread(
+                target=self._write_snapshot, args=(snapshot,), daemon=True
+            )
+            self._compact_thread.start()
+        else:
+            self._write_snapshot(snapshot)
+
+    def wait(self):
+        """等待正在进行的后台压缩完成"""
+        thread = self._compact_thread
+        if thread is not None and thread.is_alive():
+            thread.join()
+        self._compact_thread = None
+
+    def _seal_journal(self):
+        """封存当前日志，之后的新记录写入新的日志文件"""
+        if not self.journal_file.exists():
+            return
+        if self.sealed_file.exists():
+            # 上次压缩未完成，把当前日志接到封存文件后面
+            with open(self.journal_file, 'r', encoding='utf-8') as src, \
+                 open(self.sealed_file, 'a', encoding='utf-8') as dst:
+                dst.write(src.read())
+            os.remove(self.journal_file)
+        else:
+            os.replace(self.journal_file, self.sealed_file)
+
+    def _write_snapshot(self, snapshot):
+        """写入快照（临时文件 + 原子替换），成功后删除封存日志"""
+        try:
+            atomic_write(self.snapshot_file,
+                         lambda f: json.dump(snapshot, f, ensure_ascii=False, indent=2))
+            if self.on_snapshot:
+                self.on_snapshot(snapshot)
+            if self.sealed_file.exists():
+                os.remove(self.sealed_file)
+            bump_generation(self.snapshot_file)
+        except Exception as e:
+            print(f"压缩记录日志失败: {e}")
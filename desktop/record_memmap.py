@@ -0,0 +1,315 @@
+"""
+定长二进制记录文件
+每条记录一个定长结构体，整份文件可以用 numpy.memmap 打开：打开时只读文件头，
+按列切片直接映射到文件页，不解析，内存占用只与实际访问的页有关；
+字符串（地图、模式、刷新点、物品名）收进各分区的字符串表，记录中只存编号，
+物品组合也驻留成"物品组"，记录中只存物品组编号
+
+记录按月分区（见 partition_index），每个分区一个数据文件，文件名带内容摘要：
+内容没变的分区（过去的月份）沿用原文件，不重写，读取方按文件名缓存；
+按日期范围读取时只映射与范围相交的分区
+
+    game_records.memmap.json                文件头：格式版本、对应 JSON 快照的 (大小, 修改时间)、条数、
+                                            最后若干条记录的时间字符串，以及各分区的数据文件名、条数、
+                                            时间范围、字符串表和物品组（物品名编号列表）
+    game_records.<分区>.<摘要>.rec.npy      分区内的记录（结构体数组，字段见 record_dtype，保持原顺序）
+
+字段：
+    ts          int64    时间戳（墙钟秒数，见 timestamps.parse_datetimes；缺失为 NAT）
+    map/mode/zone  int32 字符串表编号
+    items       int32    物品组编号
+    profit      int64
+    duration    float64  对局时长（秒），未记录为 NaN
+    survived    bool
+    datetime    bytes    原始时间字符串（UTF-8，定长，宽度按分区内最长的值）
+
+Windows 上正被映射的文件不能替换也不能删除：数据文件只写到新的文件名
+（先写临时文件再改名，目标文件名不存在），最后原子替换文件头；
+读取方仍映射着的旧数据文件保持不变，之后写出时再清理
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from partition_index import UNKNOWN_PARTITION, overlapping
+from publish import atomic_write
+from record_fields import parse_survived
+from timestamps import NAT, parse_datetimes
+
+
+FORMAT_VERSION = 2
+STRING_FIELDS = ["map", "mode", "zone"]
+DEFAULTS = {"map": "未知", "mode": "未知", "zone": ""}
+WRITE_CHUNK = 100_000  # 分块写入，写 500 万条时内存只与块大小有关
+TAIL_TIMES = 1000  # 文件头保留最后多少条记录的时间字符串（与封存日志比对，见 record_journal.read_tail）
+
+
+def record_dtype(datetime_width):
+    """记录的结构体类型（datetime 字段的宽度随数据而定）"""
+    return np.dtype([
+        ("ts", "<i8"),
+        ("map", "<i4"),
+        ("mode", "<i4"),
+        ("zone", "<i4"),
+        ("items", "<i4"),
+        ("profit", "<i8"),
+        ("duration", "<f8"),
+        ("survived", "?"),
+        ("datetime", f"S{max(datetime_width, 1)}"),
+    ])
+
+
+def header_file_for(base_file):
+    """数据文件（如 game_records.json）对应的文件头"""
+    return Path(base_file).with_suffix(".memmap.json")
+
+
+def _data_files(base_file):
+    """目录中已有的记录数据文件"""
+    base_file = Path(base_file)
+    return base_file.parent.glob(f"{base_file.stem}.*.rec.npy")
+
+
+def _item_names(items):
+    """记录中的物品：列表（字典或字符串）或 "; " 连接的字符串"""
+    if isinstance(items, list):
+        return tuple(i.get("name", str(i)) if isinstance(i, dict) else str(i) for i in items)
+    if not items:
+        return ()
+    return tuple(name.strip() for name in str(items).split(";") if name.strip())
+
+
+def _duration(value):
+    """对局时长（秒），未记录或无法解析时为 NaN"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class _StringTable:
+    """驻留表：值 -> 编号"""
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def intern(self, value):
+        index = self.ids.get(value)
+        if index is None:
+            index = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+def _source_stat(source_file):
+    stat = Path(source_file).stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _write_partition(base_file, name, records, datetimes, ts):
+    """
+    写出一个分区的数据文件，返回文件头中该分区的条目
+
+    文件名取内容摘要：同名文件已存在说明分区内容没变，直接沿用
+    """
+    dtype = record_dtype(max(map(len, datetimes), default=1))
+    tables = {field: _StringTable() for field in STRING_FIELDS + ["item", "item_set"]}
+    digest = hashlib.blake2b(digest_size=12)
+
+    tmp_file = base_file.with_name(f"{base_file.stem}.{name}.{os.getpid()}.rec.tmp")
+    try:
+        out = np.lib.format.open_memmap(tmp_file, mode="w+", dtype=dtype, shape=(len(records),))
+        for start in range(0, len(records), WRITE_CHUNK):
+            chunk = records[start:start + WRITE_CHUNK]
+            block = np.zeros(len(chunk), dtype=dtype)
+            block["datetime"] = datetimes[start:start + len(chunk)]
+            block["ts"] = ts[start:start + len(chunk)]
+            for field in STRING_FIELDS:
+                intern = tables[field].intern
+                block[field] = [intern(r.get(field) or DEFAULTS[field]) for r in chunk]
+            item, item_set = tables["item"].intern, tables["item_set"].intern
+            block["items"] = [item_set(tuple(item(n) for n in _item_names(r.get("items")))) for r in chunk]
+            block["profit"] = [int(r.get("profit", 0) or 0) for r in chunk]
+            block["duration"] = [_duration(r.get("duration")) for r in chunk]
+            block["survived"] = [parse_survived(r.get("survived")) for r in chunk]
+            out[start:start + len(chunk)] = block
+            digest.update(block.tobytes())
+        out.flush()
+        del out
+
+        entry = {
+            "count": len(records),
+            "min_ts": int(ts[ts != NAT].min()) if (ts != NAT).any() else None,
+            "max_ts": int(ts[ts != NAT].max()) if (ts != NAT).any() else None,
+            "strings": {field: tables[field].values for field in STRING_FIELDS + ["item"]},
+            "item_sets": [list(s) for s in tables["item_set"].values],
+        }
+        digest.update(json.dumps([dtype.descr, entry], ensure_ascii=False).encode("utf-8"))
+        data_file = base_file.with_name(f"{base_file.stem}.{name}.{digest.hexdigest()}.rec.npy")
+        if data_file.exists():
+            os.remove(tmp_file)
+        else:
+            # 目标文件名是新的，Windows 上也不会与读取方冲突
+            os.replace(tmp_file, data_file)
+    except BaseException:
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+        raise
+    entry["file"] = data_file.name
+    return entry
+
+
+def write_record_file(base_file, records, source_file):
+    """
+    写出定长记录文件（内容没变的分区不重写）
+
+    Args:
+        base_file: 数据文件路径，决定文件头和数据文件的文件名
+        records: 记录列表
+        source_file: 对应的 JSON 快照，记录其大小和修改时间用于过期判断
+    """
+    base_file = Path(base_file)
+    datetimes = [str(r.get("datetime", "") or "") for r in records]
+    ts = parse_datetimes(datetimes)
+
+    # 按月分组（时间未知的记为 -1），组内保持原顺序
+    known = ts != NAT
+    months = np.where(known, np.where(known, ts, 0).astype("datetime64[s]").astype("datetime64[M]").astype(np.int64), -1)
+    keys, groups = np.unique(months, return_inverse=True)
+    order = np.argsort(groups, kind="stable")
+    bounds = np.searchsorted(groups[order], np.arange(len(keys) + 1))
+
+    partitions = {}
+    for g, key in enumerate(keys.tolist()):
+        rows = order[bounds[g]:bounds[g + 1]]
+        name = UNKNOWN_PARTITION if key < 0 else str(np.datetime64(key, "M"))
+        partitions[name] = _write_partition(base_file, name, [records[i] for i in rows],
+                                            [datetimes[i].encode("utf-8") for i in rows], ts[rows])
+
+    header = {
+        "version": FORMAT_VERSION,
+        "source": _source_stat(source_file),
+        "count": len(records),
+        "tail": datetimes[-TAIL_TIMES:],
+        "partitions": partitions,
+    }
+    atomic_write(header_file_for(base_file),
+                 lambda f: json.dump(header, f, ensure_ascii=False, separators=(",", ":")))
+
+    # 清理不再使用的数据文件；仍被映射的（Windows 上删除失败）留到下次
+    current = {entry["file"] for entry in partitions.values()}
+    for old in _data_files(base_file):
+        if old.name not in current:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+class MemmapRecords:
+    """
+    一个分区的只读记录
+
+    column(name) 返回映射到文件的列视图（不复制），decode(name) 取出字符串列，
+    categories(name) 为编号对应的字符串（items 为 "; " 连接的物品组），items_of(i) 取出第 i 条记录的物品名
+    """
+
+    def __init__(self, records, strings, item_sets):
+        self.records = records
+        self.strings = {name: np.array(values, dtype=object) for name, values in strings.items()}
+        self.item_sets = item_sets
+
+    def __len__(self):
+        return len(self.records)
+
+    def column(self, name):
+        """一列的只读视图（map/mode/zone 为字符串表编号，items 为物品组编号）"""
+        return self.records[name]
+
+    def categories(self, name):
+        """编号列的取值表"""
+        if name == "items":
+            names = self.strings["item"]
+            return np.array(["; ".join(names[s]) for s in self.item_sets], dtype=object)
+        return self.strings[name]
+
+    def decode(self, name, rows=None):
+        """字符串列的值；rows 为切片或下标数组时只解码这些记录"""
+        codes = self.records[name] if rows is None else self.records[name][rows]
+        return self.categories(name)[codes]
+
+    def items_of(self, i):
+        """第 i 条记录的物品名列表"""
+        return list(self.strings["item"][self.item_sets[int(self.records["items"][i])]])
+
+
+class RecordFile:
+    """
+    定长记录文件的文件头：按日期范围列出分区，open() 映射单个分区
+
+    tail 为最后若干条记录的时间字符串（按原顺序）
+    """
+
+    def __init__(self, base_file, header):
+        self.base_file = Path(base_file)
+        self.header = header
+        self.tail = header["tail"]
+
+    def __len__(self):
+        return self.header["count"]
+
+    def partitions(self, ts_from=None, ts_to=None):
+        """与时间范围相交的分区名（按时间顺序，不限范围时时间未知的分区在最后）"""
+        ranges = {name: (entry["min_ts"], entry["max_ts"])
+                  for name, entry in self.header["partitions"].items()}
+        return overlapping(ranges, ts_from, ts_to)
+
+    def file_of(self, name):
+        """分区的数据文件名（内容不变时文件名不变，可作缓存键）"""
+        return self.header["partitions"][name]["file"]
+
+    def open(self, name):
+        """
+        用 memmap 打开一个分区
+
+        Raises:
+            OSError: 数据文件已被清理（文件头在读取期间被替换）或不完整
+        """
+        entry = self.header["partitions"][name]
+        try:
+            records = np.load(self.base_file.with_name(entry["file"]), mmap_mode="r")
+        except ValueError as e:
+            raise OSError(f"定长记录文件损坏: {entry['file']}") from e
+        if records.dtype.names != record_dtype(1).names or len(records) != entry["count"]:
+            raise OSError(f"定长记录文件不完整: {entry['file']}")
+        return MemmapRecords(records, entry["strings"], entry["item_sets"])
+
+
+def open_record_file(base_file, source_file=None):
+    """
+    读取定长记录文件的文件头
+
+    Args:
+        base_file: 数据文件路径
+        source_file: 对应的 JSON 快照；指定时检查记录文件是否过期
+
+    Returns:
+        RecordFile；文件不存在、版本不符或已过期时返回 None
+    """
+    try:
+        with open(header_file_for(base_file), 'r', encoding='utf-8') as f:
+            header = json.load(f)
+        if header.get("version") != FORMAT_VERSION:
+            return None
+        if source_file is not None and header.get("source") != _source_stat(source_file):
+            return None
+    except (OSError, ValueError):
+        return None
+    return RecordFile(base_file, header)
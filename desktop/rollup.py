@@ -0,0 +1,137 @@
+"""
+历史记录汇总模块
+超过保留期的原始记录折叠成 日 × 地图 × 模式 × 是否撤离 的汇总行，
+保存在 game_records_rollup.json，记录数再多内存和加载时间也只与保留期内的记录有关
+
+汇总行：
+    day, map, mode, survived    分组键（day 为 "YYYY-MM-DD"）
+    count                       局数
+    profit_sum, profit_sq       收益合计、收益平方和（用于方差）
+    profit_min, profit_max      最低/最高收益
+"""
+
+import copy
+import json
+import os
+from datetime import date, timedelta
+from pathlib import Path
+
+from record_fields import parse_survived
+from timestamps import day_text, to_timestamp
+
+
+ROLLUP_KEYS = ("day", "map", "mode", "survived")
+
+
+def day_of(record):
+    """记录所在的日期（"YYYY-MM-DD"），时间无法解析时返回 None"""
+    ts = to_timestamp(record.get("datetime"))
+    if ts is None:
+        return None
+    return day_text(ts)
+
+
+def read_rollup(path):
+    """读取汇总文件，返回汇总行列表（文件不存在时为空）"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("rows", [])
+    except (OSError, ValueError):
+        return []
+
+
+class RecordRollup:
+    """
+    历史汇总
+
+    fold() 把保留期之前的原始记录并入汇总行（只改内存），返回剩下的原始记录；
+    调用方先用 save(pending=True) 写出汇总文件再删除原始记录，pending 标记表示
+    原始记录还没删掉，启动时据此补完（见 DataManager）
+    """
+
+    def __init__(self, rollup_file, retention_days=90):
+        self.rollup_file = Path(rollup_file)
+        self.retention_days = retention_days
+
+        self.rows = []
+        self.cutoff = None  # 已折叠到哪一天（不含）
+        self.pending = False
+        try:
+            with open(self.rollup_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.rows = data.get("rows", [])
+            self.cutoff = data.get("cutoff")
+            self.pending = data.get("pending", False)
+        except (OSError, ValueError):
+            pass
+
+    def snapshot(self):
+        """当前汇总状态的副本（后台写出、备份用）"""
+        return {"cutoff": self.cutoff, "rows": copy.deepcopy(self.rows)}
+
+    def replace(self, snapshot=None):
+        """换成另一份汇总状态（还原备份），None 表示清空"""
+        snapshot = snapshot or {}
+        self.rows = copy.deepcopy(snapshot.get("rows", []))
+        self.cutoff = snapshot.get("cutoff")
+
+    def total_games(self):
+        """汇总行中的总局数"""
+        return sum(row["count"] for row in self.rows)
+
+    def is_folded(self, record):
+        """记录是否早于已折叠的日期"""
+        day = day_of(record)
+        return self.cutoff is not None and day is not None and day < self.cutoff
+
+    def fold(self, records, today=None):
+        """
+        折叠保留期之前的记录
+
+        Args:
+            records: 全部原始记录
+            today: 当前日期（测试用），默认今天
+
+        Returns:
+            (剩下的原始记录, 折叠的记录数)
+        """
+        today = today or date.today()
+        cutoff = (today - timedelta(days=self.retention_days)).isoformat()
+
+        groups = {tuple(row[k] for k in ROLLUP_KEYS): row for row in self.rows}
+        kept = []
+        folded = 0
+        for record in records:
+            day = day_of(record)
+            if day is None or day >= cutoff:
+                kept.append(record)
+                continue
+
+            key = (day, record.get("map") or "未知", record.get("mode") or "未知",
+                   parse_survived(record.get("survived")))
+            profit = int(record.get("profit", 0) or 0)
+            row = groups.get(key)
+            if row is None:
+                row = groups[key] = dict(zip(ROLLUP_KEYS, key), count=0, profit_sum=0, profit_sq=0,
+                                         profit_min=profit, profit_max=profit)
+            row["count"] += 1
+            row["profit_sum"] += profit
+            row["profit_sq"] += profit * profit
+            row["profit_min"] = min(row["profit_min"], profit)
+            row["profit_max"] = max(row["profit_max"], profit)
+            folded += 1
+
+        if folded:
+            self.rows = sorted(groups.values(), key=lambda r: tuple(r[k] for k in ROLLUP_KEYS))
+            self.cutoff = max(cutoff, self.cutoff or cutoff)
+        return kept, folded
+
+    def save(self, pending=False, snapshot=None):
+        """写出汇总文件（临时文件 + 原子替换），snapshot 默认为当前状态"""
+        self.pending = pending
+        snapshot = snapshot or {"cutoff": self.cutoff, "rows": self.rows}
+        tmp_file = self.rollup_file.with_suffix(".json.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"cutoff": snapshot["cutoff"], "pending": pending, "rows": snapshot["rows"]},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_file, self.rollup_file)
@@ -0,0 +1,150 @@
+"""
+SQLite记录存储模块
+可选的记录后端：筛选条件直接下推到带索引的SQL查询，
+不需要把全部历史记录读进内存
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+# 时间戳规则与列式快照、网页端共用；to_timestamp 仍从本模块导出
+from timestamps import to_timestamp  # noqa: F401
+
+
+class SQLiteRecordStore:
+    """SQLite记录存储（WAL模式）"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            datetime TEXT,
+            ts INTEGER,
+            map TEXT,
+            mode TEXT,
+            zone TEXT,
+            profit INTEGER,
+            survived INTEGER,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_records_map ON records(map);
+        CREATE INDEX IF NOT EXISTS idx_records_mode ON records(mode);
+        CREATE INDEX IF NOT EXISTS idx_records_survived ON records(survived);
+        CREATE INDEX IF NOT EXISTS idx_records_ts ON records(ts);
+        CREATE INDEX IF NOT EXISTS idx_records_map_mode_ts ON records(map, mode, ts);
+    """
+
+    def __init__(self, db_file):
+        self.db_file = Path(db_file)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self._migrate()
+        self.conn.commit()
+
+    # ts 列的格式版本：1 = 墙钟秒数（timestamps.to_timestamp），此前按本机时区换算
+    TS_VERSION = 1
+
+    def _migrate(self):
+        """旧库的 ts 列按当前规则重新计算"""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= self.TS_VERSION:
+            return
+        rows = self.conn.execute("SELECT id, datetime FROM records").fetchall()
+        self.conn.executemany("UPDATE records SET ts = ? WHERE id = ?",
+                              [(to_timestamp(text), row_id) for row_id, text in rows])
+        self.conn.execute(f"PRAGMA user_version = {self.TS_VERSION}")
+
+    @staticmethod
+    def _row(record):
+        """记录转换为表中的一行"""
+        return (
+            record.get("datetime", ""),
+            to_timestamp(record.get("datetime")),
+            record.get("map", ""),
+            record.get("mode", ""),
+            record.get("zone", ""),
+            int(record.get("profit", 0) or 0),
+            1 if record.get("survived") else 0,
+            json.dumps(record, ensure_ascii=False),
+        )
+
+    def add(self, record):
+        """添加一条记录"""
+        self.add_many([record])
+
+    def add_many(self, records):
+        """批量添加记录（单个事务）"""
+        with self._lock:
+            self.conn.executemany(
+                "INSERT INTO records (datetime, ts, map, mode, zone, profit, survived, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._row(r) for r in records]
+            )
+            self.conn.commit()
+
+    def count(self):
+        """记录总数"""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def clear(self):
+        """清空记录"""
+        with self._lock:
+            self.conn.execute("DELETE FROM records")
+            self.conn.commit()
+
+    def rebuild(self, records):
+        """用完整记录列表重建表"""
+        with self._lock:
+            self.conn.execute("DELETE FROM records")
+        self.add_many(records)
+
+    def query(self, filters=None):
+        """
+        按条件查询记录，筛选在SQL中完成
+
+        Args:
+            filters: 同 DataManager.get_records
+        """
+        where, params = [], []
+        filters = filters or {}
+
+        if filters.get("map"):
+            where.append("map = ?")
+            params.append(filters["map"])
+
+        if filters.get("mode"):
+            where.append("mode = ?")
+            params.append(filters["mode"])
+
+        if filters.get("survived") is not None:
+            where.append("survived = ?")
+            params.append(1 if filters["survived"] else 0)
+
+        ts_from = to_timestamp(filters.get("date_from"))
+        if ts_from is not None:
+            where.append("ts >= ?")
+            params.append(ts_from)
+
+        ts_to = to_timestamp(filters.get("date_to"), end_of_day=True)
+        if ts_to is not None:
+            where.append("ts <= ?")
+            params.append(ts_to)
+
+        sql = "SELECT data FROM records"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id"
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self.conn.close()
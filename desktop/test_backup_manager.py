@@ -0,0 +1,98 @@
+"""
+增量备份与还原的测试（pytest）
+"""
+
+import gzip
+import json
+
+from backup_manager import BackupManager
+from data_manager import DataManager
+
+
+def make_records(count, start=0):
+    return [{"datetime": f"2025-06-{1 + (i % 28):02d}T12:{i % 60:02d}:00", "map": "零号大坝", "mode": "机密",
+             "zone": "", "items": [], "profit": i * 1000, "survived": i % 2 == 0}
+            for i in range(start, start + count)]
+
+
+def test_delta_only_contains_new_records(tmp_path):
+    backups = BackupManager(tmp_path)
+    records = make_records(5)
+    base = backups.backup(records, {"total_games": 5})
+    records += make_records(3, start=5)
+    delta = backups.backup(records, {"total_games": 8})
+
+    assert base.name.startswith("base_") and delta.name.startswith("delta_")
+    with gzip.open(delta, 'rt', encoding='utf-8') as f:
+        data = json.load(f)
+    assert data["start"] == 5 and len(data["records"]) == 3
+
+    # 没有新记录时不写备份
+    assert backups.backup(records, {"total_games": 8}) is None
+
+
+def test_restore_replays_deltas(tmp_path):
+    backups = BackupManager(tmp_path)
+    records = make_records(4)
+    base = backups.backup(records, {"total_games": 4})
+    records += make_records(2, start=4)
+    first = backups.backup(records, {"total_games": 6})
+    records += make_records(2, start=6)
+    backups.backup(records, {"total_games": 8})
+
+    restored, stats, _ = backups.restore()
+    assert restored == records and stats == {"total_games": 8}
+
+    restored, stats, _ = backups.restore(until=first.name)
+    assert restored == records[:6] and stats == {"total_games": 6}
+
+    restored, _, _ = backups.restore(until=base.name)
+    assert restored == records[:4]
+
+
+def test_changed_history_starts_new_chain(tmp_path):
+    backups = BackupManager(tmp_path)
+    records = make_records(4)
+    backups.backup(records, {})
+    rewritten = make_records(3, start=100)
+    path = backups.backup(rewritten, {})
+
+    assert path.name.startswith("base_")
+    assert backups.restore()[0] == rewritten
+
+
+def test_restore_without_backups(tmp_path):
+    assert BackupManager(tmp_path / "none").restore() == (None, None, None)
+
+
+def test_old_chains_are_pruned(tmp_path):
+    backups = BackupManager(tmp_path, keep_chains=2)
+    for i in range(4):
+        backups.backup(make_records(2, start=i * 10), {}, full=True)
+    assert len(backups.chains()) == 2
+    assert backups.restore()[0] == make_records(2, start=30)
+
+
+def test_data_manager_restores_records_and_rollup(tmp_path):
+    dm = DataManager(tmp_path)
+    dm.add_records(make_records(6))
+    dm.rollups.rows = [{"day": "2020-01-01", "map": "航天基地", "mode": "绝密", "survived": True,
+                        "count": 3, "profit_sum": 300, "profit_sq": 30000, "profit_min": 100, "profit_max": 100}]
+    dm.rollups.cutoff = "2020-01-02"
+    dm.rollups.save()
+    dm.rebuild_stats()
+    assert dm.backup() is not None
+
+    dm.clear_records()
+    assert dm.records == [] and dm.rollups.rows == []
+
+    assert dm.restore_backup()
+    assert len(dm.records) == 6
+    assert dm.rollups.cutoff == "2020-01-02" and dm.rollups.total_games() == 3
+    assert dm.stats["total_games"] == 9
+    dm.close()
+
+    # 还原结果已写盘
+    reopened = DataManager(tmp_path)
+    assert len(reopened.records) == 6 and reopened.rollups.total_games() == 3
+    reopened.close()
@@ -0,0 +1,118 @@
+"""
+内容哈希去重索引的测试（pytest）
+"""
+
+import pandas as pd
+
+from data_manager import DataManager, file_datetime, record_from_row
+from record_schema import normalize_frame, with_timestamps
+from dedupe_index import DedupeIndex, JSON_SOURCE, frame_keys, record_key, record_key_of
+
+
+def test_key_normalizes_time_and_values():
+    assert record_key("2025-06-01T12:30:00", "零号大坝", "机密", 1000, True) == \
+        record_key("2025-06-01 12:30:45", " 零号大坝 ", "机密", "1000.0", "是")
+    assert record_key("2025-06-01T12:30:00", "零号大坝", "机密", 1000, True) != \
+        record_key("2025-06-01T12:31:00", "零号大坝", "机密", 1000, True)
+    # 时间按统一的解析规则规范化
+    assert record_key("2025/6/1 12:30", "零号大坝", "机密", 1000, True) == \
+        record_key("2025-06-01T12:30:00", "零号大坝", "机密", 1000, True)
+    # 地图、模式缺失按 "未知"
+    assert record_key("2025-06-01T12:30", None, "", 0, False) == record_key("2025-06-01T12:30", "未知", "未知", 0, False)
+
+
+def test_missing_survived_hashes_the_same_on_every_path():
+    row = {"datetime": "2025-06-01T12:30:00", "map": "零号大坝", "mode": "机密", "profit": "500", "survived": ""}
+    from_row = record_key_of(record_from_row(row))
+    from_frame = frame_keys(pd.DataFrame([row]))[0]
+    missing = record_key_of({k: v for k, v in row.items() if k != "survived"})
+    normalized = frame_keys(with_timestamps(normalize_frame(pd.DataFrame([row]))))[0]
+    assert from_row == from_frame == missing == normalized
+
+
+def test_claim_rejects_duplicates(tmp_path):
+    index = DedupeIndex(tmp_path)
+    assert index.claim(["a", "b", "a"], JSON_SOURCE) == [True, True, False]
+    assert index.claim(["b", "c"], "upload.csv") == [False, True]
+
+
+def test_accept_keeps_own_records_and_rejects_others(tmp_path):
+    index = DedupeIndex(tmp_path)
+    index.claim(["a"], JSON_SOURCE)
+    assert index.accept(["a", "b"], JSON_SOURCE) == [True, True]
+    assert index.accept(["a", "b", "c"], "export.csv") == [False, False, True]
+
+
+def test_release_lets_another_source_take_over(tmp_path):
+    index = DedupeIndex(tmp_path)
+    index.claim(["a", "b"], "old.csv")
+    index.release("old.csv")
+    assert index.release_count() == 2
+    assert index.accept(["a", "b"], "new.csv") == [True, True]
+
+    index.release_missing({JSON_SOURCE})
+    assert index.claim(["a"], JSON_SOURCE) == [True]
+
+
+def test_index_is_shared_between_instances(tmp_path):
+    writer = DedupeIndex(tmp_path)
+    reader = DedupeIndex(tmp_path)
+    writer.claim(["a"], JSON_SOURCE)
+    # 其他实例（进程）追加的登记在下次查询时读入
+    assert reader.accept(["a"], "export.csv") == [False]
+    assert DedupeIndex(tmp_path).claim(["a"], "x.csv") == [False]
+
+
+def test_data_manager_skips_duplicate_imports(tmp_path):
+    csv_file = tmp_path / "import.csv"
+    csv_file.write_text("日期时间,地图,模式,收益,是否撤离\n"
+                        "2025-06-01 12:30,零号大坝,机密,1000,是\n"
+                        "2025-06-01 12:30,零号大坝,机密,1000,是\n", encoding="utf-8-sig")
+    dm = DataManager(tmp_path / "data")
+    assert dm.import_csv(csv_file)
+    assert dm.import_csv(csv_file)
+    assert len(dm.records) == 1 and dm.stats["total_games"] == 1
+    assert not dm.add_record({"datetime": "2025-06-01T12:30:10", "map": "零号大坝", "mode": "机密",
+                              "profit": 1000, "survived": True})
+    dm.close()
+
+
+def test_reimporting_undated_rows_is_skipped(tmp_path):
+    csv_file = tmp_path / "import.csv"
+    csv_file.write_text("地图,模式,收益,是否撤离\n"
+                        "零号大坝,机密,1000,是\n"
+                        "航天基地,绝密,-300,否\n", encoding="utf-8-sig")
+    dm = DataManager(tmp_path / "data")
+    assert dm.import_csv(csv_file)
+    assert dm.import_csv(csv_file)
+    assert len(dm.records) == 2
+    assert {r["datetime"] for r in dm.records} == {file_datetime(csv_file)}
+    dm.close()
+
+
+def test_compaction_keeps_live_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr("dedupe_index.COMPACT_MIN_DEAD", 4)
+    index = DedupeIndex(tmp_path)
+    reader = DedupeIndex(tmp_path)
+    index.claim(["a", "b", "c"], "old.csv")
+    assert reader.accept(["a"], "old.csv") == [True]
+    for _ in range(3):
+        index.release("old.csv")
+        index.claim(["a", "b", "c"], "old.csv")
+    index.claim(["d"], JSON_SOURCE)
+
+    lines = index.index_file.read_text(encoding="utf-8").splitlines()
+    assert len(lines) < 10
+    assert reader.accept(["a", "d", "e"], "export.csv") == [False, False, True]
+    assert reader.release_count() == 0  # 重写没有改变任何记录的归属
+    assert DedupeIndex(tmp_path).claim(["a", "b", "c", "d", "e"], "x.csv") == [False] * 5
+
+
+def test_add_record_defers_index_write(tmp_path):
+    dm = DataManager(tmp_path, write_behind=True)
+    record = {"datetime": "2025-06-01T12:30:00", "map": "零号大坝", "mode": "机密", "profit": 1000, "survived": True}
+    assert dm.add_record(dict(record))
+    assert not dm.add_record(dict(record))  # 只按内存中的索引判重
+    dm.flush()
+    assert DedupeIndex(tmp_path).claim([record_key_of(record)], "x.csv") == [False]
+    dm.close()
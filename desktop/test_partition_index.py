@@ -0,0 +1,36 @@
+"""
+月分区索引的测试（pytest）
+"""
+
+from data_manager import DataManager
+from partition_index import RecordPartitionIndex, UNKNOWN_PARTITION, overlapping
+from timestamps import to_timestamp
+
+
+def test_overlapping_skips_other_months_and_unknown():
+    ranges = {"2025-04": (to_timestamp("2025-04-02"), to_timestamp("2025-04-28")),
+              "2025-05": (to_timestamp("2025-05-01"), to_timestamp("2025-05-31")),
+              UNKNOWN_PARTITION: (None, None)}
+    assert overlapping(ranges, to_timestamp("2025-04-29"), None) == ["2025-05"]
+    assert overlapping(ranges) == ["2025-04", "2025-05", UNKNOWN_PARTITION]
+
+
+def test_index_follows_appends_and_replacement():
+    records = [{"datetime": "2025-05-03T10:00:00"}, {"datetime": "2025-06-01 00:00"}, {"datetime": "无法解析"}]
+    index = RecordPartitionIndex()
+    june = (to_timestamp("2025-06-01"), to_timestamp("2025-06-30", end_of_day=True))
+    assert index.query(records, *june) == [records[1]]
+
+    records.append({"datetime": "2025-06-15T09:00:00"})
+    assert index.query(records, *june) == [records[1], records[3]]
+    assert len(index.query(records)) == 4
+    assert index.query(records[:1], *june) == []
+
+
+def test_get_records_filters_by_date(tmp_path):
+    dm = DataManager(tmp_path)
+    dm.add_records([{"datetime": d, "map": "零号大坝", "mode": "机密", "profit": 1, "survived": True}
+                    for d in ("2025-05-31T23:59:59", "2025/6/1 0:00", "2025-06-30T12:00:00", "2025-07-01T00:00:00")])
+    june = dm.get_records({"date_from": "2025-06-01", "date_to": "2025-06-30"})
+    assert [r["datetime"] for r in june] == ["2025/6/1 0:00", "2025-06-30T12:00:00"]
+    dm.close()
@@ -0,0 +1,95 @@
+"""
+历史记录汇总的测试（pytest）
+"""
+
+import csv
+from datetime import date, datetime, timedelta
+
+from data_manager import DataManager
+from rollup import RecordRollup
+
+
+def raid(days_ago, profit, survived=True, map_name="零号大坝"):
+    moment = datetime.now() - timedelta(days=days_ago)
+    return {"datetime": moment.isoformat(timespec="seconds"), "map": map_name, "mode": "机密",
+            "zone": "", "items": [], "profit": profit, "survived": survived}
+
+
+def test_fold_groups_old_records_only(tmp_path):
+    rollup = RecordRollup(tmp_path / "rollup.json", retention_days=30)
+    today = date(2025, 6, 30)
+    records = [
+        {"datetime": "2025-05-01T10:00:00", "map": "零号大坝", "mode": "机密", "profit": 100, "survived": True},
+        {"datetime": "2025-05-01T11:00:00", "map": "零号大坝", "mode": "机密", "profit": 300, "survived": True},
+        {"datetime": "2025-05-01T12:00:00", "map": "零号大坝", "mode": "机密", "profit": 0, "survived": ""},
+        {"datetime": "2025-06-29T10:00:00", "map": "零号大坝", "mode": "机密", "profit": 50, "survived": True},
+        {"datetime": "not a time", "map": "零号大坝", "mode": "机密", "profit": 7, "survived": False},
+    ]
+    kept, folded = rollup.fold(records, today=today)
+
+    assert folded == 3
+    assert [r["profit"] for r in kept] == [50, 7]  # 时间未知的记录不折叠
+    assert rollup.total_games() == 3
+    row, = rollup.rows  # 空白的撤离值按撤离计，三局同组
+    assert (row["day"], row["count"], row["profit_sum"], row["profit_min"], row["profit_max"]) == \
+        ("2025-05-01", 3, 400, 0, 300)
+    assert rollup.cutoff == "2025-05-31"
+    assert rollup.is_folded(records[0]) and not rollup.is_folded(records[3])
+
+    # fold 只改内存，写盘由调用方决定
+    assert not (tmp_path / "rollup.json").exists()
+    rollup.save()
+    reloaded = RecordRollup(tmp_path / "rollup.json")
+    assert reloaded.rows == rollup.rows and reloaded.cutoff == rollup.cutoff and not reloaded.pending
+
+
+def test_startup_does_not_fold(tmp_path):
+    dm = DataManager(tmp_path)
+    dm.add_records([raid(400, 100), raid(1, 200)])
+    dm.close()
+
+    reopened = DataManager(tmp_path)
+    assert len(reopened.records) == 2 and reopened.rollups.rows == []
+    reopened.close()
+
+
+def test_rollup_keeps_stats_and_persists(tmp_path):
+    dm = DataManager(tmp_path, write_behind=True)
+    dm.add_records([raid(200, 100), raid(150, 300, survived=False), raid(3, 50)])
+    before = {k: dm.stats[k] for k in ("total_games", "total_profit", "survived_games")}
+
+    assert dm.rollup(90) == 2
+    assert len(dm.records) == 1
+    dm.close()
+
+    reopened = DataManager(tmp_path)
+    assert len(reopened.records) == 1 and reopened.rollups.total_games() == 2
+    assert {k: reopened.stats[k] for k in before} == before
+    reopened.close()
+
+
+def test_folding_everything_truncates_csv_export(tmp_path):
+    dm = DataManager(tmp_path)
+    dm.add_records([raid(200, 100), raid(300, 200)])
+    assert dm.rollup(90) == 2
+    dm.close()
+
+    with open(tmp_path / "game_records_export.csv", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows == [DataManager.CSV_FIELDS]
+
+
+def test_pending_rollup_is_completed_on_startup(tmp_path):
+    dm = DataManager(tmp_path)
+    dm.add_records([raid(200, 100), raid(2, 50)])
+    dm.save_data()
+    # 模拟汇总文件已写出、原始记录还没删除时退出
+    dm.rollups.fold(dm.records)
+    dm.rollups.save(pending=True)
+    dm.close()
+
+    reopened = DataManager(tmp_path)
+    assert len(reopened.records) == 1 and reopened.rollups.total_games() == 1
+    assert not reopened.rollups.pending
+    assert reopened.stats["total_games"] == 2
+    reopened.close()
@@ -0,0 +1,38 @@
+"""
+时间解析规则的测试（pytest）：列式快照、SQLite 存储和网页端导入得到相同的时间戳
+"""
+
+from datetime import date
+
+import pandas as pd
+
+from columnar_snapshot import records_to_columns
+from sqlite_store import SQLiteRecordStore
+from timestamps import NAT, parse_datetimes, to_timestamp
+
+VALUES = ["2025/12/9 20:47", "2025-12-09T20:47:00", "2025-12-09 20:47", "2025-12-09T20:47:00+08:00"]
+
+
+def test_every_path_agrees():
+    expected = 1765313220
+    assert list(parse_datetimes(VALUES)) == [expected] * len(VALUES)
+    assert list(records_to_columns([{"datetime": v} for v in VALUES])["ts"]) == [expected] * len(VALUES)
+    assert [to_timestamp(v) for v in VALUES] == [expected] * len(VALUES)
+
+
+def test_missing_and_invalid():
+    assert list(parse_datetimes(["", None, "无法解析"])) == [NAT] * 3
+    assert to_timestamp("") is None and to_timestamp("无法解析") is None
+
+
+def test_end_of_day():
+    assert to_timestamp("2025-12-09", end_of_day=True) == to_timestamp(date(2025, 12, 9), end_of_day=True) \
+        == to_timestamp("2025-12-10") - 1
+
+
+def test_sqlite_filters_non_iso_dates(tmp_path):
+    store = SQLiteRecordStore(tmp_path / "records.db")
+    store.add_many([{"datetime": v, "map": "零号大坝", "profit": 1} for v in VALUES])
+    assert len(store.query({"date_from": "2025-12-09", "date_to": "2025-12-09"})) == len(VALUES)
+    assert store.query({"date_from": pd.Timestamp("2025-12-10").date()}) == []
+    store.close()
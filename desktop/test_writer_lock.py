@@ -0,0 +1,35 @@
+"""
+数据目录写入锁的测试（pytest）：同一数据目录同时只能有一个 DataManager
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+from data_manager import DataManager
+from writer_lock import DataDirLocked
+
+# 批量导入工具在仓库根目录
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import bulk_import  # noqa: E402
+
+
+def test_second_writer_is_refused(tmp_path):
+    dm = DataManager(tmp_path, write_behind=True)
+    with pytest.raises(DataDirLocked):
+        DataManager(tmp_path)
+    dm.close()
+
+    reopened = DataManager(tmp_path)  # 关闭后锁已释放
+    reopened.close()
+
+
+def test_bulk_import_refuses_while_client_runs(tmp_path):
+    csv_file = tmp_path / "import.csv"
+    csv_file.write_text("日期时间,地图,模式,收益,是否撤离\n2025-06-01 12:30,零号大坝,机密,1000,是\n",
+                        encoding="utf-8-sig")
+    client = DataManager(tmp_path / "data", write_behind=True)
+    assert bulk_import.main([str(csv_file), "--data-dir", str(tmp_path / "data")]) == 1
+    assert client.record_count() == 0
+    client.close()
@@ -0,0 +1,158 @@
+"""
+时间解析模块
+网页端（record_schema）、列式快照、SQLite 存储、每日汇总和日期筛选共用的时间解析规则，
+同一个时间字符串无论经哪条途径读入都得到相同的时间戳
+
+时间戳为"墙钟秒数"：把本地时间当作 UTC 计算的 1970-01-01 起的秒数（即 datetime64[s] 的整数形式），
+带时区的值取其墙钟时间；缺失或无法解析为 NAT（批量）或 None（单个值，见 to_timestamp）
+"""
+
+import re
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+
+NAT = np.iinfo(np.int64).min  # 缺失时间（datetime64 的 NaT 的整数形式）
+
+# 已知的时间格式：桌面客户端的 ISO 格式、手动录入的 "YYYY-MM-DD HH:MM"、Excel 另存的 "YYYY/M/D H:MM"
+DATETIME_FORMATS = [
+    (re.compile(pattern), fmt) for pattern, fmt in [
+        (r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}", "%Y-%m-%dT%H:%M:%S"),
+        (r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{1,6}", "%Y-%m-%dT%H:%M:%S.%f"),
+        (r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}", "%Y-%m-%dT%H:%M"),
+        (r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}", "%Y-%m-%d %H:%M:%S"),
+        (r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{1,6}", "%Y-%m-%d %H:%M:%S.%f"),
+        (r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}", "%Y-%m-%d %H:%M"),
+        (r"\d{4}-\d{2}-\d{2}", "%Y-%m-%d"),
+        (r"\d{4}/\d{1,2}/\d{1,2} \d{1,2}:\d{2}:\d{2}", "%Y/%m/%d %H:%M:%S"),
+        (r"\d{4}/\d{1,2}/\d{1,2} \d{1,2}:\d{2}", "%Y/%m/%d %H:%M"),
+        (r"\d{4}/\d{1,2}/\d{1,2}", "%Y/%m/%d"),
+    ]
+]
+
+
+def sniff_datetime_format(value):
+    """识别时间字符串的格式（strptime 格式串），不是已知格式时返回 None"""
+    for pattern, fmt in DATETIME_FORMATS:
+        if pattern.fullmatch(value):
+            return fmt
+    return None
+
+
+def _to_seconds(parsed):
+    """to_datetime 的结果转换为秒级整数，带时区的值取其墙钟时间"""
+    if parsed.dt.tz is not None:
+        parsed = parsed.dt.tz_localize(None)
+    return parsed.to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+
+def _parse_one(value):
+    try:
+        parsed = pd.Timestamp(value)
+    except (ValueError, TypeError):
+        return NAT
+    if parsed is pd.NaT:
+        return NAT
+    if parsed.tz is not None:
+        parsed = parsed.tz_localize(None)
+    return int(parsed.to_datetime64().astype("datetime64[s]").astype(np.int64))
+
+
+def _parse_mixed(text):
+    """逐值推断格式；混有不同时区等无法整体转换时逐个解析"""
+    try:
+        return _to_seconds(pd.to_datetime(text, format="mixed", errors="coerce"))
+    except (ValueError, TypeError):
+        return np.array([_parse_one(v) for v in text], dtype=np.int64)
+
+
+def parse_datetimes(values):
+    """
+    时间字符串批量转换为秒级时间戳（本地墙钟时间，缺失或无法解析为 NAT）
+
+    按字符串长度分组，每组用第一个值识别格式后按固定格式整组解析；
+    格式不认识或与识别结果不符的值，最后再统一用 format="mixed" 推断
+    """
+    text = pd.Series(values, dtype=object).reset_index(drop=True)
+    result = np.full(len(text), NAT, dtype=np.int64)
+
+    # 不是字符串的值（Timestamp 等）长度记为 -1，交给最后的逐值推断；空字符串和缺失值为 NAT
+    lengths = np.fromiter((len(v) if isinstance(v, str) else -1 for v in text.to_numpy()),
+                          dtype=np.int64, count=len(text))
+    pending = (lengths < 0) & text.notna().to_numpy()
+
+    lengths, groups = np.unique(lengths, return_inverse=True)
+    order = np.argsort(groups, kind="stable")
+    bounds = np.searchsorted(groups[order], np.arange(len(lengths) + 1))
+    for g, length in enumerate(lengths):
+        rows = order[bounds[g]:bounds[g + 1]]
+        if length <= 0:
+            continue
+        fmt = sniff_datetime_format(text.iat[rows[0]])
+        if fmt is None:
+            pending[rows] = True
+            continue
+        parsed = _to_seconds(pd.to_datetime(text.iloc[rows], format=fmt, errors="coerce"))
+        result[rows] = parsed
+        pending[rows[parsed == NAT]] = True
+
+    if pending.any():
+        result[pending] = _parse_mixed(text[pending])
+    return result
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def wall_seconds(moment):
+    """datetime 转换为墙钟秒数（忽略时区）"""
+    return (moment.replace(tzinfo=None) - EPOCH) // timedelta(seconds=1)
+
+
+def parse_one(value):
+    """单个时间字符串转换为墙钟秒数，规则同 parse_datetimes（先按已知格式，再交给 pandas 推断）"""
+    if isinstance(value, str):
+        fmt = sniff_datetime_format(value)
+        if fmt is not None:
+            try:
+                return wall_seconds(datetime.strptime(value, fmt))
+            except ValueError:
+                pass
+    return _parse_one(value)
+
+
+def to_timestamp(value, end_of_day=False):
+    """
+    把日期/时间转换为墙钟秒数，无法解析时返回 None
+
+    支持 datetime、date、时间字符串（与 parse_datetimes 相同的格式）和已是秒数的整数
+    end_of_day: 只给了日期时取当天最后一秒（用于 date_to）
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        return wall_seconds(value)
+    if isinstance(value, date):
+        return wall_seconds(datetime.combine(value, time.max if end_of_day else time.min))
+
+    text = str(value).strip()
+    seconds = parse_one(text)
+    if seconds == NAT:
+        return None
+    if end_of_day and len(text) <= 10:
+        seconds = seconds // 86400 * 86400 + 86399
+    return seconds
+
+
+def day_text(seconds):
+    """墙钟秒数所在的日期（"YYYY-MM-DD"）"""
+    return str(np.datetime64(seconds // 86400, "D"))
+
+
+def month_text(seconds):
+    """墙钟秒数所在的月份（"YYYY-MM"）"""
+    return str(np.datetime64(seconds // 86400, "D").astype("datetime64[M]"))
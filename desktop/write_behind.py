@@ -0,0 +1,99 @@
+"""
+后写持久化模块
+GUI 线程只把写操作放进队列，后台线程每隔 N 毫秒或攒够 M 个事件后
+把它们合并成一次写入（组提交），避免磁盘 I/O 卡住 Qt 事件循环
+"""
+
+import threading
+import time
+
+
+class WriteBehindQueue:
+    """
+    后写队列
+
+    用 register() 注册写入通道：
+        普通通道：按入队顺序，把连续的同名事件合并成一个列表交给处理函数
+        合并通道（coalesce=True）：只保留最新的值，每批写一次
+    """
+
+    def __init__(self, flush_interval_ms=500, max_batch=50):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+
+        self._handlers = {}  # 通道名 -> (处理函数, 是否合并)
+        self._queue = []  # [(通道名, 值)]
+        self._latest = {}  # 合并通道的最新值
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()  # 保证同一时间只有一个线程在写盘
+        self._running = True
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def register(self, name, handler, coalesce=False):
+        """注册写入通道"""
+        self._handlers[name] = (handler, coalesce)
+
+    def put(self, name, value):
+        """入队一个写操作，立即返回"""
+        with self._cond:
+            if self._handlers[name][1]:
+                self._latest[name] = value
+            else:
+                self._queue.append((name, value))
+            if len(self._queue) >= self.max_batch:
+                self._cond.notify()
+
+    def flush(self):
+        """在当前线程立即写出所有待写数据（退出或批量操作前调用）"""
+        self._write_batch()
+
+    def close(self):
+        """写出剩余数据并停止后台线程"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join()
+        self._write_batch()
+
+    def _run(self):
+        """后台刷新循环"""
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while self._running and len(self._queue) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not self._running:
+                    return
+            self._write_batch()
+
+    def _write_batch(self):
+        """取出当前所有待写数据并按通道合并写入"""
+        with self._io_lock:
+            with self._cond:
+                queue, self._queue = self._queue, []
+                latest, self._latest = self._latest, {}
+            if not queue and not latest:
+                return
+
+            # 连续的同名事件合并为一次调用，保持通道之间的先后顺序
+            start = 0
+            for i in range(1, len(queue) + 1):
+                if i == len(queue) or queue[i][0] != queue[start][0]:
+                    name = queue[start][0]
+                    self._call(name, [value for _, value in queue[start:i]])
+                    start = i
+
+            for name, value in latest.items():
+                self._call(name, value)
+
+    def _call(self, name, value):
+        """调用通道处理函数，出错只打印不中断后续写入"""
+        try:
+            self._handlers[name][0](value)
+        except Exception as e:
+            print(f"后台写入 {name} 失败: {e}")
@@ -0,0 +1,58 @@
+"""
+数据目录的写入锁
+桌面客户端、批量导入和数据修复工具都直接写快照、日志和去重索引，同一时间只能有一个写入方：
+DataManager 创建时取得 game_records.lock 的排他锁，close() 时释放，另一个写入方创建 DataManager 时失败；
+锁由操作系统持有，进程异常退出后自动释放，不会留下需要手工删除的锁文件
+
+Streamlit 端只读，不取锁
+"""
+
+from pathlib import Path
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+    import fcntl
+
+
+LOCK_FILE_NAME = "game_records.lock"
+
+
+class DataDirLocked(RuntimeError):
+    """数据目录正被其他写入方（通常是运行中的桌面客户端）使用"""
+
+
+class WriterLock:
+    """数据目录的排他锁（非阻塞，取不到时抛出 DataDirLocked）"""
+
+    def __init__(self, data_dir):
+        self.path = Path(data_dir) / LOCK_FILE_NAME
+        self._file = None
+
+    def acquire(self):
+        f = open(self.path, 'a+')
+        try:
+            if msvcrt:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            raise DataDirLocked(f"数据目录正被其他程序写入（桌面客户端是否在运行？）: {self.path.parent}")
+        self._file = f
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if msvcrt:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass
+        self._file.close()
+        self._file = None
@@ -14,6 +14,12 @@ from datetime import datetime
 from pathlib import Path
 import pandas as pd
 import json
+import sys
+
+# 与桌面客户端共用的去重索引
+sys.path.insert(0, str(Path(__file__).parent / "desktop"))
+from dedupe_index import DedupeIndex, record_key_of  # type: ignore
+from publish import bump_generation  # type: ignore
 
 # 尝试导入OCR
 try:
@@ -42,6 +48,7 @@ class GameMonitor:
         self.save_dir = self.data_dir / 'game_records'
         self.save_dir.mkdir(exist_ok=True)
         self.data_file = self.data_dir / 'game_events.csv'
+        self.dedupe = DedupeIndex(self.data_dir)
         
         self.is_running = False
         self.monitor_thread = None
@@ -445,12 +452,16 @@ class GameMonitor:
             "survived": survived
         }
         
-        # 保存到主记录文件
+        # 保存到主记录文件（同一局已由其他途径记录过时跳过）
         csv_file = self.data_dir / "game_records_export.csv"
+        if not self.dedupe.claim([record_key_of(record)], csv_file.name)[0]:
+            print(f"⚠️ 对局记录已存在，跳过: {record['datetime']} {record['map']}")
+            return
         df = pd.DataFrame([record])
         
         hdr = not csv_file.exists()
         df.to_csv(csv_file, mode='a', header=hdr, index=False)
+        bump_generation(self.data_dir / "game_records.json")
         
         print(f"✅ 对局记录已保存: {record['map']} - {'存活' if survived else '阵亡'} - 收益:{total_profit:,}")
 
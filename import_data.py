@@ -83,21 +83,10 @@ def main():
     
     elif choice == "3":
         print("\n🔄 正在重新计算统计数据...")
-        # 重置统计
-        data_manager.stats = {
-            "total_games": 0,
-            "total_profit": 0,
-            "survived_games": 0,
-            "last_update": None
-        }
-        # 重新计算
-        for record in data_manager.records:
-            data_manager.stats["total_games"] += 1
-            if record.get("survived", False):
-                data_manager.stats["survived_games"] += 1
-                data_manager.stats["total_profit"] += record.get("profit", 0)
-        
-        data_manager.save_data()
+        consistent = data_manager.rebuild_stats()
+        data_manager.save_stats()
+        if not consistent:
+            print("⚠️ 原统计数据与记录不一致，已按记录重建")
         print(f"✅ 统计数据已更新:")
         print(f"   总局数: {data_manager.stats['total_games']}")
         print(f"   存活局数: {data_manager.stats['survived_games']}")
@@ -116,18 +105,7 @@ def main():
         
         # 3. 重新计算统计
         print("  3/3 重新计算统计...")
-        data_manager.stats = {
-            "total_games": 0,
-            "total_profit": 0,
-            "survived_games": 0,
-            "last_update": None
-        }
-        for record in data_manager.records:
-            data_manager.stats["total_games"] += 1
-            if record.get("survived", False):
-                data_manager.stats["survived_games"] += 1
-                data_manager.stats["total_profit"] += record.get("profit", 0)
-        
+        data_manager.rebuild_stats()
         data_manager.save_data()
         
         print("\n✅ 全部修复完成！")
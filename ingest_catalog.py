@@ -0,0 +1,254 @@
+"""
+数据目录导入清单
+记录 DeltaTool 目录下每个 CSV 的类型（是否为游戏记录）、已读取到的字节偏移和解析结果缓存，
+启动时只解析新文件和已有文件新追加的部分；不是游戏记录的 CSV（事件日志、热力图导出等）
+只嗅探表头，不解析
+
+    ingest_catalog.json    文件名 -> {kind, size, mtime_ns, offset, header, tail, chunks, cache_version}
+    .ingest_cache/<文件名>.chunks/<序号>.npz   已读取部分的解析结果，每次追加写一个新块
+
+解析结果按块只追加（npz，不含 pickle 对象），追加时不重写已有的块；相邻的块在前一块不比后一块大时合并，
+块数保持在对数级。chunks 为各块的行数，加载时据此校验
+"""
+
+import io
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from record_schema import COLUMN_ALIASES, csv_dtypes
+
+# pyarrow 的 CSV 解析器（可选，多线程解析，比默认的 C 引擎快）
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILE_NAME = "ingest_catalog.json"
+CACHE_DIR_NAME = ".ingest_cache"
+CACHE_VERSION = 3  # 解析结果的列或格式有变化时加一，旧缓存作废后重新完整解析（2：增加 ts 列；3：npz 分块）
+
+# 游戏记录 CSV 必须包含的列（中文表头按 record_schema 的别名对应）
+RECORD_REQUIRED_COLUMNS = {"datetime", "map", "profit"}
+
+TAIL_CHECK_BYTES = 64  # 偏移之前用于确认文件只被追加过的字节数
+
+
+def sniff_header(path):
+    """读取 CSV 表头，返回 (列名列表, 表头字节数)"""
+    with open(path, 'rb') as f:
+        line = f.readline()
+    header = line.decode("utf-8-sig").strip().split(",")
+    return [name.strip().strip('"') for name in header], len(line)
+
+
+def schema_kind(header):
+    """根据表头判断文件类型：records（游戏记录）或 other"""
+    columns = {COLUMN_ALIASES.get(name, name) for name in header}
+    return "records" if RECORD_REQUIRED_COLUMNS.issubset(columns) else "other"
+
+
+def _write_chunk(path, df):
+    """解析结果写成 npz（文本列存为定长字符串，缺失值记为空字符串）"""
+    columns = {}
+    for name in df.columns:
+        values = df[name]
+        if values.dtype.kind in "biuf":
+            columns[name] = values.to_numpy()
+        else:
+            columns[name] = values.astype(object).where(values.notna(), "").astype(str).to_numpy(dtype=str)
+    tmp_file = path.with_suffix(".tmp")
+    with open(tmp_file, 'wb') as f:
+        np.savez(f, **columns)
+    os.replace(tmp_file, path)
+
+
+def _read_chunk(path):
+    """读取一个块（不允许 pickle 对象）"""
+    with np.load(path, allow_pickle=False) as data:
+        return pd.DataFrame({name: data[name].astype(object) if data[name].dtype.kind == "U" else data[name]
+                             for name in data.files})
+
+
+class IngestCatalog:
+    """
+    CSV 导入清单
+
+    read(path, prepare) 返回文件的全部记录（prepare 处理后的 DataFrame），
+    只对上次之后追加的字节调用 prepare；文件被改写（不只是追加）时重新完整解析
+    """
+
+    def __init__(self, data_dir):
+        self.data_dir = Path(data_dir)
+        self.catalog_file = self.data_dir / CATALOG_FILE_NAME
+        self.cache_dir = self.data_dir / CACHE_DIR_NAME
+        self._dirty = False
+        self._frames = {}  # 文件名 -> (偏移, 解析结果)，同一进程内再次读取时不重新加载块
+        self._lock = threading.Lock()  # 不同文件可以在多个线程中同时 read()
+        try:
+            with open(self.catalog_file, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def _chunk_dir(self, name):
+        return self.cache_dir / f"{name}.chunks"
+
+    def _chunk_file(self, name, index):
+        return self._chunk_dir(name) / f"{index:06d}.npz"
+
+    @staticmethod
+    def _read_tail(path, offset):
+        """偏移之前的一小段字节，用于判断已读取部分是否被改写"""
+        start = max(offset - TAIL_CHECK_BYTES, 0)
+        with open(path, 'rb') as f:
+            f.seek(start)
+            return f.read(offset - start).hex()
+
+    def kind(self, name):
+        """已登记文件的类型，未登记时返回 None"""
+        entry = self._entries.get(name)
+        return entry["kind"] if entry else None
+
+    def read(self, path, prepare):
+        """
+        读取一个 CSV
+
+        Args:
+            path: CSV 文件路径
+            prepare: 把原始 DataFrame 转换为记录表的函数
+
+        Returns:
+            记录表；不是游戏记录文件或没有记录时返回 None
+        """
+        path = Path(path)
+        stat = path.stat()
+        entry = self._entries.get(path.name)
+        unchanged = entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+
+        if entry is not None and entry["kind"] == "other" and unchanged:
+            return None
+
+        cached = None
+        if (entry is not None and entry["kind"] == "records" and stat.st_size >= entry["offset"]
+                and entry.get("cache_version") == CACHE_VERSION):
+            cached = self._load_cache(path, entry)
+
+        if cached is None:
+            # 新文件或被改写过：嗅探表头后完整解析
+            header, header_size = sniff_header(path)
+            entry = {"kind": schema_kind(header), "header": header, "offset": header_size,
+                     "chunks": [], "cache_version": CACHE_VERSION}
+            self._drop_cache(path.name)
+            if entry["kind"] == "other":
+                self._update(path.name, entry, stat)
+                return None
+            cached = prepare(pd.DataFrame(columns=header))
+
+        # 只解析偏移之后新追加的完整行
+        with open(path, 'rb') as f:
+            f.seek(entry["offset"])
+            data = f.read(stat.st_size - entry["offset"])
+        end = data.rfind(b"\n") + 1
+        if end > 0:
+            new_rows = self._parse_rows(data[:end], entry["header"])
+            if len(new_rows):
+                cached = pd.concat([cached, prepare(new_rows)], ignore_index=True)
+                self._append_chunk(path.name, entry, cached, len(new_rows))
+            logger.debug("从 %s 读取了 %d 条新记录（共 %d 条）", path.name, len(new_rows), len(cached))
+            entry["offset"] += end
+
+        self._frames[path.name] = (entry["offset"], cached)
+        entry["tail"] = self._read_tail(path, entry["offset"])
+        self._update(path.name, entry, stat)
+        return cached if len(cached) > 0 else None
+
+    @staticmethod
+    def _parse_rows(data, header):
+        """解析不含表头的 CSV 字节，列类型按 record_schema 预先声明"""
+        try:
+            return pd.read_csv(io.BytesIO(data), header=None, names=header, encoding='utf-8',
+                               dtype=csv_dtypes(header), engine=CSV_ENGINE)
+        except (ValueError, TypeError):
+            # 有不符合声明类型的值（如收益列混入文字），退回逐列推断，由 prepare 统一转换
+            return pd.read_csv(io.BytesIO(data), header=None, names=header, encoding='utf-8')
+
+    def _load_cache(self, path, entry):
+        """加载缓存的解析结果，文件已读取部分被改写过或块与清单对不上时返回 None"""
+        try:
+            if self._read_tail(path, entry["offset"]) != entry.get("tail"):
+                return None
+            memo = self._frames.get(path.name)
+            if memo is not None and memo[0] == entry["offset"]:
+                return memo[1]
+            frames = []
+            for index, rows in enumerate(entry.get("chunks", [])):
+                frame = _read_chunk(self._chunk_file(path.name, index))
+                if len(frame) != rows:
+                    return None
+                frames.append(frame)
+            return pd.concat(frames, ignore_index=True) if frames else None
+        except Exception:
+            return None
+
+    def _append_chunk(self, name, entry, cached, added):
+        """
+        把新解析的行（cached 的最后 added 行）写成一个新块
+
+        之后前一块不比最后一块大时合并两者（合并的数据直接取自 cached），
+        每行最多被重写对数次，块数也保持在对数级
+        """
+        chunks = entry["chunks"]
+        self._chunk_dir(name).mkdir(parents=True, exist_ok=True)
+        _write_chunk(self._chunk_file(name, len(chunks)), cached.iloc[len(cached) - added:])
+        chunks.append(added)
+        while len(chunks) >= 2 and chunks[-2] <= chunks[-1]:
+            index = len(chunks) - 2
+            start = sum(chunks[:index])
+            _write_chunk(self._chunk_file(name, index), cached.iloc[start:start + chunks[-2] + chunks[-1]])
+            self._chunk_file(name, index + 1).unlink()
+            chunks[-2:] = [chunks[-2] + chunks[-1]]
+
+    def _drop_cache(self, name):
+        self._frames.pop(name, None)
+        shutil.rmtree(self._chunk_dir(name), ignore_errors=True)
+        try:
+            # 旧版本的 pickle 缓存
+            (self.cache_dir / f"{name}.pkl").unlink()
+        except OSError:
+            pass
+
+    def _update(self, name, entry, stat):
+        entry["size"] = stat.st_size
+        entry["mtime_ns"] = stat.st_mtime_ns
+        with self._lock:
+            self._entries[name] = entry
+            self._dirty = True
+
+    def forget_missing(self, names):
+        """删除已经不存在的文件的登记和缓存"""
+        for name in list(self._entries):
+            if name not in names:
+                del self._entries[name]
+                self._drop_cache(name)
+                self._dirty = True
+
+    def save(self):
+        """有变化时写出清单"""
+        if not self._dirty:
+            return
+        tmp_file = self.catalog_file.with_suffix(".json.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.catalog_file)
+        self._dirty = False
@@ -0,0 +1,246 @@
+"""
+物品事实表模块
+记录中的物资是自由文本（"金表;文件"、"M4A1; 医疗包"）或桌面客户端的物品列表，
+导入时每种物资文本只拆分一次，展开为逐件的事实表：
+
+    raid_id   int64   记录在记录表中的行号
+    item_id   int32   物品字典中的编号
+    count     int32   本局获得的件数
+    value     int64   收益份额（本局收益按件数平均分给各物品，一局的份额之和等于本局收益）
+
+物品字典与桌面客户端 OCR 的物品目录（desktop/item_catalog.py）共用：目录中的标准名称排在最前，
+识别关键词（"M4"、"大药"等）归并到对应的标准名称，其余物品名按出现顺序追加。
+各物品的频次、收益以及同局搭配都是对事实表的分组或自连接，不再对整段历史做字符串操作
+"""
+
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 桌面客户端的物品目录（只依赖标准库）
+sys.path.insert(0, str(Path(__file__).parent / "desktop"))
+from item_catalog import ITEM_KEYWORDS  # type: ignore
+
+
+ITEM_SEPARATORS = re.compile(r"[;；,，]")  # 页面和 CSV 用 "; "，桌面客户端的中文导出用 ", "
+FACT_COLUMNS = {"raid_id": np.int64, "item_id": np.int32, "count": np.int32, "value": np.int64}
+
+
+def split_items(text):
+    """物资文本拆分为物品名列表"""
+    return [name.strip() for name in ITEM_SEPARATORS.split(text) if name.strip()]
+
+
+class ItemDictionary:
+    """
+    物品字典：物品名 -> 编号
+
+    名称不区分大小写；物品目录中的识别关键词查到对应标准名称的编号
+    """
+
+    def __init__(self, catalog=ITEM_KEYWORDS):
+        self.names = []
+        self.categories = []
+        self.reference_values = []  # 目录中的参考价值，目录外的物品为 0
+        self._ids = {}
+        for name, info in catalog.items():
+            item_id = self._add(name, info["category"], info["value"])
+            for keyword in info["keywords"]:
+                self._ids.setdefault(keyword.upper(), item_id)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _add(self, name, category, reference_value):
+        item_id = self._ids[name.upper()] = len(self.names)
+        self.names.append(name)
+        self.categories.append(category)
+        self.reference_values.append(reference_value)
+        return item_id
+
+    def intern(self, name):
+        """物品名的编号，不在字典中时追加"""
+        item_id = self._ids.get(name.upper())
+        if item_id is None:
+            item_id = self._add(name, "其他", 0)
+        return item_id
+
+    def lookup(self, name):
+        """物品名的编号，不在字典中时返回 -1"""
+        return self._ids.get(name.upper(), -1)
+
+
+class ItemFactTable:
+    """
+    只追加的物品事实表
+
+    记录表的物资列已是类别编码，这里为每个物资文本缓存拆分结果（物品编号及件数，
+    以 CSR 形式存放），extend() 按编号展开，开销只与新增记录的物品件数有关
+    """
+
+    def __init__(self, dictionary=None, capacity=1024):
+        self.dictionary = dictionary if dictionary is not None else ItemDictionary()
+        self.version = 0
+        self._size = 0
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in FACT_COLUMNS.items()}
+
+        # 物资文本（记录表 items 类别编号）-> 拆分结果
+        self._text_offsets = [0]
+        self._text_items = []
+        self._text_counts = []
+        self._text_pieces = []  # 每个文本的总件数
+        self._csr = None  # 上面几个列表的 numpy 版本，文本有新增时重建
+
+    def __len__(self):
+        return self._size
+
+    def column(self, name):
+        """一列的只读视图"""
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    # ---------- 追加 ----------
+
+    def _split_texts(self, texts):
+        """拆分尚未见过的物资文本（记录表的类别表只会追加）"""
+        intern = self.dictionary.intern
+        for text in texts[len(self._text_pieces):]:
+            counts = {}
+            for name in split_items(text):
+                item_id = intern(name)
+                counts[item_id] = counts.get(item_id, 0) + 1
+            self._text_items.extend(counts)
+            self._text_counts.extend(counts.values())
+            self._text_offsets.append(len(self._text_items))
+            self._text_pieces.append(sum(counts.values()))
+            self._csr = None
+
+        if self._csr is None:
+            self._csr = (np.array(self._text_offsets, dtype=np.int64),
+                         np.array(self._text_items, dtype=np.int32),
+                         np.array(self._text_counts, dtype=np.int32),
+                         np.array(self._text_pieces, dtype=np.int64))
+        return self._csr
+
+    def extend(self, first_raid, codes, profit, texts):
+        """
+        追加一批记录的物品事实
+
+        Args:
+            first_raid: 这批记录中第一条在记录表中的行号
+            codes: 各记录物资文本的类别编号
+            profit: 各记录的收益
+            texts: 记录表 items 的类别表（编号 -> 物资文本）
+        """
+        offsets, items, counts, pieces = self._split_texts(texts)
+        codes = np.asarray(codes, dtype=np.int64)
+        starts = offsets[codes]
+        lengths = offsets[codes + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return
+
+        # 各事实在拆分结果中的位置：每条记录从 starts 开始连续 lengths 个
+        first = np.cumsum(lengths) - lengths
+        positions = np.repeat(starts - first, lengths) + np.arange(total)
+        fact_counts = counts[positions]
+        raid_profit = np.repeat(np.asarray(profit, dtype=np.int64), lengths)
+        raid_pieces = np.repeat(pieces[codes], lengths)
+
+        self._reserve(self._size + total)
+        end = self._size + total
+        cols = self._columns
+        cols["raid_id"][self._size:end] = np.repeat(np.arange(first_raid, first_raid + len(codes)), lengths)
+        cols["item_id"][self._size:end] = items[positions]
+        cols["count"][self._size:end] = fact_counts
+        # 按件数分摊并向零取整（亏损与盈利对称），除不尽的零头记到该局第一种物品上，
+        # 一局各物品的份额之和正好等于本局收益
+        value = np.sign(raid_profit) * (np.abs(raid_profit) * fact_counts // raid_pieces)
+        has_items = lengths > 0
+        raid_first = first[has_items]
+        value[raid_first] += np.asarray(profit, dtype=np.int64)[has_items] - np.add.reduceat(value, raid_first)
+        cols["value"][self._size:end] = value
+        self._size = end
+        self.version += 1
+
+    def _reserve(self, size):
+        """容量不足时按倍数扩容"""
+        capacity = len(self._columns["raid_id"])
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2)
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    # ---------- 查询 ----------
+
+    def item_stats(self, top=None):
+        """
+        按物品的总收益、平均价值（每局）、获取次数（局数）、件数，按总收益降序
+
+        列：物资、类别、总收益、平均价值、获取次数、件数
+        """
+        size = len(self.dictionary)
+        item_id = self.column("item_id")
+        raids = np.bincount(item_id, minlength=size)
+        value = np.bincount(item_id, weights=self.column("value"), minlength=size).astype(np.int64)
+        pieces = np.bincount(item_id, weights=self.column("count"), minlength=size).astype(np.int64)
+
+        ids = np.flatnonzero(raids)
+        ids = ids[np.argsort(-value[ids], kind="stable")]
+        if top:
+            ids = ids[:top]
+        return pd.DataFrame({
+            "物资": np.array(self.dictionary.names, dtype=object)[ids],
+            "类别": np.array(self.dictionary.categories, dtype=object)[ids],
+            "总收益": value[ids],
+            "平均价值": value[ids] / raids[ids],
+            "获取次数": raids[ids],
+            "件数": pieces[ids],
+        })
+
+    def raids_with(self, name):
+        """带出过某物品的记录行号（升序），物品不存在时为空"""
+        item_id = self.dictionary.lookup(name)
+        raid_id = self.column("raid_id")
+        return np.unique(raid_id[self.column("item_id") == item_id])
+
+    def co_occurrence(self, top=None):
+        """
+        同一局中一起带出的物品组合及次数，按次数降序
+
+        事实表按记录顺序追加，同一局的物品相邻：把表与错开 1..k-1 行的自身对齐，
+        行号相同的就是同局的物品对（k 为一局最多的物品种数）
+        列：物资A、物资B、同局次数
+        """
+        raid_id = self.column("raid_id")
+        item_id = self.column("item_id").astype(np.int64)
+        size = len(self.dictionary)
+        pairs = []
+        shift = 1
+        while shift < len(raid_id):
+            same = raid_id[shift:] == raid_id[:-shift]
+            if not same.any():
+                break
+            a, b = item_id[:-shift][same], item_id[shift:][same]
+            pairs.append(np.minimum(a, b) * size + np.maximum(a, b))
+            shift += 1
+        if not pairs:
+            return pd.DataFrame({"物资A": [], "物资B": [], "同局次数": []})
+
+        keys, counts = np.unique(np.concatenate(pairs), return_counts=True)
+        order = np.argsort(-counts, kind="stable")
+        if top:
+            order = order[:top]
+        names = np.array(self.dictionary.names, dtype=object)
+        return pd.DataFrame({
+            "物资A": names[keys[order] // size],
+            "物资B": names[keys[order] % size],
+            "同局次数": counts[order],
+        })
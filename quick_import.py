@@ -1,75 +0,0 @@
-"""
-快速数据录入工具
-用于批量录入游戏记录
-"""
-
-import pandas as pd
-from pathlib import Path
-from datetime import datetime
-
-# 数据模板
-records = [
-    # 示例格式（删除这一行并添加你的数据）：
-    # {"datetime": "2025-12-09T14:30:00", "map": "大坝", "mode": "机密", "zone": "优势方: 军营/栏杆(离主楼最近，TO出生点)", "items": "M4A1;医疗包", "profit": 350000, "survived": True},
-    
-    # 在这里添加你的游戏记录：
-    # 格式说明：
-    # - datetime: 游戏时间 (格式: YYYY-MM-DDTHH:MM:SS)
-    # - map: 地图名 (大坝/长弓/巴克什/航天/监狱)
-    # - mode: 模式 (普通/机密/绝密/自适应)
-    # - zone: 出生点 (大坝地图可选:)
-    #         优势方: 军营/栏杆(离主楼最近，TO出生点)
-    #         优势方: 维修通道(带电通过河或进道)
-    #         优势方: 变电站外围(通常先吃变电站再去楼)
-    #         劣势方: 济舍中心正门(全图最远，需长途奔袭)
-    #         劣势方: 水泥厂/后山(建议直接吃完水泥厂，架起前往中心的人)
-    #         劣势方: 河滩/野地(老六位，适合半路截杀)
-    # - items: 获得物品 (用分号;分隔，如 "M4A1;医疗包;钥匙卡")
-    # - profit: 收益 (数字)
-    # - survived: 是否撤离 (True/False)
-    
-]
-
-def main():
-    if not records:
-        print("⚠️ 请先在 records 列表中添加游戏记录！")
-        print("\n示例格式：")
-        print("""
-records = [
-    {"datetime": "2025-12-09T14:30:00", "map": "大坝", "mode": "机密", "zone": "优势方: 军营/栏杆(离主楼最近，TO出生点)", "items": "M4A1;医疗包", "profit": 350000, "survived": True},
-    {"datetime": "2025-12-09T15:45:00", "map": "大坝", "mode": "普通", "zone": "劣势方: 水泥厂/后山(建议直接吃完水泥厂，架起前往中心的人)", "items": "AK-47", "profit": 120000, "survived": True},
-    {"datetime": "2025-12-09T16:20:00", "map": "大坝", "mode": "绝密", "zone": "优势方: 维修通道(带电通过河或进道)", "items": "钥匙卡;6级护甲", "profit": 800000, "survived": False},
-]
-        """)
-        return
-    
-    # 转换为DataFrame
-    df = pd.DataFrame(records)
-    
-    # 保存到DeltaTool目录
-    data_dir = Path.home() / "Documents" / "DeltaTool"
-    data_dir.mkdir(parents=True, exist_ok=True)
-    
-    # 生成文件名
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    csv_file = data_dir / f"manual_import_{timestamp}.csv"
-    
-    # 保存CSV
-    df.to_csv(csv_file, index=False, encoding='utf-8-sig')
-    
-    print("="*60)
-    print("✅ 数据导入成功！")
-    print("="*60)
-    print(f"\n记录数: {len(records)}")
-    print(f"保存位置: {csv_file}")
-    print("\n记录预览:")
-    print(df.to_string(index=False))
-    print("\n下一步：")
-    print("1. 在Streamlit应用中打开 '📈 数据管理' 页面")
-    print("2. 选择 '文件上传' 标签")
-    print(f"3. 上传文件: {csv_file}")
-    print("   或者直接在 '我的数据' 中查看（应用会自动加载）")
-    print("\n" + "="*60)
-
-if __name__ == "__main__":
-    main()
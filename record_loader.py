@@ -0,0 +1,391 @@
+"""
+游戏记录加载模块
+读取 DeltaTool 目录下的 JSON 记录和 CSV 文件，
+桌面客户端的定长记录文件（见 desktop/record_memmap.py）或列式快照有效时直接读取列，不解析 JSON；
+定长记录文件按月分区，只加载最近一段时间时只读取相关月份，耗时与全部历史的长短无关；
+按文件指纹（路径、大小、修改时间）缓存解析结果，只重新解析有变化的文件；
+CSV 经导入清单读取，跨进程只解析新文件和新追加的部分，不是游戏记录的 CSV 直接跳过，
+有多个 CSV 需要解析时在线程池中并行读取；
+同一局出现在多个文件中时按内容哈希去重索引只保留一份；
+时间字符串在解析数据源时统一转换为 ts 列（秒级时间戳），随解析结果一起缓存；
+桌面客户端每次发布记录都会递增代数（见 desktop/publish.py），代数和目录都没变时不再检查文件
+"""
+
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ingest_catalog import IngestCatalog
+from record_schema import RECORD_COLUMNS, normalize_frame, with_timestamps
+
+# 桌面客户端的数据格式模块（只依赖标准库）
+sys.path.insert(0, str(Path(__file__).parent / "desktop"))
+from record_journal import read_records, read_tail  # type: ignore
+from rollup import read_rollup  # type: ignore
+from dedupe_index import DedupeIndex, JSON_SOURCE, frame_keys  # type: ignore
+from publish import read_generation  # type: ignore
+from timestamps import NAT, to_timestamp  # type: ignore
+
+try:
+    from columnar_snapshot import load_snapshot, CATEGORY_COLUMNS  # type: ignore
+    from record_memmap import TAIL_TIMES, header_file_for, open_record_file  # type: ignore
+    COLUMNAR_AVAILABLE = True
+except ImportError:
+    COLUMNAR_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = Path.home() / "Documents" / "DeltaTool"
+MAX_READ_WORKERS = 8  # 并行读取 CSV 的线程数上限
+MAX_WINDOWS = 4  # 同时缓存几个日期范围的加载结果
+FULL_HISTORY = (None, None)
+
+
+def _prepare_csv_frame(df):
+    """CSV 原始行转换为记录表（含 ts 列），并附上去重用的内容哈希列 _key"""
+    df = with_timestamps(normalize_frame(df))
+    df["_key"] = frame_keys(df)
+    return df
+
+
+def columns_to_frame(columns):
+    """列式快照转换为记录表（分类列保持 Categorical，ts 直接取快照中已解析的时间列）"""
+    df = pd.DataFrame({
+        "datetime": pd.Series(columns["datetime"]).str.decode("utf-8"),
+        "ts": columns["ts"],
+        "profit": columns["profit"],
+        "survived": columns["survived"],
+        "duration": columns["duration"],
+    })
+    for name in CATEGORY_COLUMNS:
+        df[name] = pd.Categorical.from_codes(columns[f"{name}_codes"], columns[f"{name}_categories"])
+    return df[RECORD_COLUMNS + ["ts"]]
+
+
+def memmap_to_frame(records):
+    """
+    定长记录文件的一个分区（record_memmap.MemmapRecords）转换为记录表
+
+    各列从映射中复制出来，返回后不再引用映射，桌面客户端可以随时清理旧的数据文件
+    """
+    df = pd.DataFrame({
+        "datetime": pd.Series(np.array(records.column("datetime"))).str.decode("utf-8"),
+        "ts": np.array(records.column("ts")),
+        "profit": np.array(records.column("profit")),
+        "survived": np.array(records.column("survived")),
+        "duration": np.array(records.column("duration")),
+    })
+    for name in CATEGORY_COLUMNS:
+        df[name] = pd.Categorical.from_codes(np.array(records.column(name)), records.categories(name))
+    return df[RECORD_COLUMNS + ["ts"]]
+
+
+def _in_window(df, window):
+    """只保留时间范围（含两端的秒级时间戳，None 表示不限）内的记录；指定范围时去掉时间未知的记录"""
+    if df is None or window == FULL_HISTORY:
+        return df
+    ts_from, ts_to = window
+    ts = df["ts"].to_numpy()
+    mask = ts != NAT
+    if ts_from is not None:
+        mask &= ts >= ts_from
+    if ts_to is not None:
+        mask &= ts <= ts_to
+    if mask.all():
+        return df
+    return df[mask].reset_index(drop=True) if mask.any() else None
+
+
+def _ends_with(times, count, sealed):
+    """快照（共 count 条，times 为最后若干条的时间字符串）是否以封存日志的记录结尾"""
+    if count < len(sealed):
+        return False
+    sealed_times = [str(r.get("datetime", "") or "") for r in sealed]
+    n = min(len(sealed_times), len(times))
+    return times[len(times) - n:] == sealed_times[len(sealed_times) - n:]
+
+
+def _fingerprint(paths):
+    """一组文件的指纹：(路径, 大小, 修改时间)，不存在的文件记为 None"""
+    result = []
+    for path in paths:
+        try:
+            stat = path.stat()
+            result.append((str(path), stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            result.append((str(path), None, None))
+    return tuple(result)
+
+
+class RecordLoaderCache:
+    """
+    增量记录加载器
+
+    每个数据源（JSON快照+日志算一个，每个CSV各算一个）单独缓存解析结果，
+    load() 时只重新解析指纹变化的数据源，全部未变化时直接返回上次合并的结果；
+    定长记录文件按月分区，各分区按数据文件名缓存（内容没变的月份文件名不变，不重新读取），
+    指定日期范围时只读取相交的分区
+    """
+
+    def __init__(self, data_dir=None):
+        self.data_dir = Path(data_dir) if data_dir else DEFAULT_DATA_DIR
+        self.json_file = self.data_dir / "game_records.json"
+        self.columnar_file = self.data_dir / "game_records.npz"
+        self.memmap_header = header_file_for(self.json_file) if COLUMNAR_AVAILABLE else None
+        self.rollup_file = self.data_dir / "game_records_rollup.json"
+
+        self._sources = {}  # 数据源键 -> (指纹, 解析后的DataFrame)；JSON 按日期范围分别缓存
+        self._partitions = {}  # 定长记录文件的数据文件名 -> 去重后的记录表
+        self._windows = {}  # 日期范围 -> (发布状态, 各数据源指纹, 合并结果)
+        self._lock = threading.Lock()
+        
+        self.dedupe = DedupeIndex(self.data_dir)
+        self.catalog = IngestCatalog(self.data_dir)
+        self._csv_names = None  # 上次加载时的CSV文件名
+        self._releases = None  # 上次加载时去重索引的释放计数
+        self._rollup = (None, None)  # (指纹, 历史汇总)
+        self.rollup_version = 0  # 历史汇总每次重新读取加一
+
+    def _json_paths(self):
+        """JSON快照、定长记录文件头、列式快照及追加日志"""
+        paths = [
+            self.json_file,
+            self.columnar_file,
+            self.json_file.with_suffix(".journal"),
+            self.json_file.with_suffix(".journal.sealed"),
+        ]
+        return paths + [self.memmap_header] if self.memmap_header else paths
+
+    def _read_partitions(self, record_file, window):
+        """定长记录文件中与时间范围相交的分区（已去重）"""
+        current = {record_file.file_of(name) for name in record_file.partitions()}
+        for file_name in list(self._partitions):
+            if file_name not in current:
+                del self._partitions[file_name]
+
+        frames = []
+        for name in record_file.partitions(*window):
+            file_name = record_file.file_of(name)
+            if file_name not in self._partitions:
+                logger.debug("从定长记录文件读取分区 %s", name)
+                self._partitions[file_name] = self._dedupe(memmap_to_frame(record_file.open(name)), JSON_SOURCE)
+            frames.append(_in_window(self._partitions[file_name], window))
+        frames = [f for f in frames if f is not None]
+        return pd.concat(frames, ignore_index=True) if frames else None
+
+    def _parse_json(self, window=FULL_HISTORY):
+        """
+        解析桌面客户端的记录（只保留时间范围内的）
+
+        定长记录文件有效时只读取相关分区，其次是列式快照，都无效时解析 JSON
+        """
+        record_file = open_record_file(self.json_file, self.json_file) if COLUMNAR_AVAILABLE else None
+        snapshot = None
+        if record_file is not None:
+            try:
+                snapshot = self._read_partitions(record_file, window)
+                count, times = len(record_file), record_file.tail
+            except OSError as e:
+                # 读取期间文件头被替换、旧数据文件已清理；下次加载时代数已变，会重新读取
+                logger.debug("读取定长记录文件失败: %s", e)
+                record_file = None
+        if record_file is None:
+            columns = load_snapshot(self.columnar_file, self.json_file) if COLUMNAR_AVAILABLE else None
+            if columns is None:
+                records = read_records(self.json_file)
+                return _in_window(self._dedupe(self._records_frame(records, "JSON"), JSON_SOURCE), window)
+            logger.debug("从列式快照加载了 %d 条记录", len(columns["ts"]))
+            count = len(columns["ts"])
+            times = [t.decode("utf-8") for t in columns["datetime"][-TAIL_TIMES:]]
+            snapshot = _in_window(self._dedupe(columns_to_frame(columns), JSON_SOURCE), window)
+
+        # 二进制快照 + 之后追加的日志
+        tail = read_tail(self.json_file, lambda sealed: _ends_with(times, count, sealed))
+        frames = [snapshot, _in_window(self._dedupe(self._records_frame(tail, "日志"), JSON_SOURCE), window)]
+        frames = [f for f in frames if f is not None]
+        return pd.concat(frames, ignore_index=True) if frames else None
+
+    @staticmethod
+    def _records_frame(records, source_name):
+        """桌面客户端的记录列表转换为记录表（含 ts 列）"""
+        logger.debug("从%s加载了 %d 条记录", source_name, len(records))
+        if not records:
+            return None
+        return with_timestamps(normalize_frame(pd.DataFrame(records)))
+
+    def _read_csv(self, csv_file):
+        """读取单个CSV文件（只解析上次之后追加的部分），不去重"""
+        return self.catalog.read(csv_file, _prepare_csv_frame)
+
+    def _read_csv_files(self, csv_files):
+        """
+        并行读取多个CSV，返回 文件 -> 记录表（读取失败时为异常对象）
+
+        解析和内容哈希在线程中进行：pandas/pyarrow 解析、按列计算哈希（dedupe_index.frame_keys）时
+        大部分时间不持有 GIL，总耗时接近最大的文件；
+        去重索引的登记顺序影响同一局归属哪个文件，因此去重留给调用方按文件顺序进行
+        """
+        def read(csv_file):
+            try:
+                return self._read_csv(csv_file)
+            except Exception as e:
+                return e
+
+        if len(csv_files) <= 1:
+            return {f: read(f) for f in csv_files}
+        workers = min(len(csv_files), MAX_READ_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return dict(zip(csv_files, pool.map(read, csv_files)))
+
+    def _parse_csv(self, csv_file, prefetched):
+        """取出预先读取的CSV记录（文件在此期间又有变化时重新读取）并去重"""
+        df = prefetched.get(csv_file)
+        if df is None and csv_file not in prefetched:
+            df = self._read_csv(csv_file)
+        if isinstance(df, Exception):
+            raise df
+        return self._dedupe(df, csv_file.name)
+
+    def _dedupe(self, df, source):
+        """去掉已属于其他数据源的记录（以及本数据源内的重复）"""
+        if df is None:
+            return None
+        if "_key" in df:
+            keys = df["_key"].tolist()
+            df = df.drop(columns="_key")
+        else:
+            keys = frame_keys(df)
+        accepted = self.dedupe.accept(keys, source)
+        if not all(accepted):
+            logger.debug("%s 中有 %d 条重复记录", source, len(accepted) - sum(accepted))
+            df = df[accepted].reset_index(drop=True)
+        return df if len(df) > 0 else None
+
+    def _is_stale(self, key, paths):
+        """数据源的指纹是否与缓存不同"""
+        cached = self._sources.get(key)
+        return cached is None or cached[0] != _fingerprint(paths)
+
+    def _refresh(self, key, paths, parser):
+        """指纹变化时重新解析一个数据源"""
+        fingerprint = _fingerprint(paths)
+        cached = self._sources.get(key)
+        if cached is not None and cached[0] == fingerprint:
+            return fingerprint
+        try:
+            frame = parser()
+        except Exception as e:
+            logger.warning("读取 %s 失败: %s", Path(key).name, e)
+            frame = None
+        self._sources[key] = (fingerprint, frame)
+        return fingerprint
+
+    def _publish_state(self):
+        """(记录代数, 数据目录修改时间)：追加写入会递增代数，新增/删除文件会改变目录修改时间"""
+        try:
+            dir_mtime = self.data_dir.stat().st_mtime_ns
+        except OSError:
+            dir_mtime = None
+        return read_generation(self.json_file), dir_mtime
+
+    def load(self, date_from=None, date_to=None):
+        """
+        加载记录（英文列及 ts 列），没有记录时返回 None
+
+        Args:
+            date_from: 开始日期（含），None 表示不限
+            date_to: 结束日期（含当天），None 表示不限；指定范围时不含时间未知的记录，
+                     桌面客户端的记录只读取相交的月分区，CSV 的记录读入后按 ts 筛选
+
+        返回的 DataFrame 在多个会话间共享，调用方不要原地修改
+        """
+        window = (to_timestamp(date_from), to_timestamp(date_to, end_of_day=True))
+        json_key = "json" if window == FULL_HISTORY else ("json",) + window
+        with self._lock:
+            # 先取代数再读文件：读取期间有新发布时代数已变，下次会重新检查
+            published = self._publish_state()
+            cached = self._windows.pop(window, None)
+            if cached is not None:
+                self._windows[window] = cached  # 最近使用的放到最后
+                if published[0] is not None and published == cached[0]:
+                    return cached[2]
+
+            csv_files = sorted(self.data_dir.glob("*.csv"))
+            csv_names = {f.name for f in csv_files}
+            if self._csv_names is None or self._csv_names - csv_names:
+                # 有CSV被删除：释放它登记的记录
+                self.dedupe.release_missing(csv_names | {JSON_SOURCE})
+                self.catalog.forget_missing(csv_names)
+            self._csv_names = csv_names
+
+            # 有记录被释放时，其他文件中被判为重复的同一局需要重新筛选
+            releases = self.dedupe.release_count()
+            if releases != self._releases:
+                self._sources.clear()
+                self._partitions.clear()
+                self._releases = releases
+
+            # 先并行读取有变化的CSV，再按固定顺序登记去重
+            stale = [f for f in csv_files if self._is_stale(str(f), [f])]
+            prefetched = self._read_csv_files(stale)
+
+            manifest = [self._refresh(json_key, self._json_paths(), lambda: self._parse_json(window))]
+            for csv_file in csv_files:
+                manifest.append(self._refresh(str(csv_file), [csv_file],
+                                              lambda f=csv_file: self._parse_csv(f, prefetched)))
+
+            # 删除已经不存在的CSV，以及不再缓存的日期范围
+            while len(self._windows) >= MAX_WINDOWS:
+                del self._windows[next(iter(self._windows))]
+            windows = set(self._windows) | {window}
+            keep = {"json" if w == FULL_HISTORY else ("json",) + w for w in windows} | {str(f) for f in csv_files}
+            for key in list(self._sources):
+                if key not in keep:
+                    del self._sources[key]
+
+            self.catalog.save()
+
+            manifest = tuple(manifest)
+            if cached is not None and manifest == cached[1]:
+                merged = cached[2]
+            else:
+                keys = [json_key] + [str(f) for f in csv_files]
+                frames = [self._sources[json_key][1]] + [_in_window(self._sources[k][1], window) for k in keys[1:]]
+                merged = self._merge([f for f in frames if f is not None])
+            self._windows[window] = (published, manifest, merged)
+            return merged
+
+    def load_rollup(self):
+        """
+        桌面客户端折叠的历史每日汇总（列同 analytics_cube.CUBE_COLUMNS，没有 zone），没有时返回 None
+
+        返回的 DataFrame 在多个会话间共享，调用方不要原地修改
+        """
+        with self._lock:
+            fingerprint = _fingerprint([self.rollup_file])
+            if self._rollup[0] != fingerprint:
+                rows = read_rollup(self.rollup_file)
+                df = None
+                if rows:
+                    df = pd.DataFrame(rows)
+                    df["day"] = pd.to_datetime(df["day"])
+                    logger.debug("从历史汇总加载了 %d 行（%d 局）", len(df), df["count"].sum())
+                self._rollup = (fingerprint, df)
+                self.rollup_version += 1
+            return self._rollup[1]
+
+    @staticmethod
+    def _merge(frames):
+        """合并各数据源（各数据源已按去重索引去掉重复）"""
+        if not frames:
+            return None
+        df = pd.concat(frames, ignore_index=True)
+
+        logger.debug("总共加载 %d 条记录", len(df))
+        return df if len(df) > 0 else None
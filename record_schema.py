@@ -0,0 +1,106 @@
+"""
+游戏记录格式定义
+文件格式（英文列）与页面格式（中文列）之间的唯一转换入口，全部按列处理，不逐行循环
+
+    英文列      中文列    类型与规则
+    datetime    日期      时间字符串，原样保留（导入时由 parse_datetimes 统一转换为秒级时间戳）
+    map         地图      str，缺失为 "未知"
+    mode        模式      str，缺失为 "未知"
+    zone        刷新点    str，缺失为 ""
+    items       物资      str（物品列表以 "; " 连接），缺失为 ""
+    profit      价值      int64，无法解析为 0
+    survived    撤离      bool（页面显示 ✅/❌），缺失或空白视为撤离（见 desktop/record_fields）
+    duration    时长      float64，对局时长（秒），桌面客户端结束对局时记录；旧记录、手动录入缺失为 NaN
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 是否撤离的规则与桌面客户端、去重索引共用（只依赖标准库）
+sys.path.insert(0, str(Path(__file__).parent / "desktop"))
+from record_fields import SURVIVED_DEFAULT, SURVIVED_TRUE_VALUES  # type: ignore
+# 时间解析规则与列式快照、SQLite 存储共用
+from timestamps import NAT, parse_datetimes  # type: ignore  # noqa: F401
+
+
+# (英文列, 中文列, 缺失值)
+SCHEMA = [
+    ("datetime", "日期", None),
+    ("map", "地图", "未知"),
+    ("mode", "模式", "未知"),
+    ("zone", "刷新点", ""),
+    ("items", "物资", ""),
+    ("profit", "价值", 0),
+    ("survived", "撤离", SURVIVED_DEFAULT),
+    ("duration", "时长", None),
+]
+
+RECORD_COLUMNS = [name for name, _, _ in SCHEMA]
+UI_COLUMNS = [label for _, label, _ in SCHEMA]
+DEFAULTS = {name: default for name, _, default in SCHEMA if default is not None}
+
+# 读取时接受的列名：中文页面列，以及桌面客户端 export_csv 的中文表头
+COLUMN_ALIASES = {label: name for name, label, _ in SCHEMA}
+COLUMN_ALIASES.update({"日期时间": "datetime", "收益": "profit", "是否撤离": "survived"})
+
+# 读取 CSV 时预先声明的列类型，不必逐列推断（profit 在 normalize_frame 中转为 int64）
+CSV_DTYPES = {"datetime": str, "map": str, "mode": str, "zone": str, "items": str,
+              "profit": "float64", "survived": str, "duration": "float64"}
+
+SURVIVED_SYMBOLS = ("✅", "❌")
+
+def join_items(items):
+    """桌面客户端的物品列表转换为字符串"""
+    if isinstance(items, list):
+        return "; ".join(i.get("name", str(i)) if isinstance(i, dict) else str(i) for i in items)
+    return items
+
+
+def csv_dtypes(header):
+    """CSV 表头（英文或中文列名）对应的列类型声明"""
+    return {name: CSV_DTYPES[COLUMN_ALIASES.get(name, name)]
+            for name in header if COLUMN_ALIASES.get(name, name) in CSV_DTYPES}
+
+
+def with_timestamps(df):
+    """附上 ts 列（parse_datetimes 的结果），导入时调用一次，之后不再解析时间字符串"""
+    df["ts"] = parse_datetimes(df["datetime"])
+    return df
+
+
+def parse_survived(values):
+    """撤离列转换为布尔值，逐值规则同 record_fields.parse_survived（按列向量化）"""
+    values = pd.Series(values)
+    if values.dtype == bool:
+        return values
+    text = values.astype(str).str.strip().str.lower()
+    blank = values.isna() | (text == "")
+    return text.isin(SURVIVED_TRUE_VALUES).mask(blank, SURVIVED_DEFAULT)
+
+
+def normalize_frame(df):
+    """
+    任意来源的记录表统一为英文列的文件格式
+
+    接受英文列、中文页面列或 export_csv 的中文表头
+    """
+    df = df.rename(columns=COLUMN_ALIASES).reindex(columns=RECORD_COLUMNS)
+
+    df["survived"] = parse_survived(df["survived"])
+    df["profit"] = pd.to_numeric(df["profit"], errors="coerce").fillna(0).astype("int64")
+    df["duration"] = pd.to_numeric(df["duration"], errors="coerce").astype("float64")
+    if df["items"].dtype == object:
+        df["items"] = df["items"].map(join_items, na_action="ignore")
+    for name in ("map", "mode", "zone", "items"):
+        df[name] = df[name].fillna(DEFAULTS[name])
+    return df
+
+
+def to_ui_frame(df):
+    """英文列的记录表（normalize_frame 的输出）转换为中文列的页面格式"""
+    ui = pd.DataFrame({label: df[name] for name, label, _ in SCHEMA})
+    ui["撤离"] = np.where(df["survived"].to_numpy(dtype=bool), *SURVIVED_SYMBOLS).astype(object)
+    return ui
@@ -0,0 +1,236 @@
+"""
+紧凑记录表模块
+用类型化的 numpy 列保存游戏记录，替代 session_state 中的字典列表：
+    ts        int64   时间（datetime64[s] 的整数形式，缺失为 NaT），导入时解析一次
+    day       int64   日期（1970-01-01 起的天数，即 datetime64[D] 的整数形式）
+    map/mode/zone/items  int32 编码，字符串在类别表中只存一份
+    profit    int64
+    survived  bool
+    duration  float64 对局时长（秒），未记录为 NaN
+页面通过 to_frame() 取得中文列的 DataFrame（每次按需生成，不另存一份）；
+分析页面通过 cube() 取得增量维护的分析立方体（见 analytics_cube），
+通过 item_facts() 取得导入时拆分好的物品事实表（见 item_facts），
+通过 trends() 取得逐局增量维护的滚动趋势序列（见 trend_engine）
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from analytics_cube import AnalyticsCube
+from item_facts import ItemFactTable
+from trend_engine import TrendEngine
+from record_schema import NAT, SURVIVED_SYMBOLS, normalize_frame, parse_datetimes
+
+
+CATEGORY_FIELDS = ["map", "mode", "zone", "items"]
+
+_table_ids = itertools.count()
+
+
+class RecordTable:
+    """紧凑的类型化记录表"""
+
+    def __init__(self, capacity=1024):
+        self._size = 0
+        self._columns = {
+            "ts": np.empty(capacity, dtype=np.int64),
+            "day": np.empty(capacity, dtype=np.int64),
+            "profit": np.empty(capacity, dtype=np.int64),
+            "survived": np.empty(capacity, dtype=bool),
+            "duration": np.empty(capacity, dtype=np.float64),
+        }
+        for name in CATEGORY_FIELDS:
+            self._columns[name] = np.empty(capacity, dtype=np.int32)
+
+        # 类别表：编码 -> 字符串，以及反查字典
+        self._categories = {name: [] for name in CATEGORY_FIELDS}
+        self._category_index = {name: {} for name in CATEGORY_FIELDS}
+
+        self.version = 0  # 每次修改加一，用于判断缓存是否失效
+        self._id = next(_table_ids)
+        self._order = None  # 按时间排序的行号及对应时间，用于时间范围查询
+        self._sorted_ts = None
+        self._order_version = -1
+        self._cube = AnalyticsCube()
+        self._item_facts = ItemFactTable()
+        self._trends = TrendEngine()
+
+    # ---------- 构造 ----------
+
+    @classmethod
+    def from_frame(cls, df):
+        """由英文列的记录表（record_loader 的输出）构造"""
+        table = cls(capacity=max(len(df), 1024))
+        table.extend_frame(df)
+        return table
+
+    @classmethod
+    def from_session_records(cls, records):
+        """由中文键的记录字典列表构造（示例数据、模拟数据）"""
+        table = cls(capacity=max(len(records), 1024))
+        if records:
+            table.extend_frame(normalize_frame(pd.DataFrame(records)))
+        return table
+
+    # ---------- 修改 ----------
+
+    def append(self, record):
+        """追加一条中文键的记录"""
+        self.extend_frame(normalize_frame(pd.DataFrame([record])))
+
+    def extend_frame(self, df):
+        """
+        批量追加英文列的记录（已经过 record_schema.normalize_frame）
+
+        record_loader 的输出已带 ts 列，不再解析时间字符串
+        """
+        if len(df) == 0:
+            return
+        self._extend_columns(
+            ts=df["ts"].to_numpy(dtype=np.int64) if "ts" in df else parse_datetimes(df["datetime"]),
+            map=df["map"], mode=df["mode"], zone=df["zone"], items=df["items"],
+            profit=df["profit"], survived=df["survived"],
+            duration=df["duration"] if "duration" in df else np.full(len(df), np.nan),
+        )
+
+    def _extend_columns(self, ts, profit, survived, duration, **categories):
+        """按列追加，类别列在这里编码"""
+        n = len(ts)
+        self._reserve(self._size + n)
+        end = self._size + n
+
+        cols = self._columns
+        cols["ts"][self._size:end] = ts
+        self._derive_day(self._size, end)
+        cols["profit"][self._size:end] = np.asarray(profit, dtype=np.int64)
+        cols["survived"][self._size:end] = np.asarray(survived, dtype=bool)
+        cols["duration"][self._size:end] = np.asarray(duration, dtype=np.float64)
+        for name, values in categories.items():
+            cols[name][self._size:end] = self._encode(name, values)
+        self._item_facts.extend(self._size, cols["items"][self._size:end], cols["profit"][self._size:end],
+                                self._categories["items"])
+
+        self._size = end
+        self.version += 1
+
+    def _derive_day(self, start, end):
+        """由时间列计算日期，随记录一起保存，分析立方体按日分组时不再从时间列推导"""
+        ts = self._columns["ts"][start:end]
+        self._columns["day"][start:end] = np.where(ts != NAT, ts // 86400, NAT)
+
+    def _encode(self, name, values):
+        """字符串列编码为类别编号，只对去重后的值查字典"""
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object).fillna("").astype(str))
+        index = self._category_index[name]
+        categories = self._categories[name]
+        remap = np.empty(len(uniques), dtype=np.int32)
+        for i, value in enumerate(uniques):
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(categories)
+                categories.append(value)
+            remap[i] = code
+        return remap[codes]
+
+    def _reserve(self, size):
+        """容量不足时按倍数扩容"""
+        capacity = len(self._columns["ts"])
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2)
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    # ---------- 读取 ----------
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def cache_key(self):
+        """记录集版本：(表编号, 修改版本)，不同的表对象不会相同，用作分析结果缓存的键"""
+        return self._id, self.version
+
+    def column(self, name):
+        """取一列的只读视图（ts/day/profit/survived/duration 为数值，类别列为编号）"""
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def categories(self, name):
+        """类别列的编号 -> 字符串表"""
+        return list(self._categories[name])
+
+    def decode(self, name, rows=None):
+        """类别列解码为字符串数组，rows 为行号数组时只解码这些行"""
+        table = np.array(self._categories[name], dtype=object)
+        codes = self._columns[name][:self._size]
+        return table[codes if rows is None else codes[rows]]
+
+    def total_profit(self, survived_only=True):
+        """收益合计（默认只计撤离局）"""
+        profit = self._columns["profit"][:self._size]
+        if survived_only:
+            profit = profit[self._columns["survived"][:self._size]]
+        return int(profit.sum())
+
+    def _time_order(self):
+        """按时间排序的行号（NaT 排在最前），记录没有变化时复用"""
+        if self._order_version != self.version:
+            ts = self._columns["ts"][:self._size]
+            self._order = np.argsort(ts, kind="stable")
+            self._sorted_ts = ts[self._order]
+            self._order_version = self.version
+        return self._order, self._sorted_ts
+
+    def between(self, date_from=None, date_to=None):
+        """
+        时间范围内的记录（中文列 DataFrame，按时间排序）
+
+        用二分查找定位范围，只为范围内的行生成 DataFrame，不扫描全部记录
+        """
+        order, ts = self._time_order()
+        lo = np.searchsorted(ts, NAT, side="right")  # 跳过时间未知的记录
+        if date_from is not None:
+            lo = max(lo, np.searchsorted(ts, pd.Timestamp(date_from).value // 10**9, side="left"))
+        hi = len(ts)
+        if date_to is not None:
+            hi = np.searchsorted(ts, pd.Timestamp(date_to).value // 10**9, side="right")
+        return self.to_frame(order[lo:hi])
+
+    def cube(self):
+        """分析立方体，只折叠上次之后新增的记录"""
+        self._cube.update(self)
+        return self._cube
+
+    def trends(self):
+        """滚动趋势序列，只处理上次之后新增的记录"""
+        self._trends.update(self)
+        return self._trends
+
+    def item_facts(self):
+        """物品事实表（随记录追加，每种物资文本只拆分一次）"""
+        return self._item_facts
+
+    def to_frame(self, rows=None):
+        """
+        中文列的 DataFrame（rows 为行号数组时只包含这些行）
+
+        每次按需生成、不缓存：记录表本身就是数据，不再常驻一份 object 列的副本；
+        需要复用的统计结果由分析结果缓存按记录集版本缓存
+        """
+        rows = np.arange(self._size) if rows is None else np.asarray(rows, dtype=np.int64)
+        cols = self._columns
+        return pd.DataFrame({
+            "日期": cols["ts"][rows].astype("datetime64[s]"),
+            "地图": self.decode("map", rows),
+            "模式": self.decode("mode", rows),
+            "刷新点": self.decode("zone", rows),
+            "物资": self.decode("items", rows),
+            "价值": cols["profit"][rows],
+            "撤离": np.where(cols["survived"][rows], *SURVIVED_SYMBOLS).astype(object),
+        })
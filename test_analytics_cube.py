@@ -0,0 +1,68 @@
+"""
+分析立方体的测试（pytest）：立方体的上卷结果应与对逐条记录直接分组一致
+"""
+
+import pandas as pd
+
+from record_schema import normalize_frame, with_timestamps
+from record_table import RecordTable
+
+
+def make_table():
+    df = pd.DataFrame({
+        "datetime": ["2025-06-01 10:00", "2025-06-01 11:30", "2025-06-02T09:00:00", "无法解析", None,
+                     "2025/6/3 20:15"],
+        "map": ["零号大坝", "航天基地", "零号大坝", "零号大坝", "巴克什", "航天基地"],
+        "mode": ["机密", "绝密", "机密", "绝密", "机密", "机密"],
+        "zone": ["", "A区", "", "", "", "B区"],
+        "items": ["金表; 文件", "", "M4A1", "", "", "大药"],
+        "profit": [1000, -200, 300, 800, 50, 0],
+        "survived": ["是", "否", "true", "", None, "❌"],
+    })
+    return RecordTable.from_frame(with_timestamps(normalize_frame(df)))
+
+
+def test_totals_include_unknown_time_records():
+    table = make_table()
+    frame = table.to_frame()
+    totals = table.cube().totals()
+
+    assert totals["games"] == len(table) == 6
+    assert totals["survived"] == int((frame["撤离"] == "✅").sum()) == 4
+    assert totals["profit"] == int(frame["价值"].sum())
+    assert totals["best"] == 1000
+
+
+def test_dimension_rollups_match_records():
+    table = make_table()
+    frame = table.to_frame()
+    cube = table.cube()
+
+    by_map = cube.summary(["map"]).set_index("地图")
+    expected = frame.groupby("地图")["价值"].agg(["sum", "size"])
+    assert by_map["总收益"].to_dict() == expected["sum"].to_dict()
+    assert by_map["局数"].to_dict() == expected["size"].to_dict()
+    assert cube.summary(["mode"])["局数"].sum() == len(table)
+    assert cube.risk("mode")["存活率"].notna().all()
+
+
+def test_daily_summary_excludes_unknown_day():
+    table = make_table()
+    daily = table.cube().summary(["day"])
+
+    assert daily["日期"].notna().all()
+    assert daily["局数"].tolist() == [2, 1, 1]
+    assert daily["总收益"].cumsum().iloc[-1] == 1000 - 200 + 300
+
+
+def test_cube_updates_incrementally():
+    table = make_table()
+    cube = table.cube()
+    version = cube.version
+    table.append({"日期": "2025-06-03 21:00", "地图": "零号大坝", "模式": "机密", "价值": 500, "撤离": "✅"})
+    table.append({"日期": "", "地图": "零号大坝", "模式": "机密", "价值": 1, "撤离": "✅"})
+
+    cube = table.cube()
+    assert cube.version > version
+    assert cube.totals()["games"] == len(table) == 8
+    assert cube.summary(["day"])["局数"].sum() == 5
@@ -3,6 +3,8 @@ import pandas as pd
 from pathlib import Path
 import json
 
+from record_schema import normalize_frame, to_ui_frame
+
 st.title("数据加载测试")
 
 data_dir = Path.home() / "Documents" / "DeltaTool"
@@ -18,18 +20,7 @@ if csv_file.exists():
     st.dataframe(df)
     
     # 转换
-    records = []
-    for _, row in df.iterrows():
-        record = {
-            "日期": str(row.get('datetime', '')),
-            "地图": str(row.get('map', '未知')),
-            "模式": str(row.get('mode', '未知')),
-            "刷新点": str(row.get('zone', '')),
-            "物资": str(row.get('items', '')),
-            "价值": int(row.get('profit', 0)) if pd.notna(row.get('profit')) else 0,
-            "撤离": "✅" if row.get('survived', True) else "❌"
-        }
-        records.append(record)
+    records = to_ui_frame(normalize_frame(df)).to_dict("records")
     
     st.write("转换后的记录:")
     st.write(records)
@@ -1,6 +1,10 @@
 import pandas as pd
 from pathlib import Path
 import json
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent / "desktop"))
+from columnar_snapshot import load_snapshot  # type: ignore
 
 data_dir = Path.home() / "Documents" / "DeltaTool"
 print(f"数据目录: {data_dir}")
@@ -12,9 +16,16 @@ if data_dir.exists():
     for f in files:
         print(f"  - {f.name} ({f.stat().st_size} bytes)")
 
-# 测试JSON加载
+# 测试列式快照加载（过期时回退到JSON）
 json_file = data_dir / "game_records.json"
-if json_file.exists():
+npz_file = data_dir / "game_records.npz"
+columns = load_snapshot(npz_file, json_file) if json_file.exists() else None
+if columns is not None:
+    print(f"\n读取 {npz_file.name}:")
+    print(f"  记录数: {len(columns['ts'])}")
+    print(f"  地图: {list(columns['map_categories'])}")
+    print(f"  模式: {list(columns['mode_categories'])}")
+elif json_file.exists():
     print(f"\n读取 {json_file.name}:")
     with open(json_file, 'r', encoding='utf-8') as f:
         records = json.load(f)
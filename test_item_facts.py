@@ -0,0 +1,36 @@
+"""
+物品事实表的测试（pytest）：一局各物品的收益份额之和等于本局收益
+"""
+
+import numpy as np
+import pandas as pd
+
+from item_facts import ItemFactTable
+from record_schema import normalize_frame, with_timestamps
+from record_table import RecordTable
+
+
+def test_values_sum_to_raid_profit():
+    df = pd.DataFrame({
+        "datetime": ["2025-06-01 10:00"] * 6,
+        "map": ["零号大坝"] * 6,
+        "mode": ["机密"] * 6,
+        "items": ["金表; 文件; 医疗包", "金表; 金表; 文件", "", "M4A1; 大药; 文件", "金表", "文件; 金表"],
+        "profit": [1000, -1000, 300, -7, 0, 1],
+        "survived": ["是"] * 6,
+    })
+    table = RecordTable.from_frame(with_timestamps(normalize_frame(df)))
+    facts = table.item_facts()
+
+    sums = np.bincount(facts.column("raid_id"), weights=facts.column("value"), minlength=len(df))
+    has_items = df["items"] != ""
+    assert sums[has_items.to_numpy()].tolist() == df["profit"][has_items].tolist()
+
+
+def test_negative_shares_mirror_positive():
+    texts = ["金表; 文件; 医疗包"]
+    gains, losses = ItemFactTable(), ItemFactTable()
+    gains.extend(0, [0], [100], texts)
+    losses.extend(0, [0], [-100], texts)
+    assert losses.column("value").tolist() == [-v for v in gains.column("value").tolist()]
+    assert gains.column("value").tolist() == [34, 33, 33]
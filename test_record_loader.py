@@ -0,0 +1,97 @@
+"""
+记录加载器的测试（pytest）：定长记录文件与逐条解析 JSON 得到相同的记录表，按日期范围只读取相关月分区
+"""
+
+import pandas as pd
+
+from record_loader import RecordLoaderCache, memmap_to_frame
+from record_schema import normalize_frame, with_timestamps
+from data_manager import DataManager  # type: ignore
+from record_memmap import open_record_file  # type: ignore
+
+
+RECORDS = [
+    {"datetime": "2025/12/9 20:47", "map": "零号大坝", "mode": "机密", "zone": "A区",
+     "items": [{"name": "金表"}, {"name": "文件"}], "profit": 1200, "survived": True, "duration": 610.5},
+    {"datetime": "2025-12-10T09:00:00", "map": "航天基地", "mode": "绝密", "zone": "",
+     "items": [], "profit": -300, "survived": False},
+    {"datetime": "无法解析", "mode": "机密", "zone": "", "items": "金表", "profit": 5, "survived": ""},
+]
+
+
+def make_data(tmp_path):
+    dm = DataManager(tmp_path)
+    dm.add_records(RECORDS)
+    dm.save_data()
+    dm.close()
+    return tmp_path / "game_records.json"
+
+
+def test_loader_reads_memmap_file(tmp_path):
+    json_file = make_data(tmp_path)
+    record_file = open_record_file(json_file, json_file)
+    assert record_file is not None and len(record_file) == len(RECORDS)
+    assert record_file.partitions() == ["2025-12", "unknown"]
+
+    expected = with_timestamps(normalize_frame(pd.DataFrame(RECORDS)))
+    frame = pd.concat([memmap_to_frame(record_file.open(name)) for name in record_file.partitions()],
+                      ignore_index=True)
+    for name in ["datetime", "map", "mode", "zone", "items", "profit", "survived", "ts"]:
+        assert frame[name].astype(object).tolist() == expected[name].astype(object).tolist(), name
+    assert frame["duration"].isna().tolist() == [False, True, True]
+
+    loaded = RecordLoaderCache(tmp_path).load()
+    assert loaded["profit"].tolist() == [1200, -300, 5]
+
+
+def test_rewrite_replaces_data_file(tmp_path):
+    json_file = make_data(tmp_path)
+    reader = open_record_file(json_file, json_file).open("2025-12")  # 读取方仍映射着旧文件
+
+    dm = DataManager(tmp_path)
+    dm.add_record({"datetime": "2025-12-11T10:00:00", "map": "巴克什", "mode": "机密", "profit": 1, "survived": True})
+    dm.save_data()
+    dm.close()
+
+    assert len(reader) == 2
+    assert len(open_record_file(json_file, json_file).open("2025-12")) == 3
+    del reader
+    assert len(list(tmp_path.glob("game_records.*.rec.npy"))) == 2
+
+
+def monthly_records(months):
+    return [{"datetime": f"2025-{m:02d}-{d:02d}T12:00:00", "map": "零号大坝", "mode": "机密",
+             "items": [], "profit": m * 100 + d, "survived": True}
+            for m in months for d in (1, 15)]
+
+
+def test_date_range_reads_only_matching_partitions(tmp_path):
+    dm = DataManager(tmp_path)
+    dm.add_records(monthly_records(range(1, 7)) + [{"datetime": "无法解析", "profit": 1}])
+    dm.save_data()
+    dm.add_record({"datetime": "2025-06-20T08:00:00", "map": "零号大坝", "mode": "机密", "profit": 7, "survived": True})
+    dm.close()
+
+    loader = RecordLoaderCache(tmp_path)
+    recent = loader.load("2025-05-15", "2025-06-30")
+    assert sorted(recent["profit"]) == [7, 515, 601, 615]
+    assert len(loader._partitions) == 2  # 只读取了 5 月和 6 月
+
+    assert len(loader.load()) == 14
+    assert len(loader._partitions) == 7  # 6 个月份 + 时间未知
+
+
+def test_unchanged_months_keep_their_files(tmp_path):
+    json_file = tmp_path / "game_records.json"
+    dm = DataManager(tmp_path)
+    dm.add_records(monthly_records([1, 2]))
+    dm.save_data()
+    before = open_record_file(json_file, json_file)
+
+    dm.add_record({"datetime": "2025-02-20T08:00:00", "map": "零号大坝", "mode": "机密", "profit": 1, "survived": True})
+    dm.save_data()
+    dm.close()
+    after = open_record_file(json_file, json_file)
+    assert after.file_of("2025-01") == before.file_of("2025-01")
+    assert after.file_of("2025-02") != before.file_of("2025-02")
+    assert len(after.open("2025-02")) == 3
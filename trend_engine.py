@@ -0,0 +1,193 @@
+"""
+滚动趋势模块
+按时间顺序逐局维护趋势序列，每种窗口（按局数）一组：
+    存活率      最近 w 局的撤离比例（%）
+    EWMA收益    跨度为 w 局的指数加权平均收益
+    每小时收益  最近 w 局的收益 / 最近 w 局的游戏时长
+以及累计收益（所有窗口共用）
+
+收益、撤离局数、游戏时长都保存前缀和，窗口合计 = 前缀和之差；EWMA 只依赖上一局的值。
+追加一局只需每个窗口 O(1) 的计算，不回看历史；批量追加时同样的递推整批向量化计算
+
+每局时长取记录的对局时长（桌面客户端结束对局时记录）；没有时长的记录（旧记录、手动录入、CSV 导入）
+按与上一局的间隔估算：间隔超过 MAX_RAID_MINUTES 视为中途休息，按 DEFAULT_RAID_MINUTES 计
+"""
+
+import numpy as np
+import pandas as pd
+
+from record_schema import NAT
+
+
+DEFAULT_WINDOWS = (10, 50, 200)
+DEFAULT_RAID_MINUTES = 25
+MAX_RAID_MINUTES = 60
+
+
+def _grow(column, size):
+    """数组扩容到至少 size（按倍数）"""
+    if len(column) >= size:
+        return column
+    grown = np.empty(max(size, len(column) * 2), dtype=column.dtype)
+    grown[:len(column)] = column
+    return grown
+
+
+class TrendEngine:
+    """
+    增量维护的滚动趋势序列
+
+    update(table) 只处理记录表中上次之后新增的行（时间未知的记录不计入）；
+    新增记录早于已处理的最后一局时（如导入了更早的 CSV），按时间顺序整体重建
+    """
+
+    def __init__(self, windows=DEFAULT_WINDOWS, capacity=1024):
+        self.windows = tuple(windows)
+        self.rows = 0  # 已处理的记录表行数
+        self.version = 0
+        self._reset(capacity)
+
+    def _reset(self, capacity):
+        self._size = 0
+        self._ts = np.empty(capacity, dtype=np.int64)
+        # 前缀和：第 i 项为前 i 局的合计（第 0 项为 0）
+        self._cum = {name: np.zeros(capacity + 1, dtype=dtype)
+                     for name, dtype in (("profit", np.int64), ("survived", np.int64), ("hours", np.float64))}
+        self._ewma = {w: np.empty(capacity, dtype=np.float64) for w in self.windows}
+
+    def __len__(self):
+        return self._size
+
+    # ---------- 维护 ----------
+
+    def update(self, table):
+        """把记录表新增的行并入趋势序列"""
+        n = len(table)
+        if n <= self.rows:
+            return
+        new = slice(self.rows, n)
+        ts = table.column("ts")[new]
+        known = ts != NAT
+        ts = ts[known]
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        profit = table.column("profit")[new][known][order]
+        survived = table.column("survived")[new][known][order]
+        duration = table.column("duration")[new][known][order]
+
+        if self._size and len(ts) and ts[0] < self._ts[self._size - 1]:
+            # 有更早的记录插入：按时间顺序从头计算
+            all_ts = table.column("ts")[:n]
+            known = all_ts != NAT
+            order = np.argsort(all_ts[known], kind="stable")
+            self._reset(max(int(known.sum()), 1024))
+            ts = all_ts[known][order]
+            profit = table.column("profit")[:n][known][order]
+            survived = table.column("survived")[:n][known][order]
+            duration = table.column("duration")[:n][known][order]
+
+        self.extend(ts, profit, survived, duration)
+        self.rows = n
+
+    def append(self, ts, profit, survived, duration=None):
+        """追加一局（时间不早于已有的最后一局），duration 为对局时长（秒），未知时为 None"""
+        self.extend(np.array([ts], dtype=np.int64), [profit], [survived],
+                    [np.nan if duration is None else duration])
+
+    def extend(self, ts, profit, survived, duration=None):
+        """按时间顺序追加一批对局，duration 为各局时长（秒），未知的为 NaN"""
+        count = len(ts)
+        if count == 0:
+            return
+        start, end = self._size, self._size + count
+        self._reserve(end)
+        self._ts[start:end] = ts
+
+        # 每局时长：有记录的对局时长直接使用，否则按与上一局的间隔估算，过长视为休息
+        prev = self._ts[start - 1] if start else ts[0] - DEFAULT_RAID_MINUTES * 60
+        gaps = np.diff(np.asarray(ts, dtype=np.int64), prepend=prev) / 60
+        minutes = np.where(gaps > MAX_RAID_MINUTES, DEFAULT_RAID_MINUTES, gaps)
+        if duration is not None:
+            recorded = np.asarray(duration, dtype=np.float64) / 60
+            minutes = np.where(recorded > 0, recorded, minutes)
+
+        cum = self._cum
+        cum["profit"][start + 1:end + 1] = cum["profit"][start] + np.cumsum(np.asarray(profit, dtype=np.int64))
+        cum["survived"][start + 1:end + 1] = cum["survived"][start] + np.cumsum(np.asarray(survived, dtype=np.int64))
+        cum["hours"][start + 1:end + 1] = cum["hours"][start] + np.cumsum(minutes / 60)
+
+        values = np.asarray(profit, dtype=np.float64)
+        for w in self.windows:
+            if start:
+                # 上一局的 EWMA 作为首项，从它继续递推
+                seeded = np.concatenate(([self._ewma[w][start - 1]], values))
+                ewma = pd.Series(seeded).ewm(span=w, adjust=False).mean().to_numpy()[1:]
+            else:
+                ewma = pd.Series(values).ewm(span=w, adjust=False).mean().to_numpy()
+            self._ewma[w][start:end] = ewma
+
+        self._size = end
+        self.version += 1
+
+    def _reserve(self, size):
+        """容量不足时按倍数扩容"""
+        if size <= len(self._ts):
+            return
+        self._ts = _grow(self._ts, size)
+        capacity = len(self._ts)
+        for name, column in self._cum.items():
+            self._cum[name] = _grow(column, capacity + 1)
+        for w, column in self._ewma.items():
+            self._ewma[w] = _grow(column, capacity)
+
+    # ---------- 查询 ----------
+
+    def _rolling(self, name, window, rows):
+        """第 rows 局（下标）为止最近 window 局的合计"""
+        cum = self._cum[name]
+        return cum[rows + 1] - cum[np.maximum(rows + 1 - window, 0)]
+
+    def latest(self):
+        """最新一局的各项指标：{窗口: {存活率, EWMA收益, 每小时收益}}，以及累计收益"""
+        if self._size == 0:
+            return None
+        last = np.array([self._size - 1])
+        result = {"累计收益": int(self._cum["profit"][self._size])}
+        for w in self.windows:
+            series = self._series(w, last)
+            result[w] = {name: float(series[name][0]) for name in ("存活率", "EWMA收益", "每小时收益")}
+        return result
+
+    def _series(self, window, rows):
+        """rows（局的下标数组）处的各项滚动指标"""
+        games = np.minimum(rows + 1, window)
+        hours = self._rolling("hours", window, rows)
+        return {
+            "存活率": self._rolling("survived", window, rows) / games * 100,
+            "EWMA收益": self._ewma[window][rows],
+            "每小时收益": np.divide(self._rolling("profit", window, rows), hours,
+                               out=np.zeros(len(rows)), where=hours > 0),
+        }
+
+    def frame(self, window, since=None, points=None):
+        """
+        某个窗口的趋势序列（每局一行）
+
+        列：时间、局数（第几局）、累计收益、存活率、EWMA收益、每小时收益
+        since 为起始时间时只返回此后的对局（滚动值仍按完整历史计算）；
+        points 限制返回的行数（等间隔抽样，保留最后一局），用于作图
+        """
+        if window not in self._ewma:
+            raise ValueError(f"未维护的窗口: {window}，可选 {self.windows}")
+        first = 0
+        if since is not None:
+            first = int(np.searchsorted(self._ts[:self._size], pd.Timestamp(since).value // 10**9, side="left"))
+        rows = np.arange(first, self._size)
+        if points and len(rows) > points:
+            rows = rows[np.linspace(0, len(rows) - 1, points).astype(np.int64)]
+        return pd.DataFrame({
+            "时间": self._ts[rows].astype("datetime64[s]"),
+            "局数": rows + 1,
+            "累计收益": self._cum["profit"][rows + 1],
+            **self._series(window, rows),
+        })